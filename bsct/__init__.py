@@ -4,3 +4,13 @@ __author__   = "gu1lhem"
 __licence__  = "GNU General Public License v3 (GPLv3)"
 __version__  = "1.0.3"
 __desc__     = "A repository of Bootstrap CRUD templates for Django."
+
+
+def __getattr__(name):
+    # bsct.site is imported on first use: the package is imported before
+    # the applications are ready.
+    if name == "site":
+        from bsct.registry import site
+
+        return site
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
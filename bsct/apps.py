@@ -0,0 +1,30 @@
+import logging
+
+from django.apps import AppConfig
+from django.conf import settings
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+
+class BSCTConfig(AppConfig):
+    name = "bsct"
+    verbose_name = "BSCT"
+
+    def ready(self):
+        # The warm-up imports the URLconf: bsct must come after the
+        # applications whose ready() registers URLs (e.g. the admin) in
+        # INSTALLED_APPS.
+        if getattr(settings, "BSCT_WARMUP", False):
+            from bsct.warmup import warmup
+
+            report = warmup()
+            models = [label for label in report.slowest() if label != "(common)"]
+            logger.info(
+                "BSCT warm-up: %d models in %.2f ms, slowest: %s.",
+                len(models),
+                sum(report.total(label) for label in report.timings) * 1000,
+                ", ".join(models[:5]),
+            )
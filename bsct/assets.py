@@ -0,0 +1,236 @@
+"""
+Static asset bundles of the BSCT pages.
+
+Each page loads only the bundle it needs: ``page`` (Bootstrap) for the
+detail, form and delete pages, ``list`` (jQuery, DataTables and the used
+extensions) for the lists. The ``jszip`` and ``pdfmake`` bundles are loaded
+by the list when the Excel or PDF export button is clicked.
+
+The ``bsct_assets`` management command concatenates the files of each bundle
+into content-hashed files (``bsct/bundles/<name>.<hash>.js``), with gzip and,
+if the brotli package is installed, brotli siblings for servers serving
+precompressed files, and writes their names in ``bsct/bundles/manifest.json``
+under ``BSCT_ASSETS_ROOT`` (STATIC_ROOT by default). Without manifest, the
+template tags load the files of the bundles one by one.
+"""
+import functools
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import FileSystemStorage
+from django.core.signals import setting_changed
+from django.templatetags.static import static
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files of the bundles, by kind, as static paths in load order.
+DEFAULT_BUNDLES = {
+    "page": {
+        "css": [
+            "Bootstrap-5-5.0.1/css/bootstrap.min.css",
+            "style.css",
+        ],
+        "js": [
+            "Bootstrap-5-5.0.1/js/bootstrap.bundle.min.js",
+        ],
+    },
+    "list": {
+        "css": [
+            "Bootstrap-5-5.0.1/css/bootstrap.min.css",
+            "DataTables-1.11.5/css/dataTables.bootstrap5.min.css",
+            "AutoFill-2.3.7/css/autoFill.bootstrap5.min.css",
+            "Buttons-2.2.2/css/buttons.bootstrap5.min.css",
+            "ColReorder-1.5.5/css/colReorder.bootstrap5.min.css",
+            "Select-1.3.4/css/select.bootstrap5.min.css",
+            "StateRestore-1.1.0/css/stateRestore.bootstrap5.min.css",
+            "style.css",
+        ],
+        "js": [
+            "jQuery-3.6.0/jquery-3.6.0.min.js",
+            "Bootstrap-5-5.0.1/js/bootstrap.bundle.min.js",
+            "DataTables-1.11.5/js/jquery.dataTables.min.js",
+            "DataTables-1.11.5/js/dataTables.bootstrap5.min.js",
+            "AutoFill-2.3.7/js/dataTables.autoFill.min.js",
+            "AutoFill-2.3.7/js/autoFill.bootstrap5.min.js",
+            "Buttons-2.2.2/js/dataTables.buttons.min.js",
+            "Buttons-2.2.2/js/buttons.bootstrap5.min.js",
+            "Buttons-2.2.2/js/buttons.colVis.min.js",
+            "Buttons-2.2.2/js/buttons.html5.min.js",
+            "ColReorder-1.5.5/js/dataTables.colReorder.min.js",
+            "ColReorder-1.5.5/js/colReorder.bootstrap5.min.js",
+            "Select-1.3.4/js/dataTables.select.min.js",
+            "Select-1.3.4/js/select.bootstrap5.min.js",
+            "StateRestore-1.1.0/js/dataTables.stateRestore.min.js",
+            "StateRestore-1.1.0/js/stateRestore.bootstrap5.min.js",
+        ],
+    },
+    "jszip": {
+        "js": ["JSZip-2.5.0/jszip.min.js"],
+    },
+    "pdfmake": {
+        "js": [
+            "pdfmake-0.1.36/pdfmake.min.js",
+            "pdfmake-0.1.36/vfs_fonts.js",
+        ],
+    },
+}
+
+BUNDLES = getattr(settings, "BSCT_BUNDLES", DEFAULT_BUNDLES)
+
+# Directory of the bundles, as a static path.
+BUNDLES_DIR = "bsct/bundles"
+MANIFEST_NAME = posixpath.join(BUNDLES_DIR, "manifest.json")
+
+_SOURCE_MAP = re.compile(r"^\s*(//[#@]\s*sourceMappingURL=.*|/\*[#@]\s*sourceMappingURL=.*\*/)\s*$", re.M)
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+class BundleError(Exception):
+    pass
+
+
+def get_assets_root():
+    """
+    Returns the directory the bundles are written to, or None.
+    """
+    return getattr(settings, "BSCT_ASSETS_ROOT", None) or settings.STATIC_ROOT
+
+
+def _rewrite_css_urls(content, path):
+    """
+    Makes the relative URLs of a stylesheet relative to the bundles
+    directory.
+    """
+    directory = posixpath.dirname(path)
+
+    def rewrite(match):
+        url = match.group(2).strip()
+        if url.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+        target, suffix = re.match(r"([^?#]*)(.*)", url).groups()
+        target = posixpath.normpath(posixpath.join(directory, target))
+        return "url('%s%s')" % (posixpath.relpath(target, BUNDLES_DIR), suffix)
+
+    return _CSS_URL.sub(rewrite, content)
+
+
+def concatenate(paths, kind):
+    """
+    Returns the content of the files of a bundle, found by the static files
+    finders, without their source maps.
+    """
+    parts = []
+    for path in paths:
+        absolute_path = finders.find(path)
+        if not absolute_path:
+            raise BundleError("%s is not found by the static files finders." % path)
+        with open(absolute_path, encoding="utf-8") as f:
+            content = _SOURCE_MAP.sub("", f.read())
+        if kind == "css":
+            content = _rewrite_css_urls(content, path)
+        parts.append("/* %s */\n%s" % (path, content))
+    # A semicolon ends a script without one before the next.
+    return ("\n;\n" if kind == "js" else "\n").join(parts).encode("utf-8")
+
+
+def write_file(root, name, data, compress=True):
+    """Writes a bundle file and its precompressed siblings.
+
+    Returns:
+        dict: the size of the file in bytes, by encoding.
+    """
+    path = os.path.join(root, *name.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    files = {"": data}
+    if compress:
+        # A fixed mtime keeps the output reproducible.
+        files["gz"] = gzip.compress(data, compresslevel=9, mtime=0)
+        if brotli is not None:
+            files["br"] = brotli.compress(data)
+    sizes = {}
+    for extension, content in files.items():
+        with open(path + "." + extension if extension else path, "wb") as f:
+            f.write(content)
+        sizes[extension or "raw"] = len(content)
+    return sizes
+
+
+def build_bundles(root, bundles=None, compress=True):
+    """Writes the bundles and their manifest under root.
+
+    Returns:
+        dict: {bundle: {kind: (static path, sizes)}}.
+    """
+    bundles = BUNDLES if bundles is None else bundles
+    manifest = {}
+    built = {}
+    for bundle, kinds in bundles.items():
+        for kind, paths in kinds.items():
+            data = concatenate(paths, kind)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            name = posixpath.join(BUNDLES_DIR, "%s.%s.%s" % (bundle, digest, kind))
+            sizes = write_file(root, name, data, compress)
+            manifest.setdefault(bundle, {})[kind] = name
+            built.setdefault(bundle, {})[kind] = (name, sizes)
+
+    # Written last, so the pages switch to complete bundles.
+    manifest_path = os.path.join(root, *MANIFEST_NAME.split("/"))
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    clear_manifest()
+    return built
+
+
+@functools.lru_cache(maxsize=None)
+def get_manifest():
+    """
+    Returns the manifest written by the bsct_assets command, or None.
+    """
+    root = get_assets_root()
+    if not root:
+        return None
+    try:
+        with open(os.path.join(root, *MANIFEST_NAME.split("/"))) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def clear_manifest(**kwargs):
+    get_manifest.cache_clear()
+
+
+def get_bundle_urls(bundle, kind):
+    """
+    Returns the URLs of the files of a bundle: the bundled file if the
+    bundles are built, its source files otherwise.
+    """
+    try:
+        paths = BUNDLES[bundle].get(kind, [])
+    except KeyError:
+        raise BundleError("Unknown bundle: %s" % bundle)
+
+    manifest = get_manifest()
+    if manifest and kind in manifest.get(bundle, {}):
+        # Already fingerprinted: served as is, not through the storage.
+        storage = FileSystemStorage(location=get_assets_root(), base_url=settings.STATIC_URL)
+        return [storage.url(manifest[bundle][kind])]
+    return [static(path) for path in paths]
+
+
+def _clear_on_setting(setting, **kwargs):
+    if setting in ("BSCT_ASSETS_ROOT", "STATIC_ROOT", "STATIC_URL"):
+        clear_manifest()
+
+
+setting_changed.connect(_clear_on_setting)
@@ -0,0 +1,152 @@
+"""
+Autocomplete of the relation fields of the create and update forms.
+
+A ``<select>`` lists every row of the related table: above
+``BSCT_AUTOCOMPLETE_THRESHOLD`` rows (200 by default), the foreign key and
+many-to-many fields of the forms get an autocomplete widget instead. It
+renders the selected objects only, and searches the others with the
+``<prefix>_autocomplete`` view of the model, page by page.
+
+The search is a prefix search on the model's ``bsct_autocomplete_field``,
+or on its first indexed text field, and the pages seek on that field (see
+bsct.pagination.KeysetPaginator). The values posted are validated by the
+form field, against its queryset, as with a ``<select>``.
+"""
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.urls import NoReverseMatch, reverse
+
+from bsct.filters import is_indexed
+from bsct.pagination import CachedCount
+
+AUTOCOMPLETE_THRESHOLD = getattr(settings, "BSCT_AUTOCOMPLETE_THRESHOLD", 200)
+
+# The number of choices of the fields is counted at most once per 5 minutes.
+_counter = CachedCount()
+
+
+def get_search_field(model):
+    """
+    Returns the field searched by prefix: the model's
+    ``bsct_autocomplete_field``, or its first indexed text field, or its
+    first text field, or None to search by pk. Null values can not be
+    seeked on, so nullable fields are not chosen by default.
+    """
+    name = getattr(model, "bsct_autocomplete_field", None)
+    if name:
+        return model._meta.get_field(name)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, models.CharField) and not field.null
+    ]
+    for field in fields:
+        if is_indexed(field):
+            return field
+    return fields[0] if fields else None
+
+
+def search(queryset, query, lookup="istartswith"):
+    """
+    Returns (queryset, ordering): the objects matching the query, and the
+    field the pages seek on.
+    """
+    field = get_search_field(queryset.model)
+    if field is None:
+        if query:
+            try:
+                queryset = queryset.filter(pk=queryset.model._meta.pk.to_python(query))
+            except ValidationError:
+                queryset = queryset.none()
+        return queryset, "pk"
+    if query:
+        queryset = queryset.filter(**{"%s__%s" % (field.name, lookup): query})
+    return queryset, field.name
+
+
+class AutocompleteMixin(object):
+    """
+    Renders the selected objects of a ModelChoiceField only, with a search
+    input fetching the others from ``url``.
+    """
+
+    template_name = "bsct/widgets/autocomplete.html"
+
+    def __init__(self, url, attrs=None, choices=()):
+        super().__init__(attrs, choices)
+        self.url = url
+
+    def get_selected(self, value):
+        """
+        Returns the selected objects, or none if the values are invalid (the
+        form field reports them).
+        """
+        field = self.choices.field
+        values = [v for v in value if v not in field.empty_values]
+        if not values:
+            return []
+        key = field.to_field_name or "pk"
+        try:
+            return list(field.queryset.filter(**{"%s__in" % key: values}))
+        except (ValueError, TypeError, ValidationError):
+            return []
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = self.get_selected(value)
+        options = []
+        if not self.allow_multiple_selected:
+            # Selecting it clears the field.
+            options.append(("", field.empty_label or "", not selected))
+        options += [
+            (field.prepare_value(obj), field.label_from_instance(obj), True)
+            for obj in selected
+        ]
+        return [
+            (None, [self.create_option(name, option_value, label, is_selected, index, attrs=attrs)], index)
+            for index, (option_value, label, is_selected) in enumerate(options)
+        ]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["url"] = self.url
+        return context
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
+
+
+def set_autocomplete_widgets(form, bsct_view_prefix, threshold=AUTOCOMPLETE_THRESHOLD):
+    """
+    Gives the autocomplete widget to the relation fields of the form with
+    more than ``threshold`` choices, when the autocomplete view of the model
+    is registered.
+    """
+    for name, field in form.fields.items():
+        if (
+            not isinstance(field, forms.ModelChoiceField)
+            or isinstance(field.widget, AutocompleteMixin)
+            or field.widget.is_hidden
+        ):
+            continue
+        try:
+            url = reverse("%s_autocomplete" % bsct_view_prefix, kwargs={"field": name})
+        except NoReverseMatch:
+            return
+        count, _ = _counter.count(field.queryset)
+        if count <= threshold:
+            continue
+
+        if isinstance(field, forms.ModelMultipleChoiceField):
+            widget = AutocompleteSelectMultiple(url, attrs=dict(field.widget.attrs))
+        else:
+            widget = AutocompleteSelect(url, attrs=dict(field.widget.attrs))
+        widget.choices = field.choices
+        widget.is_required = field.required
+        field.widget = widget
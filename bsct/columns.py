@@ -0,0 +1,508 @@
+"""
+Column plans: the per-model description of what BSCT renders.
+
+Resolving the displayed fields of a model means walking ``_meta.get_fields()``,
+probing for the ``get_<field>_detail``, ``get_<field>_display`` and
+``get_<field>_render`` hooks and checking each field's internal type. None of
+this depends on the instance being rendered, so it is done once per model
+class and cached here. Rendering a row is then a flat loop over the
+precomputed columns.
+"""
+import inspect
+import logging
+import weakref
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import ForeignObjectRel
+from django.db.models.signals import class_prepared
+from django.template.loader import get_template
+from django.urls.exceptions import NoReverseMatch
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+ROW_ACTIONS_TEMPLATE = "bsct/plain/row_actions.html"
+
+# Rendered in place of the URL of a row, see RowActions.
+_URL_MARK = "bsct-row-url-3f1a9c"
+
+
+def _accepts(func, *args):
+    """
+    Returns True if ``func`` can be called with the positional ``args``.
+    """
+    try:
+        inspect.signature(func).bind(*args)
+    except TypeError:
+        return False
+    except ValueError:
+        # No signature available (builtins): assume the call is valid.
+        return True
+    return True
+
+
+def _hook(model, name):
+    """
+    Returns the name of the hook if the model defines it, None otherwise.
+    """
+    return name if callable(getattr(model, name, None)) else None
+
+
+def _hook_accepts_instance(model, name):
+    """
+    Returns True if the hook ``name``, once bound to an instance, accepts the
+    instance as an extra positional argument (``instance.hook(instance)``).
+    """
+    func = getattr(model, name)
+    if isinstance(inspect.getattr_static(model, name), (classmethod, staticmethod)):
+        return _accepts(func, model)
+    return _accepts(func, model, model)
+
+
+def _allowed_field_names(model):
+    """
+    Returns the names (or "__all__") allowed in the list view of a model.
+    """
+    if hasattr(model, "get_allowed_fields_list"):
+        return model.get_allowed_fields_list()
+    # Get fields allowed with get_allowed_fields() classmethod.
+    return model.get_allowed_fields()
+
+
+def get_allowed_fields(model):
+    """Returns allowed fields for a model.
+
+    Args:
+        model (Model): model or instance to look for allowed fields.
+
+    Returns:
+        list: list of allowed fields.
+    """
+    allowed_fields = _allowed_field_names(model)
+
+    if allowed_fields == "__all__":
+        # All fields, ignoring many-to-many fields
+        return [
+            f for f in model._meta.get_fields() if not getattr(f, "multiple", False)
+        ]
+    else:
+        return [
+            f
+            for f in model._meta.get_fields()
+            if f.name in allowed_fields and not getattr(f, "multiple", False)
+        ]
+
+
+def get_version_field(model):
+    """
+    Returns the field telling the version of an instance: its first
+    ``auto_now`` DateTimeField, or its ``updated`` field, or None.
+    """
+    for field in model._meta.concrete_fields:
+        if isinstance(field, models.DateTimeField) and field.auto_now:
+            return field
+    try:
+        return model._meta.get_field("updated")
+    except FieldDoesNotExist:
+        return None
+
+
+def get_creation_field(model):
+    """
+    Returns the field telling when an instance was created: its
+    ``date_added`` field, or its first ``auto_now_add`` date field, or None.
+    """
+    try:
+        field = model._meta.get_field("date_added")
+        if isinstance(field, models.DateField):
+            return field
+    except FieldDoesNotExist:
+        pass
+    for field in model._meta.concrete_fields:
+        if isinstance(field, models.DateField) and field.auto_now_add:
+            return field
+    return None
+
+
+def related_lookups(model, paths):
+    """Returns the lookups needed to load the relations traversed by ``paths``.
+
+    Single-valued relations (ForeignKey, OneToOneField and their reverse) are
+    joined with select_related; as soon as a path crosses a multi-valued
+    relation (ManyToManyField, reverse ForeignKey), it is prefetched instead.
+
+    Args:
+        model (Model): model the paths start from.
+        paths (list): field names or ``relation__field`` paths.
+
+    Returns:
+        tuple: (select_related lookups, prefetch_related lookups).
+    """
+    select_related, prefetch_related = [], []
+
+    for path in paths:
+        opts = model._meta
+        lookup = []
+        multiple = False
+        for name in path.split("__"):
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation or field.related_model is None:
+                break  # Concrete field (e.g. the 'name' of 'tree__name').
+
+            if field.many_to_many or field.one_to_many:
+                multiple = True
+            if isinstance(field, ForeignObjectRel) and multiple:
+                # Prefetching goes through the accessor (e.g. 'branch_set').
+                lookup.append(field.get_accessor_name())
+            else:
+                lookup.append(field.name)
+            opts = field.related_model._meta
+
+        if lookup:
+            lookups = prefetch_related if multiple else select_related
+            lookup = "__".join(lookup)
+            if lookup not in lookups:
+                lookups.append(lookup)
+
+    return select_related, prefetch_related
+
+
+class ListColumn(object):
+    """
+    A column of the list view, resolved once for a model.
+    """
+
+    __slots__ = (
+        "field", "name", "key", "label", "detail", "display", "render",
+        "is_datetime", "is_relation", "is_file",
+    )
+
+    def __init__(self, model, field):
+        self.field = field
+        self.name = field.name
+        self.key = field.__str__()
+        self.display = _hook(model, "get_%s_display" % field.name)
+        self.render = _hook(model, "get_%s_render" % field.name)
+        self.is_datetime = field.get_internal_type() == "DateTimeField"
+        self.is_relation = field.is_relation
+        self.is_file = field.__class__ is models.FileField
+
+        # The detail hook is called with the instance as argument: only keep
+        # it if its signature allows it, instead of failing on every row.
+        detail = _hook(model, "get_%s_detail" % field.name)
+        if detail and _hook_accepts_instance(model, detail):
+            self.detail = detail
+        else:
+            self.detail = None
+
+        # Headers are computed on the model class.
+        label = None
+        if detail and _accepts(getattr(model, detail), model):
+            try:
+                label = getattr(model, detail)(model)
+            except Exception:
+                label = None
+
+        verbose = getattr(field, "verbose_name", None)
+        if field.is_relation:
+            # If the field is a relation to a ForeignKey (one-to-many) field
+            self.label = field.related_model._meta.verbose_name or field.name
+        elif label:
+            self.label = label
+        elif verbose:
+            self.label = verbose
+        else:
+            self.label = field.name
+
+    def value(self, instance):
+        """
+        Returns the displayed value of the column for ``instance``.
+        """
+        value = getattr(instance, self.name, None)
+
+        if self.display:
+            value = getattr(instance, self.display)()
+        if self.render:
+            value = format_html("<div class={}>{}</div>", getattr(instance, self.render)(), value)
+        if self.is_datetime:
+            value = value.strftime(DATETIME_FORMAT)
+        if self.is_relation:
+            ref_url = getattr(instance, self.name).get_absolute_url()
+            return format_html("<a href='{}'>{}</a>", ref_url, value)
+        if value is None:
+            return ""
+        if self.detail:
+            return getattr(instance, self.detail)(instance)
+        if self.is_file:
+            # URL to the file
+            return format_html("<a href='{}'>{}</a>", value.url, value)
+        return value
+
+    def html(self, instance):
+        """
+        Returns the value of the column for ``instance`` as HTML: the links
+        and the values of the detail hooks as is, the other values escaped.
+        """
+        value = self.value(instance)
+        if self.detail and not self.is_relation:
+            return mark_safe(value)
+        return conditional_escape(value)
+
+
+class DetailColumn(object):
+    """
+    A row of the detail view, resolved once for a model.
+    """
+
+    __slots__ = (
+        "field", "name", "verbose", "detail", "display", "render",
+        "is_datetime", "is_relation", "is_multiple", "is_file", "accessor",
+        "relation_verbose", "relation_verbose_plural",
+    )
+
+    def __init__(self, model, field, detail=None):
+        self.field = field
+        self.name = field.name
+        self.verbose = getattr(field, "verbose_name", None)
+        self.detail = detail
+        self.display = _hook(model, "get_%s_display" % field.name)
+        self.render = _hook(model, "get_%s_render" % field.name)
+        self.is_datetime = field.get_internal_type() == "DateTimeField"
+        self.is_relation = field.is_relation
+        self.is_multiple = bool(field.many_to_many or field.one_to_many)
+        self.is_file = field.__class__ is models.FileField
+        if isinstance(field, ForeignObjectRel):
+            # Reverse relation: 'child_set' or its related_name.
+            self.accessor = field.get_accessor_name()
+        else:
+            self.accessor = field.name
+        if field.is_relation:
+            self.relation_verbose = field.related_model._meta.verbose_name
+            self.relation_verbose_plural = field.related_model._meta.verbose_name_plural
+        else:
+            self.relation_verbose = self.relation_verbose_plural = None
+
+    def add_to(self, details, instance):
+        """
+        Adds the field and its displayed value to the ``details`` dictionary.
+        """
+        if self.detail:
+            detail_method = getattr(instance, self.detail)
+            details[detail_method] = detail_method(instance)
+
+        value = getattr(instance, self.name, None)
+        relation_verbose = self.relation_verbose
+
+        if self.display:
+            value = getattr(instance, self.display)()
+        elif self.render:
+            value = f"<div class={getattr(instance, self.render)()}>{value}</div>"
+        elif self.is_datetime:
+            value = value.strftime(DATETIME_FORMAT)
+        elif self.is_relation:
+            if self.is_multiple:
+                # If the field is a relation to a many-to-many field
+
+                # Get the related objects and generate links.
+                # Prefetched by the DetailView: reading the set and counting it
+                # does not hit the database.
+                related = list(getattr(instance, self.accessor).all())
+                value = []
+                for i in related:
+                    try:
+                        value.append(f"<a href={i.get_absolute_url()}>{i}</a>")
+                    except NoReverseMatch:
+                        value.append(str(i).strip('<>'))
+
+                # Use the plural verbose name if there is multiple relations.
+                if len(related) > 1 and self.relation_verbose_plural:
+                    relation_verbose = self.relation_verbose_plural
+            else:
+                # If the field is a relation to a ForeignKey (one-to-many) field
+                foreign_key_element = getattr(instance, self.name)
+                if hasattr(foreign_key_element, "get_absolute_url"):
+                    ref_url = foreign_key_element.get_absolute_url()
+                    value = f"<a href='{ref_url}'>{value}</a>"
+                else:
+                    value = str(foreign_key_element)
+
+        # If the value is 'None', we want to display '-' instead.
+        if value is None or (type(value) is str and value.endswith("None")):
+            value = "-"
+
+        # Now, add the field to the details dictionary.
+        if self.is_relation:
+            details[relation_verbose or self.name] = value
+        elif self.verbose:
+            # Classic field with verbose_name
+            if self.is_file:
+                # URL to the file
+                details[self.verbose] = f"<a href='{value.url}'>{value}</a>"
+            else:
+                details[self.verbose] = value
+        else:
+            details[self.name] = value
+
+
+class RowActions(object):
+    """
+    The actions cell of the list rows, ``bsct/plain/row_actions.html``,
+    whose context is the ``url`` of the detail page of the row.
+
+    The template is rendered twice per list, without a URL and with a mark
+    in place of the URL, and each row fills the mark in. A template which
+    does not hold the mark exactly once is rendered for each row.
+    """
+
+    def __init__(self, template_name=ROW_ACTIONS_TEMPLATE):
+        self.template = get_template(template_name)
+        self.empty = self.template.render({"url": None})
+        parts = self.template.render({"url": _URL_MARK}).split(_URL_MARK)
+        self.parts = parts if len(parts) == 2 else None
+
+    def html(self, url):
+        if url is None:
+            return self.empty
+        if self.parts is None:
+            return self.template.render({"url": url})
+        return mark_safe(self.parts[0] + conditional_escape(url) + self.parts[1])
+
+
+class ColumnPlan(object):
+    """
+    Everything BSCT needs to render a model in the list and detail views.
+
+    Attributes:
+        model (Model): the model class the plan was built for.
+        list_columns (list): ListColumn of the list view, in display order.
+        headers (dict): list view headers, keyed like get_list_detail().
+        detail_columns (list): DetailColumn of the detail view.
+        detail_paths (list): ``relation__field`` paths of the detail view.
+        list_select_related (list): select_related lookups of the list view.
+        list_prefetch_related (list): prefetch_related lookups of the list view.
+        detail_select_related (list): select_related lookups of the detail view.
+        detail_prefetch_related (list): prefetch_related lookups of the detail
+            view.
+        sort_fields (dict): fields the list view can be sorted on, by column
+            name.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+        self.list_columns = [
+            ListColumn(model, field)
+            for field in get_allowed_fields(model)
+            # TextFields are not displayed in the list view.
+            if field.__class__ is not models.TextField
+        ]
+        self.headers = {column.key: column.label for column in self.list_columns}
+        self.sort_fields = {
+            column.name: column.field
+            for column in self.list_columns
+            if column.field.concrete and not column.field.many_to_many
+        }
+
+        # Get fields allowed with get_allowed_fields_details() classmethod.
+        allowed_fields = model.get_allowed_fields_details()
+        if allowed_fields == "__all__":
+            fields = model._meta.get_fields()
+            self.detail_paths = []
+        else:
+            fields = [f for f in model._meta.get_fields() if f.name in allowed_fields]
+            # Get fields that are in a foreign key relation.
+            self.detail_paths = [f for f in allowed_fields if "__" in f]
+
+        self.detail_columns = []
+        for field in fields:
+            detail = _hook(model, f"get_{field.name}_detail")
+            if detail and not _hook_accepts_instance(model, detail):
+                logger.warning(
+                    "Field %s is not displayed: %s.%s() does not accept the instance "
+                    "as argument.", field, model.__name__, detail,
+                )
+                continue
+            column = DetailColumn(model, field, detail)
+            if column.is_multiple and not (column.accessor and hasattr(model, column.accessor)):
+                logger.warning(
+                    "Field %s is not displayed: %s has no attribute %s.",
+                    field, model.__name__, column.accessor,
+                )
+                continue
+            self.detail_columns.append(column)
+
+        # Relations read while rendering: the list view reads single-valued
+        # relations only, the detail view also reads the reverse sets.
+        list_paths = _allowed_field_names(model)
+        if list_paths == "__all__":
+            list_paths = []
+        self.list_select_related, self.list_prefetch_related = related_lookups(
+            model,
+            [
+                column.name for column in self.list_columns
+                if column.is_relation and not column.field.many_to_many
+            ] + [f for f in list_paths if "__" in f],
+        )
+        self.detail_select_related, self.detail_prefetch_related = related_lookups(
+            model,
+            [
+                column.name for column in self.detail_columns
+                if column.is_relation
+            ] + self.detail_paths,
+        )
+
+
+# Column plans, by model class. Weak references let replaced model classes be
+# garbage collected along with their plan.
+_plans = weakref.WeakKeyDictionary()
+
+
+def get_column_plan(model):
+    """Returns the column plan of a model, building it on first use.
+
+    Args:
+        model (Model): model class or instance.
+
+    Returns:
+        ColumnPlan: the cached column plan.
+    """
+    if not isinstance(model, type):
+        model = model.__class__
+    try:
+        return _plans[model]
+    except KeyError:
+        plan = _plans[model] = ColumnPlan(model)
+        return plan
+
+
+def clear_column_plans(model=None):
+    """
+    Forgets the column plan of ``model``, or of every model if None.
+    """
+    if model is None:
+        _plans.clear()
+    else:
+        _plans.pop(model, None)
+
+
+def _invalidate_redefined_model(sender, **kwargs):
+    """
+    Drops plans built for a previous definition of a newly prepared model.
+    """
+    label = sender._meta.label_lower
+    for model in [m for m in list(_plans.keys()) if m._meta.label_lower == label]:
+        clear_column_plans(model)
+
+
+class_prepared.connect(_invalidate_redefined_model)
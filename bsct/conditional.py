@@ -0,0 +1,109 @@
+"""
+Conditional GET (ETag / Last-Modified) for the BSCT views.
+
+The validators are computed with a cheap query before the view renders
+anything, so requests from clients holding the current version are answered
+with a 304 without touching the templates:
+
+- detail: the version field (see bsct.columns.get_version_field) of the
+  object, as Last-Modified and in the ETag;
+- list: the latest version and the number of rows of the filtered queryset,
+  hashed with the query string (page, filters, ordering) in the ETag.
+
+Models without a version field can not be validated and are left untouched.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from bsct.columns import get_column_plan, get_version_field
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+
+def _get_view_instance(view, request, *args, **kwargs):
+    """
+    Returns an instance of the class based view, set up for the request.
+    """
+    instance = view.view_class(**view.view_initkwargs)
+    instance.setup(request, *args, **kwargs)
+    return instance
+
+
+def _get_validators(request, compute, *args, **kwargs):
+    """
+    Returns (etag, last_modified) computed once per request.
+    """
+    if not hasattr(request, "_bsct_validators"):
+        try:
+            request._bsct_validators = compute(request, *args, **kwargs)
+        except Exception as exception:
+            logger.warning("Could not compute the validators of %s: %s", request.path, exception)
+            request._bsct_validators = (None, None)
+    return request._bsct_validators
+
+
+def _conditional(view, compute):
+    def etag(request, *args, **kwargs):
+        return _get_validators(request, compute, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return _get_validators(request, compute, *args, **kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+
+def conditional_detail_view(view):
+    """
+    Wraps a DetailView with ETag / Last-Modified validation.
+    """
+    model = view.view_initkwargs.get("model") or view.view_class.model
+    field = get_version_field(model)
+    if field is None:
+        logger.warning("%s has no version field: no conditional GET.", model.__name__)
+        return view
+
+    def compute(request, *args, **kwargs):
+        instance = _get_view_instance(view, request, *args, **kwargs)
+        queryset = instance.get_queryset().select_related(None).prefetch_related(None)
+        version = queryset.filter(pk=kwargs.get("pk")).values_list(
+            field.attname, flat=True
+        ).first()
+        if version is None:
+            return None, None
+        return "%s-%s" % (kwargs.get("pk"), version.timestamp()), version
+
+    return _conditional(view, compute)
+
+
+def conditional_list_view(view):
+    """
+    Wraps a ListView with ETag validation.
+    """
+    model = view.view_initkwargs.get("model") or view.view_class.model
+    field = get_version_field(model)
+    if field is None:
+        logger.warning("%s has no version field: no conditional GET.", model.__name__)
+        return view
+
+    def compute(request, *args, **kwargs):
+        instance = _get_view_instance(view, request, *args, **kwargs)
+        queryset = instance.get_queryset().select_related(None).prefetch_related(None)
+        aggregate = queryset.aggregate(latest=Max(field.attname), count=Count("pk"))
+        signature = "|".join(
+            [
+                str(aggregate["latest"]),
+                str(aggregate["count"]),
+                "&".join(sorted("%s=%s" % item for item in request.GET.lists())),
+                "|".join(get_column_plan(model).headers),
+            ]
+        )
+        return hashlib.sha256(signature.encode()).hexdigest()[:32], None
+
+    return _conditional(view, compute)
@@ -0,0 +1,199 @@
+"""
+Cascade preview for the delete confirmation pages, and deletion by batches.
+
+Like Django's Collector, objects deleted in cascade are collected level by
+level, following the reverse relations whose ``on_delete`` is CASCADE. A
+level is selected with a subquery on the previous one, so each relation costs
+a count and a query for its first objects, however many objects it holds.
+"""
+from django.db import models, transaction
+from django.urls.exceptions import NoReverseMatch
+from django.utils.html import format_html, format_html_join
+
+
+def is_field_m2m_cascade(field):
+    """
+    Returns True if the field is a ManyToManyField and the 'on_delete' is set to CASCADE.
+    """
+    if field.is_relation:  # if field is a relation (FK, M2M)
+        if getattr(
+            field, "multiple", False
+        ):  # If the field is a relation to a many-to-many field
+            if field.on_delete == models.CASCADE:  # if on_delete is CASCADE
+                return True
+    return False
+
+
+class CascadeEntry(object):
+    """
+    The objects of a relation deleted in cascade.
+
+    Attributes:
+        model (Model): model of the deleted objects.
+        relation (ForeignObjectRel): relation followed to reach them.
+        depth (int): 1 for the objects related to the deleted instance, 2 for
+            the objects related to those, and so on.
+        count (int): number of objects deleted through this relation.
+        objects (list): the first objects, up to the preview limit.
+    """
+
+    def __init__(self, model, relation, depth, count, objects):
+        self.model = model
+        self.relation = relation
+        self.depth = depth
+        self.count = count
+        self.objects = objects
+
+    @property
+    def label(self):
+        if self.count > 1:
+            return self.model._meta.verbose_name_plural
+        return self.model._meta.verbose_name
+
+    @property
+    def remaining(self):
+        """
+        Number of objects not listed in the preview.
+        """
+        return self.count - len(self.objects)
+
+    @property
+    def links(self):
+        """
+        Returns the previewed objects as HTML links, when they have a URL.
+        """
+        links = []
+        for obj in self.objects:
+            try:
+                links.append(format_html("<a href='{}'>{}</a>", obj.get_absolute_url(), obj))
+            except (AttributeError, NoReverseMatch):
+                links.append(format_html("{}", obj))
+        return links
+
+    @property
+    def html(self):
+        """
+        Returns the links of the previewed objects, and the remaining count.
+        """
+        html = format_html_join(", ", "{}", ((link,) for link in self.links))
+        if self.remaining:
+            html = format_html("{} et {} autres", html, self.remaining)
+        return html
+
+
+def _cascade_relations(level, instance):
+    """
+    Yields (model, relation, children) for the relations deleting objects in
+    cascade from the level, children being the queryset of these objects.
+    """
+    for model, parents in level:
+        for relation in model._meta.get_fields():
+            if not is_field_m2m_cascade(relation):
+                continue
+
+            related_model = relation.related_model
+            if parents is None:
+                lookup = {relation.field.name: instance}
+            else:
+                target = relation.field.target_field.attname
+                lookup = {
+                    "%s__in" % relation.field.name: parents.values(target)
+                }
+            yield related_model, relation, related_model._base_manager.filter(**lookup)
+
+
+def _collect(level, instance, max_depth, max_objects):
+    # level: querysets of the objects deleted at the current level, by model.
+    entries = []
+    for depth in range(1, max_depth + 1):
+        next_level = []
+        for related_model, relation, children in _cascade_relations(level, instance):
+            count = children.count()
+            if not count:
+                continue
+            objects = list(children.order_by("pk")[:max_objects]) if max_objects else []
+            entries.append(CascadeEntry(related_model, relation, depth, count, objects))
+            next_level.append((related_model, children))
+        level = next_level
+
+    return entries
+
+
+def collect_cascade(instance, max_depth=2, max_objects=10):
+    """Returns the objects deleted in cascade with an instance.
+
+    Args:
+        instance (Model): the instance to be deleted.
+        max_depth (int): number of relation levels to follow.
+        max_objects (int): number of objects listed per relation.
+
+    Returns:
+        list: CascadeEntry of the relations holding objects, level by level.
+    """
+    return _collect([(instance.__class__, None)], instance, max_depth, max_objects)
+
+
+def collect_queryset_cascade(queryset, max_depth=2, max_objects=10):
+    """
+    Returns the objects deleted in cascade with the objects of a queryset,
+    like collect_cascade(): each relation is counted once for all of them.
+    """
+    return _collect([(queryset.model, queryset)], None, max_depth, max_objects)
+
+
+async def acollect_cascade(instance, max_depth=2, max_objects=10):
+    """
+    Returns the objects deleted in cascade with an instance, like
+    collect_cascade(), querying asynchronously.
+    """
+    entries = []
+    level = [(instance.__class__, None)]
+
+    for depth in range(1, max_depth + 1):
+        next_level = []
+        for related_model, relation, children in _cascade_relations(level, instance):
+            count = await children.acount()
+            if not count:
+                continue
+            objects = []
+            if max_objects:
+                objects = [obj async for obj in children.order_by("pk")[:max_objects]]
+            entries.append(CascadeEntry(related_model, relation, depth, count, objects))
+            next_level.append((related_model, children))
+        level = next_level
+
+    return entries
+
+
+def count_by_model(entries):
+    """
+    Returns the number of objects deleted in cascade by model verbose name.
+    """
+    counts = {}
+    for entry in entries:
+        name = entry.model._meta.verbose_name_plural
+        counts[name] = counts.get(name, 0) + entry.count
+    return counts
+
+
+def delete_by_batches(queryset, batch_size=500):
+    """Deletes the objects of a queryset in one transaction.
+
+    The objects are deleted by batches of ``batch_size`` pks, each batch
+    with a queryset delete() and its cascade, so the queries stay bounded
+    whatever the number of objects.
+
+    Returns:
+        tuple: the total number of deleted objects, and the numbers by model
+        label, cascade included, like QuerySet.delete().
+    """
+    pks = list(queryset.order_by().values_list("pk", flat=True))
+    total = 0
+    counts = {}
+    with transaction.atomic(using=queryset.db):
+        for start in range(0, len(pks), batch_size):
+            deleted, by_model = queryset.filter(pk__in=pks[start:start + batch_size]).delete()
+            total += deleted
+            for label, count in by_model.items():
+                counts[label] = counts.get(label, 0) + count
+    return total, counts
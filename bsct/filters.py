@@ -0,0 +1,332 @@
+"""
+Filter schemas: the query parameters a list view accepts, per model.
+
+A schema is compiled once per model from ``get_allowed_fields()``. It maps
+each accepted parameter (``field``, ``relation__field``, optionally followed by
+a lookup such as ``__in`` or ``__gte``) to the field, the lookup and the way
+its value is converted. Validating a request is then a dictionary lookup per
+parameter, and only converted values reach ``QuerySet.filter()``.
+
+Relations are filtered on the pk of the related objects: foreign keys,
+many-to-many fields and, when the model lists them by name, reverse
+relations (``?reviews=3``). Allowed names which can not be filtered on
+(e.g. generic foreign keys, or paths of more than one relation) are logged
+when the schema is compiled.
+"""
+import logging
+import weakref
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+from django.db.models import ForeignObjectRel
+from django.db.models.signals import class_prepared
+from django.utils import timezone
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+TEXT_LOOKUPS = ("exact", "iexact", "in", "icontains", "istartswith")
+RANGE_LOOKUPS = ("exact", "in", "range", "gt", "gte", "lt", "lte")
+RELATION_LOOKUPS = ("exact", "in")
+BOOLEAN_LOOKUPS = ("exact",)
+
+# Lookups whose value is a comma separated list.
+LIST_LOOKUPS = ("in", "range")
+
+
+class FilterError(ValueError):
+    """
+    Raised for a query parameter which can not be used as a filter.
+    """
+
+
+def get_lookups(field):
+    """
+    Returns the lookups accepted for a field, by field type.
+    """
+    if field.is_relation:
+        lookups = RELATION_LOOKUPS
+    elif isinstance(field, (models.BooleanField,)):
+        lookups = BOOLEAN_LOOKUPS
+    elif isinstance(field, (models.CharField, models.TextField)):
+        lookups = TEXT_LOOKUPS
+    else:
+        lookups = RANGE_LOOKUPS
+    if field.null:
+        lookups += ("isnull",)
+    return lookups
+
+
+def is_indexed(field):
+    """
+    Returns True if a database index starts with the field.
+    """
+    if not field.concrete:
+        # Many-to-many and reverse relations join on indexed keys.
+        return field.is_relation
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    opts = field.model._meta
+    for index in opts.indexes:
+        if index.fields and index.fields[0].lstrip("-") == field.name:
+            return True
+    for fields in opts.unique_together:
+        if fields and fields[0] == field.name:
+            return True
+    return False
+
+
+class FilterSpec(object):
+    """
+    A filterable path: its field and accepted lookups.
+    """
+
+    __slots__ = ("path", "field", "lookups", "indexed", "multiple")
+
+    def __init__(self, path, field, multiple=False):
+        self.path = path
+        self.field = field
+        self.lookups = get_lookups(field)
+        self.indexed = is_indexed(field)
+        # The path goes through a many-to-many or reverse relation: the rows
+        # would be repeated by a join.
+        self.multiple = multiple or is_multiple(field)
+
+    def to_python(self, value):
+        """
+        Converts a single value, raising ValidationError if invalid.
+        """
+        if self.field.is_relation:
+            return self.field.target_field.to_python(value)
+        value = self.field.to_python(value)
+        if (
+            isinstance(self.field, models.DateTimeField)
+            and settings.USE_TZ
+            and timezone.is_naive(value)
+        ):
+            value = timezone.make_aware(value)
+        return value
+
+    def convert(self, lookup, value):
+        """
+        Returns the value of the lookup converted for the field.
+        """
+        if lookup == "isnull":
+            if value.lower() in ("1", "true"):
+                return True
+            if value.lower() in ("0", "false"):
+                return False
+            raise FilterError("isnull expects true or false")
+        if lookup in LIST_LOOKUPS:
+            values = [self.to_python(v) for v in value.split(",")]
+            if lookup == "range" and len(values) != 2:
+                raise FilterError("range expects two values")
+            return values
+        return self.to_python(value)
+
+
+def _allowed_names(model):
+    """
+    Returns the names (or "__all__") a model allows to filter on: none for a
+    model which does not define get_allowed_fields().
+    """
+    if not hasattr(model, "get_allowed_fields"):
+        return []
+    return model.get_allowed_fields()
+
+
+def is_filterable(field):
+    """
+    Returns True if a field can be filtered on: a concrete field, a
+    many-to-many field or a reverse relation (not a generic foreign key).
+    """
+    return field.concrete or (field.is_relation and not field.many_to_one)
+
+
+def is_multiple(field):
+    """
+    Returns True if a field relates an object to several ones.
+    """
+    return field.is_relation and (field.many_to_many or field.one_to_many)
+
+
+def query_name(field):
+    """
+    Returns the name of a field in the filters of a queryset.
+    """
+    if isinstance(field, ForeignObjectRel):
+        return field.field.related_query_name()
+    return field.name
+
+
+def _filterable_fields(model):
+    """
+    Returns the fields of a model which can be filtered on: with "__all__",
+    its concrete and many-to-many fields; the reverse relations only when
+    listed by name.
+    """
+    allowed_fields = _allowed_names(model)
+    if allowed_fields == "__all__":
+        return list(model._meta.concrete_fields) + list(model._meta.many_to_many)
+    return [
+        field for field in model._meta.get_fields()
+        if field.name in allowed_fields and is_filterable(field)
+    ]
+
+
+def _allowed_paths(model):
+    """
+    Returns the ``relation__field`` paths listed by a model's
+    get_allowed_fields() or get_allowed_fields_list().
+    """
+    names = []
+    for getter in ("get_allowed_fields", "get_allowed_fields_list"):
+        if hasattr(model, getter):
+            allowed_fields = getattr(model, getter)()
+            if allowed_fields != "__all__":
+                names += [name for name in allowed_fields if "__" in name]
+    return names
+
+
+class FilterSchema(object):
+    """
+    The filters accepted by the list view of a model.
+
+    A ``relation__field`` path is accepted if the model lists it, or if the
+    related model's own get_allowed_fields() allows the field. The fields of
+    a related model without get_allowed_fields() (e.g. auth.User, and its
+    password) are never exposed otherwise.
+
+    Attributes:
+        specs (dict): FilterSpec by path (``field`` or ``relation__field``).
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.specs = {}
+
+        for field in _filterable_fields(model):
+            name = query_name(field)
+            self.specs[name] = FilterSpec(name, field)
+            if field.is_relation and field.related_model is not None:
+                # Fields of the related model (e.g. 'tree__name').
+                for related_field in _filterable_fields(field.related_model):
+                    path = "%s__%s" % (name, query_name(related_field))
+                    self.specs[path] = FilterSpec(path, related_field, is_multiple(field))
+
+        for path in _allowed_paths(model):
+            if path in self.specs:
+                continue
+            resolved = self._resolve_path(path)
+            if resolved is not None:
+                field, related_field = resolved
+                self.specs[path] = FilterSpec(path, related_field, is_multiple(field))
+
+        names = _allowed_names(model)
+        if names != "__all__":
+            filterable = {field.name for field in _filterable_fields(model)}
+            ignored = [name for name in names if name not in filterable and name not in self.specs]
+            if ignored:
+                logger.warning(
+                    "Allowed fields of %s which can not be filtered on: %s",
+                    model.__name__, ", ".join(ignored),
+                )
+
+    def _resolve_path(self, path):
+        """
+        Returns (relation, related field) for a ``relation__field`` path, or
+        None.
+        """
+        relation, _, name = path.partition("__")
+        try:
+            field = self.model._meta.get_field(relation)
+            if not (field.is_relation and is_filterable(field) and field.related_model):
+                return None
+            related_field = field.related_model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not (related_field.concrete or related_field.many_to_many):
+            return None
+        return field, related_field
+
+    def resolve(self, key):
+        """
+        Returns (spec, lookup) for a parameter name, or None if not filterable.
+        """
+        spec = self.specs.get(key)
+        if spec is not None:
+            return spec, "exact"
+        path, _, lookup = key.rpartition("__")
+        spec = self.specs.get(path)
+        if spec is not None and lookup in spec.lookups:
+            return spec, lookup
+        return None
+
+    def parse(self, params, unindexed="allow"):
+        """Returns the filters to apply for the query parameters.
+
+        Args:
+            params (QueryDict): the request's GET parameters.
+            unindexed (str): what to do with filters on columns without
+                index: "allow", "log" or "reject".
+
+        Returns:
+            dict: keyword arguments for QuerySet.filter(). The filters on
+            many-to-many or reverse relations are applied in a ``pk__in``
+            subquery, which does not repeat the rows.
+        """
+        filters = {}
+        multiple = {}
+        for key in params:
+            resolved = self.resolve(key)
+            if resolved is None:
+                continue  # Not a filter (e.g. 'page').
+            spec, lookup = resolved
+
+            if not spec.indexed and unindexed != "allow":
+                logger.warning(
+                    "Filter %s of %s is on a column without index.",
+                    key, self.model.__name__,
+                )
+                if unindexed == "reject":
+                    continue
+
+            try:
+                value = spec.convert(lookup, params[key])
+            except (FilterError, ValidationError) as exception:
+                logger.warning("Ignoring filter %s=%r: %s", key, params[key], exception)
+                continue
+            (multiple if spec.multiple else filters)["%s__%s" % (spec.path, lookup)] = value
+        if multiple:
+            filters["pk__in"] = self.model._base_manager.filter(**multiple).values("pk")
+        return filters
+
+
+# Filter schemas, by model class.
+_schemas = weakref.WeakKeyDictionary()
+
+
+def get_filter_schema(model):
+    """
+    Returns the filter schema of a model, compiling it on first use.
+    """
+    try:
+        return _schemas[model]
+    except KeyError:
+        schema = _schemas[model] = FilterSchema(model)
+        return schema
+
+
+def _invalidate_redefined_model(sender, **kwargs):
+    """
+    Drops schemas compiled for a previous definition of a newly prepared model.
+    """
+    label = sender._meta.label_lower
+    for model in [m for m in list(_schemas.keys()) if m._meta.label_lower == label]:
+        _schemas.pop(model, None)
+
+
+class_prepared.connect(_invalidate_redefined_model)
@@ -0,0 +1,46 @@
+"""
+Model forms of the create and update views, and the form of the import view.
+"""
+import weakref
+
+from django import forms
+from django.forms import modelform_factory
+
+from bsct.imports import IMPORT_FORMATS, guess_format
+
+# Form classes built with modelform_factory(), by model class.
+_forms = weakref.WeakKeyDictionary()
+
+
+def get_model_form(model):
+    """
+    Returns the ModelForm of a model's allowed fields, building it on first
+    use.
+    """
+    try:
+        return _forms[model]
+    except KeyError:
+        form_class = _forms[model] = modelform_factory(
+            model, fields=model.get_allowed_fields()
+        )
+        return form_class
+
+
+class ImportForm(forms.Form):
+    """
+    The file uploaded to the import view, and its format, guessed from its
+    extension when not given.
+    """
+
+    file = forms.FileField(label="Fichier")
+    format = forms.ChoiceField(
+        label="Format",
+        choices=[("", "Selon l'extension")] + [(name, name.upper()) for name in IMPORT_FORMATS],
+        required=False,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get("format") and cleaned_data.get("file"):
+            cleaned_data["format"] = guess_format(cleaned_data["file"].name)
+        return cleaned_data
@@ -0,0 +1,257 @@
+"""
+Batched imports of CSV and NDJSON files.
+
+Readers take an uploaded file and yield its rows one by one, so a file of
+any size is read with a constant memory footprint. Each row is validated
+with the model form, and the valid rows are created with bulk_create() by
+batches: at most one batch of forms is held in memory.
+
+bulk_create() does not call save() nor send the post_save signal: counts
+cached by CachedCount are refreshed when they expire.
+"""
+import codecs
+import csv
+import json
+
+from django import forms
+from django.db import DatabaseError, connections, router, transaction
+from django.utils.datastructures import MultiValueDict
+
+
+def csv_rows(file, encoding="utf-8-sig"):
+    """
+    Yields (line, row, error) for the rows of a CSV file with a header line,
+    row being a dict keyed by the header.
+    """
+    reader = csv.DictReader(codecs.iterdecode(file, encoding))
+    for row in reader:
+        # Values beyond the header are stored under None.
+        row.pop(None, None)
+        yield reader.line_num, row, None
+
+
+def ndjson_rows(file, encoding="utf-8-sig"):
+    """
+    Yields (line, row, error) for the lines of a NDJSON file, each holding a
+    JSON object.
+    """
+    for line, data in enumerate(codecs.iterdecode(file, encoding), 1):
+        if not data.strip():
+            continue
+        try:
+            row = json.loads(data)
+        except ValueError as exception:
+            yield line, None, "JSON invalide : %s" % exception
+            continue
+        if not isinstance(row, dict):
+            yield line, None, "La ligne n'est pas un objet JSON."
+            continue
+        yield line, row, None
+
+
+# Import formats: (reader, file extensions).
+IMPORT_FORMATS = {
+    "csv": (csv_rows, (".csv", ".txt")),
+    "ndjson": (ndjson_rows, (".ndjson", ".jsonl")),
+}
+
+
+def guess_format(name):
+    """
+    Returns the import format of a file name, csv by default.
+    """
+    name = (name or "").lower()
+    for import_format, (reader, extensions) in IMPORT_FORMATS.items():
+        if name.endswith(extensions):
+            return import_format
+    return "csv"
+
+
+def to_form_data(row, multiple_fields, split_multiple=True):
+    """
+    Returns a row as the data of a form: lists are the values of fields with
+    multiple values, separated by commas when split_multiple is set (CSV),
+    and null values are empty.
+    """
+    data = MultiValueDict()
+    for key, value in row.items():
+        if value is None:
+            value = ""
+        if key in multiple_fields:
+            if not value:
+                value = []
+            elif isinstance(value, str):
+                value = [part.strip() for part in value.split(",")] if split_multiple else [value]
+            elif not isinstance(value, (list, tuple)):
+                value = [value]
+            data.setlist(key, list(value))
+        else:
+            data[key] = value
+    return data
+
+
+class ImportResult(object):
+    """
+    The outcome of an import.
+
+    Attributes:
+        rows (int): number of rows read.
+        created (int): number of objects created.
+        error_count (int): number of rows not imported.
+        errors (list): (line, {field: [messages]}) of the first
+            ``max_errors`` rows not imported.
+    """
+
+    def __init__(self, max_errors=100):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, errors))
+
+    @property
+    def remaining_errors(self):
+        """
+        Number of errors not listed.
+        """
+        return self.error_count - len(self.errors)
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": [{"line": line, "errors": errors} for line, errors in self.errors],
+        }
+
+
+class Importer(object):
+    """
+    Validates rows with a model form and creates the valid ones by batches
+    of ``batch_size``, each in a transaction.
+
+    A batch which bulk_create() can not insert (e.g. a unique constraint
+    violated by two rows of the file) is saved row by row, so only the
+    failing rows are reported.
+    """
+
+    def __init__(self, form_class, batch_size=500, max_errors=100):
+        self.form_class = form_class
+        self.model = form_class._meta.model
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.multiple_fields = {
+            name for name, field in form_class.base_fields.items()
+            if isinstance(field, (forms.MultipleChoiceField, forms.ModelMultipleChoiceField))
+        }
+        # Many-to-many fields of the form, by name: the relations of a batch
+        # are inserted with one bulk_create() per field when their through
+        # model is the automatic one.
+        self.m2m_fields = {
+            field.name: field for field in self.model._meta.many_to_many
+            if field.name in form_class.base_fields
+        }
+        self.bulk_m2m = all(
+            field.remote_field.through._meta.auto_created
+            for field in self.m2m_fields.values()
+        )
+        self.db = router.db_for_write(self.model)
+        # Many-to-many values are saved once the objects have a pk, which
+        # bulk_create() only sets on some databases, and bulk_create() does
+        # not support multi-table inheritance.
+        self.save_rows = bool(self.model._meta.parents) or (
+            bool(self.multiple_fields)
+            and not connections[self.db].features.can_return_rows_from_bulk_insert
+        )
+
+    def run(self, rows, split_multiple=True):
+        """Imports rows.
+
+        Args:
+            rows: (line, row, error) tuples, as yielded by the readers.
+            split_multiple (bool): split the values of the fields with
+                multiple values on commas.
+
+        Returns:
+            ImportResult
+        """
+        result = ImportResult(self.max_errors)
+        batch = []
+        try:
+            for line, row, error in rows:
+                result.rows += 1
+                if error:
+                    result.add_error(line, {"__all__": [error]})
+                    continue
+                form = self.form_class(data=to_form_data(row, self.multiple_fields, split_multiple))
+                if not form.is_valid():
+                    result.add_error(
+                        line, {field: list(messages) for field, messages in form.errors.items()}
+                    )
+                    continue
+                batch.append((line, form, form.save(commit=False)))
+                if len(batch) >= self.batch_size:
+                    self.save_batch(batch, result)
+                    batch = []
+        except (UnicodeDecodeError, csv.Error) as exception:
+            # The rest of the file can not be read.
+            result.add_error(result.rows + 1, {"__all__": ["Fichier illisible : %s" % exception]})
+        if batch:
+            self.save_batch(batch, result)
+        return result
+
+    def save_batch(self, batch, result):
+        if not self.save_rows:
+            try:
+                with transaction.atomic(using=self.db):
+                    self.model._default_manager.db_manager(self.db).bulk_create(
+                        [instance for line, form, instance in batch]
+                    )
+                    self.save_m2m(batch)
+                result.created += len(batch)
+                return
+            except DatabaseError:
+                if self.model._meta.auto_field:
+                    # Rolled back: the pks set by bulk_create() were not kept.
+                    for line, form, instance in batch:
+                        instance.pk = None
+                        instance._state.adding = True
+
+        for line, form, instance in batch:
+            try:
+                with transaction.atomic(using=self.db):
+                    instance.save(using=self.db)
+                    form.save_m2m()
+                result.created += 1
+            except DatabaseError as exception:
+                result.add_error(line, {"__all__": [str(exception)]})
+
+    def save_m2m(self, batch):
+        """
+        Saves the many-to-many relations of the objects of a batch, just
+        created.
+        """
+        if not self.m2m_fields:
+            return
+        if not self.bulk_m2m:
+            for line, form, instance in batch:
+                form.save_m2m()
+            return
+
+        for name, field in self.m2m_fields.items():
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            through._default_manager.db_manager(self.db).bulk_create(
+                [
+                    through(**{source: instance, target: related})
+                    for line, form, instance in batch
+                    for related in form.cleaned_data.get(name) or ()
+                ],
+                batch_size=self.batch_size,
+            )
@@ -0,0 +1,253 @@
+"""
+Lists of models with multi-table inheritance subclasses.
+
+The list of such a model shows the columns of its subclasses too. These
+columns and their headers are resolved once per model hierarchy.
+
+The queryset of the model returns instances of the model itself, and
+reading a field of a subclass on them would query the subclass row by row.
+Before the rows of a page are rendered, they are downcast to their most
+derived class with one query per subclass. Instances already downcast (e.g.
+by django-polymorphic) are kept as is.
+"""
+import weakref
+
+from django.db.models import ForeignObjectRel
+from django.db.models.signals import class_prepared
+from django.urls.exceptions import NoReverseMatch
+
+from bsct.columns import get_column_plan
+
+
+def get_concrete_subclasses(model):
+    """
+    Returns the multi-table inheritance subclasses of a model, at any depth,
+    each after its parents. Proxy models are skipped.
+    """
+    subclasses = []
+    seen = {model}
+    pending = [model]
+    while pending:
+        for subclass in pending.pop(0).__subclasses__():
+            if subclass in seen:
+                continue
+            seen.add(subclass)
+            pending.append(subclass)
+            opts = subclass._meta
+            if not (opts.proxy or opts.abstract or opts.swapped):
+                subclasses.append(subclass)
+    return subclasses
+
+
+def is_parent_link(field):
+    """
+    Returns True if the field links a model to its multi-table inheritance
+    parent, or to a child (reverse relation).
+    """
+    if isinstance(field, ForeignObjectRel):
+        return field.parent_link
+    return bool(field.one_to_one and field.remote_field.parent_link)
+
+
+class Hierarchy(object):
+    """
+    A model and its multi-table inheritance subclasses.
+
+    Attributes:
+        model (Model): the model class.
+        subclasses (list): concrete subclasses, each after its parents.
+        list_columns (list): ListColumn of the model and of its subclasses, a
+            subclass overriding the column of a field it inherits.
+        headers (dict): list view headers, keyed like get_list_detail().
+        lookups (dict): (select_related, prefetch_related) lookups of the
+            list, by class of the hierarchy.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.subclasses = get_concrete_subclasses(model)
+        # Classes whose instances may be rows of a subclass.
+        self.parents = {model} | {
+            parent for cls in self.subclasses for parent in cls._meta.get_parent_list()
+        }
+        if not self.subclasses:
+            plan = get_column_plan(model)
+            self.list_columns = plan.list_columns
+            self.headers = plan.headers
+            self.lookups = {model: (plan.list_select_related, plan.list_prefetch_related)}
+            return
+
+        # The links between the parents and the children are not displayed
+        # nor joined: the rows are downcast instead.
+        columns = {}
+        links = set()
+        for cls in [model] + self.subclasses:
+            for column in get_column_plan(cls).list_columns:
+                if is_parent_link(column.field):
+                    links.add(column.name)
+                else:
+                    columns[column.key] = column
+        self.list_columns = list(columns.values())
+        self.headers = {column.key: column.label for column in self.list_columns}
+        self.lookups = {}
+        for cls in [model] + self.subclasses:
+            plan = get_column_plan(cls)
+            self.lookups[cls] = tuple(
+                [lookup for lookup in lookups if lookup.split("__")[0] not in links]
+                for lookups in (plan.list_select_related, plan.list_prefetch_related)
+            )
+
+
+# Hierarchies, by model class. Weak references let replaced model classes be
+# garbage collected along with their hierarchy.
+_hierarchies = weakref.WeakKeyDictionary()
+
+
+def get_hierarchy(model):
+    """Returns the hierarchy of a model, building it on first use.
+
+    Args:
+        model (Model): model class.
+
+    Returns:
+        Hierarchy: the cached hierarchy.
+    """
+    try:
+        return _hierarchies[model]
+    except KeyError:
+        hierarchy = _hierarchies[model] = Hierarchy(model)
+        return hierarchy
+
+
+def clear_hierarchies(**kwargs):
+    _hierarchies.clear()
+
+
+def _pending(instances, hierarchy):
+    """
+    Returns {pk: index} of the instances which may be rows of a subclass.
+    """
+    return {
+        instance.pk: index
+        for index, instance in enumerate(instances)
+        if instance.__class__ in hierarchy.parents
+    }
+
+
+def _subclass_queryset(hierarchy, subclass, instances, pending):
+    """
+    Returns the queryset of the instances of ``subclass`` among the pending
+    instances, or None if none of them can be one.
+    """
+    pks = [
+        pk for pk, index in pending.items()
+        if instances[index].__class__ is not subclass
+        and issubclass(subclass, instances[index].__class__)
+    ]
+    if not pks:
+        return None
+    select_related, prefetch_related = hierarchy.lookups[subclass]
+    queryset = subclass._base_manager.using(instances[0]._state.db).filter(pk__in=pks)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+def _replace(instances, pending, objects):
+    for obj in objects:
+        index = pending.pop(obj.pk, None)
+        if index is not None:
+            instances[index] = obj
+
+
+def downcast(instances, model):
+    """Returns the instances as instances of their most derived class.
+
+    Args:
+        instances (iterable): instances of ``model``, e.g. a page of the list.
+        model (Model): the model class of the list.
+
+    Returns:
+        list: the instances, in the same order, with one query per subclass
+        which may hold some of them.
+    """
+    instances = list(instances)
+    hierarchy = get_hierarchy(model)
+    if not (instances and hierarchy.subclasses):
+        return instances
+
+    pending = _pending(instances, hierarchy)
+    # Children first: a row is downcast to its most derived class.
+    for subclass in reversed(hierarchy.subclasses):
+        if not pending:
+            break
+        queryset = _subclass_queryset(hierarchy, subclass, instances, pending)
+        if queryset is not None:
+            _replace(instances, pending, queryset)
+    return instances
+
+
+async def adowncast(instances, model):
+    """
+    Returns the instances as instances of their most derived class, like
+    downcast(), querying asynchronously.
+    """
+    instances = list(instances)
+    hierarchy = get_hierarchy(model)
+    if not (instances and hierarchy.subclasses):
+        return instances
+
+    pending = _pending(instances, hierarchy)
+    for subclass in reversed(hierarchy.subclasses):
+        if not pending:
+            break
+        queryset = _subclass_queryset(hierarchy, subclass, instances, pending)
+        if queryset is not None:
+            _replace(instances, pending, [obj async for obj in queryset])
+    return instances
+
+
+def as_parent(instance, model):
+    """
+    Returns an instance of ``model`` holding the values of its fields read
+    from ``instance``, an instance of one of its subclasses, without a query.
+    """
+    return model(**{
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+    })
+
+
+def get_row_url(instance, model, unresolved=None):
+    """Returns the URL of the detail page of a row of the list of ``model``.
+
+    A downcast row links to the detail page of its own class, or to the one
+    of ``model`` when its class has no URLs of its own.
+
+    Args:
+        instance (Model): the row, an instance of ``model`` or of a subclass.
+        model (Model): the model class of the list.
+        unresolved (set): classes whose detail URL does not reverse, filled
+            in and skipped, so that a page reverses them once.
+
+    Returns:
+        str: the URL, or None if neither class has a detail page.
+    """
+    if unresolved is None:
+        unresolved = set()
+    for cls in dict.fromkeys((instance.__class__, model)):
+        if cls in unresolved or getattr(cls, "get_absolute_url", None) is None:
+            continue
+        try:
+            if cls is instance.__class__:
+                return instance.get_absolute_url()
+            return as_parent(instance, cls).get_absolute_url()
+        except NoReverseMatch:
+            unresolved.add(cls)
+    return None
+
+
+# A new subclass changes the hierarchies of its parents.
+class_prepared.connect(clear_hierarchies)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bsct import assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the fingerprinted and precompressed static bundles of the "
+        "BSCT pages (see bsct.assets). Run it after collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="Directory of the bundles, defaults to BSCT_ASSETS_ROOT or STATIC_ROOT.",
+        )
+        parser.add_argument(
+            "--no-compress",
+            action="store_true",
+            help="Do not write the gzip and brotli files.",
+        )
+
+    def handle(self, *args, **options):
+        root = options["output"] or assets.get_assets_root()
+        if not root:
+            raise CommandError("Set BSCT_ASSETS_ROOT or STATIC_ROOT, or use --output.")
+        if assets.brotli is None and not options["no_compress"]:
+            self.stdout.write("brotli is not installed: only gzip files are written.")
+
+        try:
+            built = assets.build_bundles(root, compress=not options["no_compress"])
+        except (assets.BundleError, OSError) as exception:
+            raise CommandError(exception)
+
+        for bundle, kinds in built.items():
+            for kind, (name, sizes) in kinds.items():
+                self.stdout.write(
+                    "%-40s %s"
+                    % (name, ", ".join("%s %.1f KiB" % (key, size / 1024) for key, size in sizes.items()))
+                )
+        self.stdout.write("Manifest written to %s/%s" % (root, assets.MANIFEST_NAME))
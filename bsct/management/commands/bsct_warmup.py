@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from bsct.warmup import STEPS, warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the BSCT views of the URLconf and fills their caches (column "
+        "plans, forms, compiled templates, URLs), then prints the time spent "
+        "by model, slowest first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--urlconf", help="URLconf module, defaults to ROOT_URLCONF.")
+        parser.add_argument(
+            "--slow",
+            type=float,
+            default=100,
+            help="Time in milliseconds above which a model is flagged as slow.",
+        )
+
+    def handle(self, *args, **options):
+        report = warmup(options["urlconf"])
+
+        self.stdout.write(
+            "%-40s %10s" % ("model", "total ms")
+            + "".join(" %10s" % step for step in STEPS)
+        )
+        for label in report.slowest():
+            total = report.total(label) * 1000
+            line = "%-40s %10.2f" % (label, total) + "".join(
+                " %10.2f" % (report.timings[label][step] * 1000) for step in STEPS
+            )
+            if total > options["slow"]:
+                line = self.style.WARNING(line + "  slow")
+            self.stdout.write(line)
+
+        for label, errors in report.errors.items():
+            for error in errors:
+                self.stderr.write("%s: %s" % (label, error))
+        self.stdout.write(
+            "%d models warmed up in %.2f ms."
+            % (
+                len([label for label in report.timings if label != "(common)"]),
+                sum(report.total(label) for label in report.timings) * 1000,
+            )
+        )
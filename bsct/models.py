@@ -1,4 +1,4 @@
-from django.urls import reverse
+from bsct.urlcache import reverse_name, reverse_pk
 
 
 class BSCTModelMixin(object):
@@ -8,31 +8,36 @@ class BSCTModelMixin(object):
     URL names are assumed to follow the format <lowercasemodelname>_<action>.
     """
 
-    def __init__(self, *args, **kwargs):
+    # Prefix for the URL names, set on each subclass to its lower case name
+    # unless the subclass defines it.
+    bsct_view_prefix = None
+
+    def __init_subclass__(cls, **kwargs):
         """
         Set the prefix for the URL names.
         """
-        super(BSCTModelMixin, self).__init__(*args, **kwargs)
+        super().__init_subclass__(**kwargs)
 
-        self.bsct_view_prefix = self.__class__.__name__.lower()
+        if "bsct_view_prefix" not in cls.__dict__:
+            cls.bsct_view_prefix = cls.__name__.lower()
 
     def get_absolute_url(self):
         """
         Returns the URL of the detail page for that instance.
         """
-        return reverse("%s_detail" % self.bsct_view_prefix, kwargs={"pk": self.pk})
+        return reverse_pk("%s_detail" % self.bsct_view_prefix, self.pk)
 
     def get_delete_url(self):
         """
         Returns the URL of the deletion page for that instance.
         """
-        return reverse("%s_delete" % self.bsct_view_prefix, kwargs={"pk": self.pk})
+        return reverse_pk("%s_delete" % self.bsct_view_prefix, self.pk)
 
     def get_update_url(self):
         """
         Returns the URL of the update page for that instance.
         """
-        return reverse("%s_update" % self.bsct_view_prefix, kwargs={"pk": self.pk})
+        return reverse_pk("%s_update" % self.bsct_view_prefix, self.pk)
 
     def get_list_url(self):
         """
@@ -42,14 +47,14 @@ class BSCTModelMixin(object):
         # templates in the # context of a model instance, making an instance
         # method more practical. ( Avoids having to create templatetags to
         # call class method on instance class. )
-        return reverse("%s_list" % self.bsct_view_prefix)
+        return reverse_name("%s_list" % self.bsct_view_prefix)
 
     @classmethod
     def get_create_url(cls):
         """
         Returns the URL of the creation page for the model.
         """
-        return reverse("%s_create" % cls.__name__.lower())
+        return reverse_name("%s_create" % cls.bsct_view_prefix)
 
     @classmethod
     def get_allowed_fields(cls):
@@ -0,0 +1,133 @@
+"""
+Ordering of the list view.
+
+The list is sorted by the ``?o=`` parameter (``?o=-price,name``), whose terms
+must be sortable columns of the list (see ColumnPlan.sort_fields), or else by
+the default ordering of the model. The pk is always added as a last term, so
+rows with equal sort keys keep the same order from one page to the next.
+Relations are sorted on their key column, which is indexed.
+"""
+import logging
+
+from django.conf import settings
+
+from bsct.columns import get_column_plan, get_creation_field
+from bsct.filters import is_indexed
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+
+def get_default_ordering(model):
+    """Returns the ordering of a list when none is requested.
+
+    In order of precedence: the model's ``get_default_ordering()``
+    classmethod, its ``Meta.ordering``, its creation date (see
+    bsct.columns.get_creation_field) from the newest, and its pk.
+
+    Args:
+        model (Model): the model class.
+
+    Returns:
+        list: order_by terms.
+    """
+    if hasattr(model, "get_default_ordering"):
+        return list(model.get_default_ordering())
+    if model._meta.ordering:
+        return list(model._meta.ordering)
+    field = get_creation_field(model)
+    if field is not None:
+        return ["-%s" % field.name]
+    return ["pk"]
+
+
+def with_tiebreaker(model, ordering):
+    """
+    Returns the ordering ending with the pk, in the direction of its first
+    term, unless the pk is already one of its terms.
+    """
+    pk_names = ("pk", model._meta.pk.name, model._meta.pk.attname)
+    names = [term.lstrip("-") for term in ordering if isinstance(term, str)]
+    if any(name in pk_names for name in names):
+        return list(ordering)
+    descending = bool(ordering) and isinstance(ordering[0], str) and ordering[0].startswith("-")
+    return list(ordering) + ["-pk" if descending else "pk"]
+
+
+def parse_ordering(model, value, unindexed="allow"):
+    """Returns the order_by terms of an ``?o=`` parameter.
+
+    Args:
+        model (Model): the model class.
+        value (str): comma separated column names, prefixed with '-' to sort
+            in descending order.
+        unindexed (str): what to do with columns without index: "allow",
+            "log" or "reject".
+
+    Returns:
+        list: order_by terms, empty if none is sortable.
+    """
+    sort_fields = get_column_plan(model).sort_fields
+    ordering = []
+    for term in value.split(","):
+        term = term.strip()
+        name = term.lstrip("-")
+        field = sort_fields.get(name)
+        if field is None:
+            if term:
+                logger.debug("Ignoring ordering on %r: not a sortable column.", term)
+            continue
+
+        if not is_indexed(field) and unindexed != "allow":
+            logger.warning(
+                "Ordering %s of %s is on a column without index.",
+                name, model.__name__,
+            )
+            if unindexed == "reject":
+                continue
+
+        # Relations are sorted on their key column.
+        column = field.attname if field.is_relation else field.name
+        ordering.append(("-" if term.startswith("-") else "") + column)
+    return ordering
+
+
+def get_sort_links(model, columns, params, ordering_kwarg="o", exclude=()):
+    """Returns the sort links of the list headers.
+
+    Args:
+        model (Model): the model class.
+        columns (list): ListColumn of the list.
+        params (QueryDict): the request's GET parameters.
+        ordering_kwarg (str): name of the ordering parameter.
+        exclude (iterable): parameters to drop from the links (page, cursor).
+
+    Returns:
+        dict: {"url": ..., "direction": "asc", "desc" or None} by column key,
+        for the sortable columns.
+    """
+    sort_fields = get_column_plan(model).sort_fields
+    # The column the list is sorted on: the first sortable term.
+    current = ""
+    for term in params.get(ordering_kwarg, "").split(","):
+        if term.strip().lstrip("-") in sort_fields:
+            current = term.strip()
+            break
+
+    links = {}
+    for column in columns:
+        if column.name not in sort_fields:
+            continue
+        direction = None
+        if current.lstrip("-") == column.name:
+            direction = "desc" if current.startswith("-") else "asc"
+
+        query = params.copy()
+        for name in exclude:
+            query.pop(name, None)
+        # A click on the sorted column reverses its direction.
+        query[ordering_kwarg] = ("-" if direction == "asc" else "") + column.name
+        links[column.key] = {"url": "?" + query.urlencode(), "direction": direction}
+    return links
@@ -0,0 +1,57 @@
+"""
+Discovery of the templates overriding the BSCT templates for a model.
+
+A model's pages can be overridden by templates named
+``<lower case model name>/<page>.html`` (``list.html``, ``detail.html``,
+``create.html``, ``update.html``, ``delete.html``) in any directory searched
+by the template loaders: the ``templates`` directory of any application, or
+the ``DIRS`` of the TEMPLATES setting.
+
+Each (model, page) is looked up once, on the first request rendering it, and
+the result is cached until the templates or the TEMPLATES setting change.
+"""
+import functools
+
+from django.core.signals import setting_changed
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.autoreload import file_changed
+
+
+def get_override_name(model, page):
+    return "%s/%s" % (model.__name__.lower(), page)
+
+
+@functools.lru_cache(maxsize=None)
+def _find_template_override(name):
+    try:
+        get_template(name)
+    except TemplateDoesNotExist:
+        return None
+    return name
+
+
+def find_template_override(model, page):
+    """
+    Returns the name of the template overriding a page of a model, or None.
+    """
+    return _find_template_override(get_override_name(model, page))
+
+
+def clear_template_overrides(**kwargs):
+    _find_template_override.cache_clear()
+
+
+def _clear_on_template_setting(setting, **kwargs):
+    if setting == "TEMPLATES":
+        clear_template_overrides()
+
+
+def _clear_on_file_change(sender, file_path, **kwargs):
+    # With the autoreloader, templates added or removed are found without a
+    # restart. Returning None lets the reloader handle the change.
+    clear_template_overrides()
+
+
+setting_changed.connect(_clear_on_template_setting)
+file_changed.connect(_clear_on_file_change)
@@ -0,0 +1,393 @@
+"""
+Pagination helpers for the list view.
+
+Keyset (cursor) pagination: instead of ``OFFSET n`` and a ``COUNT(*)``, pages
+are fetched by seeking past the (ordering column, pk) of the last row seen.
+The position is carried by an opaque, signed cursor token, so page N costs
+about the same as page 1.
+
+Count strategies: the offset paginator needs the total number of rows. It can
+be counted exactly, cached, or estimated from the planner statistics.
+"""
+import hashlib
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache, caches
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import cached_property
+
+from bsct.inheritance import get_concrete_subclasses
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+CURSOR_SALT = "bsct.pagination.cursor"
+
+
+class KeysetPage(object):
+    """
+    A page of a KeysetPaginator, mimicking the parts of Django's Page used by
+    the templates.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<Keyset page of %d objects>" % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator(object):
+    """
+    Paginates a queryset by seeking on (ordering column, pk).
+
+    The ordering column is the first ``order_by`` term of the queryset (or the
+    pk if there is none). It must be a field of the model itself. The nulls of
+    a nullable column are sorted after the other values (before them in
+    descending order), on every backend.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+
+        if ordering is None:
+            ordering = (list(queryset.query.order_by) or ["pk"])[0]
+        if not isinstance(ordering, str):
+            # Expressions can not be seeked on.
+            logger.warning("Keyset pagination can not seek on %r, using pk.", ordering)
+            ordering = "pk"
+        self.descending = ordering.startswith("-")
+        name = ordering.lstrip("-")
+
+        opts = queryset.model._meta
+        try:
+            self.field = opts.pk if name == "pk" else opts.get_field(name)
+        except FieldDoesNotExist:
+            logger.warning("Keyset pagination can not seek on %r, using pk.", ordering)
+            self.field = opts.pk
+        self.is_pk = self.field == opts.pk
+
+    def encode_cursor(self, instance, direction):
+        """
+        Returns the cursor token pointing after (n) or before (p) instance.
+        """
+        value = None
+        if not self.is_pk and getattr(instance, self.field.attname) is not None:
+            # Serialized as the field does, see decode_cursor(): datetimes keep
+            # their microseconds, which DjangoJSONEncoder would cut.
+            value = self.field.value_to_string(instance)
+        return signing.dumps([direction, value, str(instance.pk)], salt=CURSOR_SALT)
+
+    def decode_cursor(self, cursor):
+        """
+        Returns (direction, value, pk) from a cursor token, or None if invalid.
+        """
+        try:
+            direction, value, pk = signing.loads(cursor, salt=CURSOR_SALT)
+            if direction not in ("n", "p"):
+                raise ValueError("unknown direction %r" % direction)
+            if not self.is_pk:
+                value = self.field.to_python(value)
+            return direction, value, self.queryset.model._meta.pk.to_python(pk)
+        except Exception as exception:
+            logger.warning("Invalid pagination cursor %r: %s", cursor, exception)
+            return None
+
+    def seek(self, value, pk, forward):
+        """
+        Returns the filter selecting rows after (forward) or before the key.
+        """
+        after = forward != self.descending
+        lookup = "gt" if after else "lt"
+        if self.is_pk:
+            return Q(**{"pk__%s" % lookup: pk})
+        name = self.field.attname
+        if value is None:
+            # Nulls sort last: after a null come the next nulls only, before
+            # it come every value and the previous nulls.
+            tie = Q(**{"%s__isnull" % name: True, "pk__%s" % lookup: pk})
+            return tie if after else Q(**{"%s__isnull" % name: False}) | tie
+        seek = Q(**{"%s__%s" % (name, lookup): value}) | Q(
+            **{name: value, "pk__%s" % lookup: pk}
+        )
+        if after and self.field.null:
+            seek |= Q(**{"%s__isnull" % name: True})
+        return seek
+
+    def get_ordering(self, forward):
+        """
+        Returns the order_by terms, reversed when seeking backwards.
+        """
+        prefix = "-" if forward == self.descending else ""
+        if self.is_pk:
+            return [prefix + "pk"]
+        if self.field.null:
+            column = F(self.field.attname)
+            column = column.desc(nulls_first=True) if prefix else column.asc(nulls_last=True)
+            return [column, prefix + "pk"]
+        return [prefix + self.field.attname, prefix + "pk"]
+
+    def get_page_queryset(self, cursor):
+        """
+        Returns (queryset, position, forward): the rows of the page designated
+        by the cursor, plus one telling whether there is a page after it.
+        """
+        position = self.decode_cursor(cursor) if cursor else None
+        forward = position is None or position[0] == "n"
+
+        queryset = self.queryset.order_by(*self.get_ordering(forward))
+        if position is not None:
+            queryset = queryset.filter(self.seek(position[1], position[2], forward))
+        return queryset[:self.per_page + 1], position, forward
+
+    def page(self, cursor=None):
+        """
+        Returns the KeysetPage designated by the cursor (first page if None).
+        """
+        queryset, position, forward = self.get_page_queryset(cursor)
+        return self.make_page(list(queryset), position, forward)
+
+    async def apage(self, cursor=None):
+        """
+        Returns the KeysetPage designated by the cursor, fetched asynchronously.
+        """
+        queryset, position, forward = self.get_page_queryset(cursor)
+        return self.make_page([obj async for obj in queryset], position, forward)
+
+    def make_page(self, object_list, position, forward):
+        """
+        Returns the KeysetPage of the rows fetched with get_page_queryset().
+        """
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not forward:
+            object_list.reverse()
+
+        if forward:
+            has_next, has_previous = has_more, position is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = self.encode_cursor(object_list[-1], "n")
+        if object_list and has_previous:
+            previous_cursor = self.encode_cursor(object_list[0], "p")
+        return KeysetPage(object_list, self, next_cursor, previous_cursor)
+
+
+class ExactCount(object):
+    """
+    Counts the rows with ``COUNT(*)``.
+    """
+
+    def count(self, queryset):
+        """
+        Returns (count, is_estimated).
+        """
+        return queryset.count(), False
+
+    async def acount(self, queryset):
+        """
+        Returns (count, is_estimated), counted asynchronously.
+        """
+        return await queryset.acount(), False
+
+
+# Receivers connected by CachedCount.watch(), by dispatch_uid: the signals
+# only hold weak references to them.
+_receivers = {}
+
+
+class CachedCount(ExactCount):
+    """
+    Caches exact counts for ``timeout`` seconds.
+
+    The cache key is built from the model and the SQL of the filtered
+    queryset. Saving or deleting an instance of the model, or of one of its
+    multi-table inheritance subclasses, bumps a per-model version, which
+    invalidates every cached count of that model.
+    """
+
+    def __init__(self, timeout=300, cache_alias=None):
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        if self.cache_alias:
+            return caches[self.cache_alias]
+        return cache
+
+    @staticmethod
+    def get_version_key(model):
+        return "bsct:count:version:%s" % model._meta.concrete_model._meta.label_lower
+
+    def watch(self, model):
+        """
+        Invalidates the counts of the model when it, or one of its subclasses,
+        is saved or deleted. Called when the list URL is registered (see
+        URLGenerator.get_list_url()), and by count() for the other views.
+        """
+        if "bsct.count.%s.%s" % (model._meta.label_lower, self.cache_alias) in _receivers:
+            return
+        for sender in get_concrete_subclasses(model) + [model]:
+            uid = "bsct.count.%s.%s" % (sender._meta.label_lower, self.cache_alias)
+            receiver = _receivers.setdefault(uid, self.invalidate)
+            post_save.connect(receiver, sender=sender, dispatch_uid=uid)
+            post_delete.connect(receiver, sender=sender, dispatch_uid=uid)
+
+    def invalidate(self, sender, **kwargs):
+        """
+        Bumps the count version of the model and of its parents: a row of a
+        subclass is a row of each parent too.
+        """
+        for model in [sender] + sender._meta.get_parent_list():
+            key = self.get_version_key(model)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, 1, None)
+
+    def get_cache_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.sha256(("%s%r" % (sql, params)).encode()).hexdigest()
+        version = self.cache.get(self.get_version_key(queryset.model), 0)
+        return "bsct:count:%s:%s:%s" % (queryset.model._meta.label_lower, version, digest)
+
+    def count(self, queryset):
+        self.watch(queryset.model)
+        key = self.get_cache_key(queryset)
+        count = self.cache.get(key)
+        if count is None:
+            count, _ = super().count(queryset)
+            self.cache.set(key, count, self.timeout)
+        return count, False
+
+    async def acount(self, queryset):
+        self.watch(queryset.model)
+        key = self.get_cache_key(queryset)
+        count = await self.cache.aget(key)
+        if count is None:
+            count, _ = await super().acount(queryset)
+            await self.cache.aset(key, count, self.timeout)
+        return count, False
+
+
+class EstimatedCount(ExactCount):
+    """
+    Estimates the count from the query planner where the backend exposes it
+    (PostgreSQL), and counts exactly below ``threshold`` rows or elsewhere.
+    """
+
+    def __init__(self, threshold=10000):
+        self.threshold = threshold
+
+    def estimate(self, queryset):
+        """
+        Returns the planner's estimation of the number of rows, or None.
+        """
+        if connections[queryset.db].vendor != "postgresql":
+            return None
+        try:
+            plan = json.loads(queryset.order_by().explain(format="json"))
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as exception:
+            logger.warning("Could not estimate the count of %s: %s", queryset.model, exception)
+            return None
+
+    def count(self, queryset):
+        estimate = self.estimate(queryset)
+        if estimate is None or estimate < self.threshold:
+            return super().count(queryset)
+        return estimate, True
+
+    async def acount(self, queryset):
+        # The planner has no asynchronous interface.
+        estimate = await sync_to_async(self.estimate)(queryset)
+        if estimate is None or estimate < self.threshold:
+            return await super().acount(queryset)
+        return estimate, True
+
+
+COUNT_STRATEGIES = {
+    "exact": ExactCount,
+    "cached": CachedCount,
+    "estimated": EstimatedCount,
+}
+
+
+def get_count_strategy(strategy):
+    """
+    Returns a count strategy instance from an instance, a class or a name of
+    COUNT_STRATEGIES. None stands for the exact count.
+    """
+    if strategy is None:
+        return ExactCount()
+    if isinstance(strategy, str):
+        strategy = COUNT_STRATEGIES[strategy]
+    if isinstance(strategy, type):
+        strategy = strategy()
+    return strategy
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    A Paginator getting its total count from a count strategy.
+
+    ``is_estimated`` tells the templates the count is approximate.
+    """
+
+    def __init__(self, object_list, per_page, count_strategy=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = get_count_strategy(count_strategy)
+        self.is_estimated = False
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        count, self.is_estimated = self.count_strategy.count(self.object_list)
+        return count
+
+    async def acount(self):
+        """
+        Counts the rows asynchronously, once: count is then read without
+        query.
+        """
+        if "count" not in self.__dict__ and hasattr(self.object_list, "query"):
+            count, self.is_estimated = await self.count_strategy.acount(self.object_list)
+            self.__dict__["count"] = count
+        return self.count
@@ -0,0 +1,103 @@
+"""
+A central registry of the models served by BSCT.
+
+    # urls.py
+    import bsct
+    from myapp.models import Person, City
+
+    bsct.site.register(Person, paginate_by=20, row_cache=True)
+    bsct.site.register(City, crud_types="rl")
+
+    urlpatterns = [path("", include(bsct.site.urls))]
+
+Registering a model only records its options. The URL patterns are built
+with lazy URLGenerators: no form class, view or template lookup is built
+before the first request to a view, so the URLconf imports in about the same
+time whatever the number of registered models.
+"""
+from bsct.urls import URLGenerator
+
+# Options of URLGenerator(), the others are passed to get_urlpatterns().
+GENERATOR_OPTIONS = (
+    "form_class",
+    "bsct_view_prefix",
+    "select_related",
+    "prefetch_related",
+    "row_cache",
+    "conditional",
+)
+URLPATTERNS_OPTIONS = (
+    "crud_types",
+    "paginate_by",
+    "login_required",
+    "keyset_pagination",
+    "count_strategy",
+    "streaming",
+    "async_views",
+)
+
+
+class AlreadyRegistered(Exception):
+    pass
+
+
+class NotRegistered(Exception):
+    pass
+
+
+class BSCTSite(object):
+    """
+    The models registered with their URLGenerator and get_urlpatterns()
+    options.
+    """
+
+    def __init__(self, generator_class=URLGenerator):
+        self.generator_class = generator_class
+        self._registry = {}
+
+    def register(self, model, **options):
+        """
+        Registers a model, with the options of URLGenerator() and
+        get_urlpatterns().
+        """
+        if model in self._registry:
+            raise AlreadyRegistered("%s is already registered." % model.__name__)
+        unknown = set(options) - set(GENERATOR_OPTIONS) - set(URLPATTERNS_OPTIONS)
+        if unknown:
+            raise TypeError("Unknown options: %s" % ", ".join(sorted(unknown)))
+        self._registry[model] = options
+        return model
+
+    def unregister(self, model):
+        if model not in self._registry:
+            raise NotRegistered("%s is not registered." % model.__name__)
+        del self._registry[model]
+
+    def is_registered(self, model):
+        return model in self._registry
+
+    def get_generator(self, model):
+        """
+        Returns the lazy URLGenerator of a registered model.
+        """
+        options = self._registry[model]
+        return self.generator_class(
+            model,
+            lazy=True,
+            **{key: value for key, value in options.items() if key in GENERATOR_OPTIONS}
+        )
+
+    def get_urls(self):
+        urlpatterns = []
+        for model, options in self._registry.items():
+            urlpatterns += self.get_generator(model).get_urlpatterns(
+                **{key: value for key, value in options.items() if key in URLPATTERNS_OPTIONS}
+            )
+        return urlpatterns
+
+    @property
+    def urls(self):
+        return self.get_urls()
+
+
+site = BSCTSite()
@@ -0,0 +1,185 @@
+"""
+Fragment cache for the rows of the list view.
+
+Each rendered ``<tr>`` is cached under the model and the pk of its object.
+A cache entry holds the rendered variants of the row (by template and
+language) along with:
+
+- the version of the object: the value of its ``auto_now`` DateTimeField
+  (or ``updated`` field) if it has one, so a saved object is re-rendered;
+- the generation of the model, bumped when an instance of a model displayed
+  in the rows (foreign keys) changes.
+
+The signal handlers registered by ``watch()`` delete the entry of a saved,
+deleted or re-related (m2m_changed) object and bump the generations. The
+entries of a page are read with a single ``cache.get_many()`` and the missing
+rows written with a single ``cache.set_many()`` once the page is rendered.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.translation import get_language
+
+from bsct.columns import get_version_field
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+# Cache alias used for the rows.
+CACHE_ALIAS = getattr(settings, "BSCT_ROW_CACHE_ALIAS", "default")
+
+# Hits and misses by model label, since the process started.
+_stats = {}
+
+
+def get_row_cache_stats():
+    """
+    Returns the row cache hits and misses by model label.
+    """
+    return {label: dict(stats) for label, stats in _stats.items()}
+
+
+def reset_row_cache_stats():
+    _stats.clear()
+
+
+def _count(model, outcome):
+    stats = _stats.setdefault(model._meta.label_lower, {"hits": 0, "misses": 0})
+    stats[outcome] += 1
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def row_key(model, pk):
+    return "bsct:row:%s:%s" % (model._meta.label_lower, pk)
+
+
+def generation_key(model):
+    return "bsct:row:generation:%s" % model._meta.label_lower
+
+
+def get_variant(template_names, headers):
+    """
+    Returns an identifier of the way rows are rendered, in the active
+    language: the labels and the choices are translated.
+    """
+    signature = "%s|%s|%s" % (get_language(), "|".join(template_names), "|".join(headers))
+    return hashlib.sha256(signature.encode()).hexdigest()[:16]
+
+
+class RowCachePage(object):
+    """
+    The cached rows of a page of the list view.
+    """
+
+    def __init__(self, model, objects, variant, timeout=300):
+        self.model = model
+        self.variant = variant
+        self.timeout = timeout
+        self.version_field = get_version_field(model)
+        self.pending = {}
+
+        self.keys = {obj.pk: row_key(model, obj.pk) for obj in objects}
+        values = get_cache().get_many([generation_key(model)] + list(self.keys.values()))
+        self.generation = values.get(generation_key(model))
+        self.entries = {pk: values.get(key) for pk, key in self.keys.items()}
+
+    def get_version(self, obj):
+        if self.version_field is None:
+            return None
+        value = getattr(obj, self.version_field.attname, None)
+        return value.isoformat() if hasattr(value, "isoformat") else value
+
+    def get(self, obj):
+        """
+        Returns the cached row of the object, or None.
+        """
+        entry = self.entries.get(obj.pk)
+        if (
+            entry
+            and entry[0] == self.generation
+            and entry[1] == self.get_version(obj)
+            and self.variant in entry[2]
+        ):
+            _count(self.model, "hits")
+            return entry[2][self.variant]
+        _count(self.model, "misses")
+        return None
+
+    def set(self, obj, html):
+        """
+        Stores the row of the object, written by flush().
+        """
+        version = self.get_version(obj)
+        entry = self.entries.get(obj.pk)
+        if entry and entry[0] == self.generation and entry[1] == version:
+            variants = dict(entry[2])
+        else:
+            variants = {}
+        variants[self.variant] = html
+        self.pending[row_key(self.model, obj.pk)] = (self.generation, version, variants)
+
+    def flush(self, *args):
+        if self.pending:
+            get_cache().set_many(self.pending, self.timeout)
+            self.pending = {}
+
+
+def _delete_row(sender, instance, **kwargs):
+    get_cache().delete(row_key(sender, instance.pk))
+
+
+def _delete_m2m_rows(sender, instance, action, model, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    keys = [row_key(instance.__class__, instance.pk)]
+    keys += [row_key(model, pk) for pk in pk_set or ()]
+    get_cache().delete_many(keys)
+
+
+def _bump_generations(models_to_bump):
+    def bump(sender, **kwargs):
+        cache = get_cache()
+        for model in models_to_bump:
+            try:
+                cache.incr(generation_key(model))
+            except ValueError:
+                cache.set(generation_key(model), 1, None)
+
+    return bump
+
+
+# Receivers must be kept alive: signals hold weak references.
+_receivers = {}
+
+
+def watch(model, related_models=()):
+    """
+    Invalidates the cached rows of the model when its instances change, and
+    all of them when an instance of one of the related models changes.
+    """
+    label = model._meta.label_lower
+    uid = "bsct.rowcache.%s" % label
+    post_save.connect(_delete_row, sender=model, dispatch_uid=uid)
+    post_delete.connect(_delete_row, sender=model, dispatch_uid=uid)
+    for field in model._meta.many_to_many:
+        m2m_changed.connect(
+            _delete_m2m_rows,
+            sender=field.remote_field.through,
+            dispatch_uid="%s.%s" % (uid, field.name),
+        )
+
+    for related_model in related_models:
+        if related_model is model:
+            continue
+        related_uid = "%s.%s" % (uid, related_model._meta.label_lower)
+        receiver = _receivers[related_uid] = _bump_generations([model])
+        post_save.connect(receiver, sender=related_model, dispatch_uid=related_uid)
+        post_delete.connect(receiver, sender=related_model, dispatch_uid=related_uid)
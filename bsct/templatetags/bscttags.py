@@ -1,11 +1,19 @@
+import json
 import logging
 from typing import Dict, List
 
 from django.conf import settings
 from django.db import models
-from django.template import Library
+from django.template import Library, Node, TemplateSyntaxError
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockNode
+from django.utils.html import escape, format_html, format_html_join
+from django.utils.safestring import mark_safe
 
-from django.urls.exceptions import NoReverseMatch
+from bsct.assets import get_bundle_urls
+from bsct.columns import RowActions, get_allowed_fields, get_column_plan  # noqa: F401
+from bsct.deletion import collect_cascade, is_field_m2m_cascade  # noqa: F401
+from bsct.inheritance import get_row_url
+from bsct.timing import timed, timer
 
 # Get the logger name from the user's settings.
 logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
@@ -49,15 +57,19 @@ def get_verbose_name_plural(instance):
 def append_querystring(request, exclude=None):
     """
     Returns the query string for the current request, minus the GET parameters
-    included in the `exclude`.
+    included in the `exclude` (a list or a comma separated string), prefixed
+    with an ampersand and escaped for an HTML attribute.
     """
     exclude = exclude or ["page"]
+    if isinstance(exclude, str):
+        exclude = exclude.split(",")
 
     if request and request.GET:
-        amp = "&amp;"
-        return amp + amp.join(
-            ["%s=%s" % (k, v) for k, v in request.GET.items() if k not in exclude]
-        )
+        params = request.GET.copy()
+        for key in exclude:
+            params.pop(key, None)
+        if params:
+            return format_html("&amp;{}", params.urlencode())
 
     return ""
 
@@ -67,6 +79,7 @@ def append_querystring(request, exclude=None):
 
 
 @register.filter
+@timed("get_detail")
 def get_detail(instance):
     """
     Returns a dictionary of the models fields and values.
@@ -74,19 +87,10 @@ def get_detail(instance):
     If the method '<field>_detail' or verbose_name is defined, its value is used as the
     displayed value for the field.
     """
-
-    # Get fields allowed with get_allowed_fields_details() classmethod.
-    allowed_fields = instance.get_allowed_fields_details()
-    if allowed_fields == "__all__":
-        fields = instance._meta.get_fields()
-    else:
-        fields = [f for f in instance._meta.get_fields() if f.name in allowed_fields]
-
+    plan = get_column_plan(instance)
     details = {}
 
-    # Get fields that are in a foreign key relation.
-    fk_fields = [f for f in allowed_fields if "__" in f]
-    for fk_field in fk_fields:
+    for fk_field in plan.detail_paths:
         try:
             # Get the field name and the related model.
             model_name, field_name = fk_field.split("__")
@@ -99,112 +103,17 @@ def get_detail(instance):
         except Exception as exception:
             logger.warning("Error getting related field %s: %s", fk_field, exception)
 
-    for field in fields:
+    for column in plan.detail_columns:
         try:
-            # Get information about the field.
-            detail_method = getattr(instance, f"get_{field.name}_detail", None)
-            if detail_method:
-                details[detail_method] = detail_method(*{instance})
-
-            verbose = getattr(field, "verbose_name", None)
-            value = getattr(instance, field.name, None)
-
-            display_method = getattr(instance, "get_%s_display" % field.name, None)
-            render = getattr(instance, "get_%s_render" % field.name, None)
-            if display_method:
-                value = display_method()
-            elif render:
-                value = f"<div class={render()}>{value}</div>"
-
-            elif field.get_internal_type() == "DateTimeField":
-                value = value.strftime("%Y-%m-%d %H:%M:%S")
-
-            elif field.is_relation:
-                
-                relation_verbose = getattr(field.related_model._meta, "verbose_name")
-                if getattr(field, "multiple", False):
-                    # If the field is a relation to a many-to-many field
-
-                    # Get the related objects and generate links.
-                    rset = getattr(instance, "%s_set" % field.name)
-                    value = []
-                    for i in rset.all():
-                        try:
-                            value.append(f"<a href={i.get_absolute_url()}>{i}</a>")
-                        except NoReverseMatch:
-                            value.append(str(i).strip('<>'))
-
-                    # Try to get the plural verbose name of the related model if any,
-                    # and if there is multiple relations.
-                    if rset.count() > 1 and getattr(
-                        field.related_model._meta, "verbose_name_plural"
-                    ):
-                        relation_verbose = getattr(
-                            field.related_model._meta, "verbose_name_plural"
-                        )
-                else:
-                    # If the field is a relation to a ForeignKey (one-to-many) field
-                    foreign_key_element = getattr(instance, "%s" % field.name)
-                    if hasattr(foreign_key_element, "get_absolute_url"):
-                        ref_url = foreign_key_element.get_absolute_url()
-                        value = f"<a href='{ref_url}'>{value}</a>"
-                    else:
-                        value = str(foreign_key_element)
-
-            # If the value is 'None', we want to display '-' instead.
-            if value is None or (type(value) is str and value.endswith("None")):
-                value = "-"
-
-            # Now, add the field to the details dictionary.
-            if field.is_relation:
-                if relation_verbose:
-                    details[relation_verbose] = value
-                else:
-                    details[field.name] = value
-            elif verbose:
-                # Classic field with verbose_name
-                if field.__class__ is models.FileField:
-                    # URL to the file
-                    details[verbose] = f"<a href='{value.url}'>{value}</a>"
-                else:
-                    details[verbose] = value
-            else:
-                details[field.name] = value
-
+            column.add_to(details, instance)
         except Exception as exception:
-            logger.warning("Error getting field %s: %s (%s)", field, exception, exception.__class__)
+            logger.warning(
+                "Error getting field %s: %s (%s)",
+                column.field, exception, exception.__class__,
+            )
     return details
 
 
-def get_allowed_fields(instance: models.Model) -> List[str]:
-    """Returns allowed fields for a model.
-
-    Args:
-        instance (Model): instance to look for allowed fields.
-
-    Returns:
-        list: list of allowed fields.
-    """
-
-    if hasattr(instance, "get_allowed_fields_list"):
-        allowed_fields = instance.get_allowed_fields_list()
-    else:
-        # Get fields allowed with get_allowed_fields_details() classmethod.
-        allowed_fields = instance.get_allowed_fields()
-
-    if allowed_fields == "__all__":
-        # All fields, ignoring many-to-many fields
-        return [
-            f for f in instance._meta.get_fields() if not getattr(f, "multiple", False)
-        ]
-    else:
-        return [
-            f
-            for f in instance._meta.get_fields()
-            if f.name in allowed_fields and not getattr(f, "multiple", False)
-        ]
-
-
 def get_headers(instance: models.Model) -> Dict[str, str]:
     """Returns headers for a model.
 
@@ -214,37 +123,11 @@ def get_headers(instance: models.Model) -> Dict[str, str]:
     Returns:
         dict: dictionary of headers.
     """
-    headers = {}
-
-    for field in get_allowed_fields(instance):
-        if field.__class__ is models.TextField:
-            continue  # TextFields are not displayed in the list view.
-
-        try:
-            detail_method = getattr(instance, "get_%s_detail" % field.name, None)(
-                *{instance}
-            )
-        except Exception:
-            detail_method = None
-        verbose = getattr(field, "verbose_name", None)
-        if field.is_relation:
-            relation_verbose = getattr(field.related_model._meta, "verbose_name")
-            # If the field is a relation to a ForeignKey (one-to-many) field
-            if relation_verbose:
-                headers[field.__str__()] = relation_verbose
-            else:
-                headers[field.__str__()] = field.name
-        elif detail_method:
-            headers[field.__str__()] = detail_method
-        elif verbose:
-            headers[field.__str__()] = verbose
-        else:
-            headers[field.__str__()] = field.name
-
-    return headers
+    return dict(get_column_plan(instance).headers)
 
 
 @register.filter
+@timed("get_list_headers")
 def get_list_headers(instances: List[models.Model]) -> Dict[str, str]:
     """Returns headers for a list of models.
 
@@ -255,11 +138,13 @@ def get_list_headers(instances: List[models.Model]) -> Dict[str, str]:
         dict: dictionary of headers.
     """
     headers = {}
-    [headers.update(get_headers(instance)) for instance in instances]
+    for model in dict.fromkeys(instance.__class__ for instance in instances):
+        headers.update(get_column_plan(model).headers)
     return headers
 
 
 @register.filter
+@timed("get_list_detail")
 def get_list_detail(instance):
     """
     Returns a dictionary of the models fields and values.
@@ -270,69 +155,171 @@ def get_list_detail(instance):
 
     details = {}
 
-    for field in get_allowed_fields(instance):
+    for column in get_column_plan(instance).list_columns:
         try:
-            if field.__class__ is models.TextField:
-                continue  # TextFields are not displayed in the list view.
-
-            try:
-                detail_method = getattr(instance, "get_%s_detail" % field.name, None)(
-                    *{instance}
-                )
-            except Exception:
-                detail_method = None
-            verbose = getattr(field, "verbose_name", None)
-            value = getattr(instance, field.name, None)
-
-            display_method = getattr(instance, "get_%s_display" % field.name, None)
-            if display_method:
-                value = display_method()
-
-            render = getattr(instance, "get_%s_render" % field.name, None)
-            if render:
-                value = f"<div class={render()}>{value}</div>"
-            if field.get_internal_type() == "DateTimeField":
-                value = value.strftime("%Y-%m-%d %H:%M:%S")
-            if field.is_relation:
-                relation_verbose = getattr(field.related_model._meta, "verbose_name")
-                # If the field is a relation to a ForeignKey (one-to-many) field
-                ref_url = getattr(instance, "%s" % field.name).get_absolute_url()
-                value = f"<a href='{ref_url}'>{value}</a>"
-                if relation_verbose:
-                    details[field.__str__()] = value
-
-                else:
-                    details[field.__str__()] = value
-            elif detail_method:
-                details[field.__str__()] = detail_method
-            elif verbose:
-                # Classic field with verbose_name
-                if field.__class__ is models.FileField:
-                    # URL to the file
-                    details[field.__str__()] = f"<a href='{value.url}'>{value}</a>"
-                else:
-                    details[field.__str__()] = value
-            else:
-                details[field.__str__()] = value
-
-            if value is None:
-                details[field.__str__()] = ""
+            details[column.key] = column.html(instance)
         except Exception:
             pass
     return details
 
 
-def is_field_m2m_cascade(field):
+class CachedRowNode(Node):
+    """
+    Renders its content, or returns it from the row cache of the page.
+    """
+
+    def __init__(self, nodelist, instance):
+        self.nodelist = nodelist
+        self.instance = instance
+
+    def render(self, context):
+        rows = context.get("bsct_row_cache")
+        if rows is None:
+            return self.nodelist.render(context)
+
+        instance = self.instance.resolve(context)
+        html = rows.get(instance)
+        if html is None:
+            html = self.nodelist.render(context)
+            rows.set(instance, html)
+        return html
+
+
+@register.tag
+def bsct_cached_row(parser, token):
+    """
+    Caches the row of an object when the list view enables the row cache.
+
+    Usage::
+
+        {% bsct_cached_row object %}<tr>...</tr>{% endbsct_cached_row %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise TemplateSyntaxError("%r tag requires one argument." % bits[0])
+    nodelist = parser.parse(("endbsct_cached_row",))
+    parser.delete_first_token()
+    return CachedRowNode(nodelist, parser.compile_filter(bits[1]))
+
+
+@register.simple_tag(takes_context=True)
+def bsct_row_url(context, instance):
+    """
+    Returns the URL of the detail page of a row of the list of the view
+    (see bsct.inheritance.get_row_url()), or None.
+
+    Usage::
+
+        {% bsct_row_url object as url %}
+    """
+    model = getattr(context.get("view"), "model", None)
+    return get_row_url(instance, model or instance.__class__)
+
+
+def render_rows(object_list, headers, rows=None, model=None):
+    """Renders the rows of the list, as list.html without its blocks overridden.
+
+    Args:
+        object_list: the instances, of one model or of its subclasses.
+        headers (dict): list view headers, keyed like get_list_detail().
+        rows (RowCachePage): the row cache of the page, if enabled.
+        model (Model): the model class of the list, whose detail page the
+            rows of a subclass without URLs link to.
+
+    Returns:
+        SafeString: the <tr> elements.
     """
-    Returns True if the field is a ManyToManyField and the 'on_delete' is set to CASCADE.
+    keys = list(headers)
+    # The columns of the headers, by class: a subclass has its own plan.
+    columns_by_class = {}
+    unresolved = set()
+    actions = None
+    parts = []
+    for instance in object_list:
+        html = rows.get(instance) if rows is not None else None
+        if html is None:
+            columns = columns_by_class.get(instance.__class__)
+            if columns is None:
+                plan_columns = {column.key: column for column in get_column_plan(instance).list_columns}
+                columns = columns_by_class[instance.__class__] = [plan_columns.get(key) for key in keys]
+
+            cells = []
+            for column in columns:
+                try:
+                    cells.append("<td>%s</td>" % (column.html(instance) if column is not None else ""))
+                except Exception:
+                    cells.append("<td></td>")
+
+            if actions is None:
+                actions = RowActions()
+            url = get_row_url(instance, model or instance.__class__, unresolved)
+            html = "<tr id = '%s'>%s<td>%s</td></tr>\n" % (
+                escape(instance.pk),
+                "".join(cells),
+                actions.html(url),
+            )
+            if rows is not None:
+                rows.set(instance, html)
+        parts.append(html)
+    return mark_safe("".join(parts))
+
+
+class RowsNode(Node):
+    """
+    Renders the rows of the list in one pass, or its content when one of the
+    blocks it holds is overridden.
+    """
+
+    child_nodelists = ("nodelist",)
+
+    def __init__(self, nodelist, object_list, headers):
+        self.nodelist = nodelist
+        self.object_list = object_list
+        self.headers = headers
+        self.blocks = {node.name: node for node in nodelist.get_nodes_by_type(BlockNode)}
+
+    def is_overridden(self, context):
+        block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+        if block_context is None:
+            return False
+        return any(
+            block_context.get_block(name) not in (None, node)
+            for name, node in self.blocks.items()
+        )
+
+    def render(self, context):
+        if self.is_overridden(context):
+            return self.nodelist.render(context)
+        view = context.get("view")
+        with timer("tag-bsct_rows"):
+            return render_rows(
+                self.object_list.resolve(context),
+                self.headers.resolve(context),
+                context.get("bsct_row_cache"),
+                getattr(view, "model", None),
+            )
+
+
+@register.tag
+def bsct_rows(parser, token):
     """
-    if field.is_relation:  # if field is a relation (FK, M2M)
-        if getattr(
-            field, "multiple", False
-        ):  # If the field is a relation to a many-to-many field
-            if field.on_delete == models.CASCADE:  # if on_delete is CASCADE
-                return True
-    return False
+    Renders the rows of the list from the column plans, without a template
+    loop per cell. Its content is rendered instead when a template
+    overrides one of its blocks (the cells, the extra columns or the
+    actions).
+
+    Usage::
+
+        {% bsct_rows object_list headers %}
+            {% for object in object_list %}<tr>...</tr>{% endfor %}
+        {% endbsct_rows %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise TemplateSyntaxError("%r tag requires two arguments." % bits[0])
+    nodelist = parser.parse(("endbsct_rows",))
+    parser.delete_first_token()
+    return RowsNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
 
 
 @register.filter(name="dict_key")
@@ -342,59 +329,53 @@ def dict_key(d, k):
     """
     try:
         return d[k]
-    except KeyError:
+    except (KeyError, TypeError):
         return ""
 
 
 @register.filter
+@timed("get_delete_detail")
 def get_delete_detail(instance):
     """
-    Returns a dictionary of the models FK and M2M relationships fields and values.
+    Returns a dictionary of the objects deleted in cascade with the instance,
+    by relation: the first objects as links and the number of the others.
     """
-    fields = instance._meta.get_fields()
-    details = {}
+    return {entry.label: entry.html for entry in collect_cascade(instance)}
 
-    for field in fields:  # loop through model instance fields
-        if is_field_m2m_cascade(
-            field
-        ):  # if field is a ManyToManyField and on_delete is CASCADE
-
-            rset = getattr(instance, "%s_set" % field.name)  # set of related objects
-            value = []
-
-            for child_instance in rset.all():  # loop through related objects
-                child_set = []
-                child_fields = (
-                    child_instance._meta.get_fields()
-                )  # get fields of related object
-                for (
-                    child_field
-                ) in child_fields:  # loop through child model instance fields
-
-                    if is_field_m2m_cascade(
-                        child_field
-                    ):  # if child field is a ManyToManyField and on_delete is CASCADE
-                        child_rset = getattr(
-                            child_instance, "%s_set" % child_field.name
-                        )  # set of related objects
-
-                        [
-                            child_set.append(
-                                f"<a href='{c.get_absolute_url()}'>{c}</a>"
-                            )
-                            for c in child_rset.all()
-                        ]  # loop through related objects
-                        # we store the instances
-
-                value.append(
-                    f"<a href='{child_instance.get_absolute_url()}'>{child_instance}</a><ul>{''.join([f'<li>{c}</li>' for c in child_set])}</ul>"
-                )
-
-            # handle verbose_name if it is defined
-            relation_verbose = getattr(field.related_model._meta, "verbose_name")
-            if relation_verbose:
-                details[relation_verbose] = value
-            else:
-                details[field.name] = value
 
-    return details
+# Static bundles
+# -------------------------
+
+
+@register.simple_tag
+def bsct_bundle(name):
+    """
+    Returns the <link> and <script> tags of a static bundle (see
+    bsct.assets).
+
+    Usage::
+
+        {% bsct_bundle 'list' %}
+    """
+    return format_html(
+        "{}\n{}",
+        format_html_join(
+            "\n", '<link rel="stylesheet" type="text/css" href="{}"/>',
+            ((url,) for url in get_bundle_urls(name, "css")),
+        ),
+        format_html_join(
+            "\n", '<script src="{}"></script>',
+            ((url,) for url in get_bundle_urls(name, "js")),
+        ),
+    )
+
+
+@register.simple_tag
+def bsct_bundle_urls(name, kind="js"):
+    """
+    Returns the URLs of the files of a static bundle as a JavaScript array,
+    to load them on demand.
+    """
+    urls = json.dumps(get_bundle_urls(name, kind))
+    # Can not close the <script> element holding it.
+    return mark_safe(urls.replace("<", "\\u003C").replace(">", "\\u003E").replace("&", "\\u0026"))
@@ -0,0 +1,322 @@
+"""
+Opt-in timing of the BSCT views, enabled with ``BSCT_TIMING = True``.
+
+For each request served by a BSCT view, the following are measured:
+
+- ``sql``: time spent executing queries, and their number;
+- ``orm``: time spent evaluating the displayed querysets (SQL included);
+- ``tag-<name>``: time spent in each bscttags filter, and its number of calls;
+- ``render``: time spent rendering the template (tags included), when the
+  handler renders the response, after the template response middleware;
+- ``total``: time spent in the view and in the rendering.
+
+They are sent in a ``Server-Timing`` header, and logged as a warning on the
+BSCT logger, with the measures in the ``bsct_timing`` attribute of the
+record, when one of the ``BSCT_TIMING_THRESHOLDS`` is exceeded.
+
+The setting is read when BSCT is imported: when it is off, the views and
+filters are not instrumented at all.
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.response import TemplateResponse
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+TIMING_ENABLED = getattr(settings, "BSCT_TIMING", False)
+
+# Measures above which a request is logged: milliseconds, or number of
+# queries for "queries".
+THRESHOLDS = getattr(
+    settings,
+    "BSCT_TIMING_THRESHOLDS",
+    {"total": 500, "sql": 200, "queries": 50},
+)
+
+# The Timing of the request being served, if any.
+_current = contextvars.ContextVar("bsct_timing", default=None)
+
+
+class Timing(object):
+    """
+    The measures of a request: durations (in seconds) and counts by name.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+
+    def add(self, name, duration, count=1):
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+        self.counts[name] = self.counts.get(name, 0) + count
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def as_dict(self):
+        """
+        Returns {name: {"ms": ..., "count": ...}}.
+        """
+        return {
+            name: {"ms": round(duration * 1000, 3), "count": self.counts[name]}
+            for name, duration in self.durations.items()
+        }
+
+    def server_timing(self):
+        """
+        Returns the value of the Server-Timing header.
+        """
+        metrics = []
+        for name, duration in self.durations.items():
+            metric = "%s;dur=%.3f" % (name, duration * 1000)
+            if name == "sql":
+                metric += ';desc="%d queries"' % self.counts[name]
+            elif name not in ("total", "render"):
+                metric += ';desc="%d calls"' % self.counts[name]
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+    def exceeded(self):
+        """
+        Returns the names of the thresholds exceeded.
+        """
+        exceeded = []
+        for name, threshold in THRESHOLDS.items():
+            if name == "queries":
+                value = self.counts.get("sql", 0)
+            else:
+                value = self.durations.get(name, 0.0) * 1000
+            if value > threshold:
+                exceeded.append(name)
+        return exceeded
+
+
+def get_timing():
+    """
+    Returns the Timing of the current request, or None.
+    """
+    return _current.get()
+
+
+@contextlib.contextmanager
+def timer(name):
+    """
+    Adds the time spent in the block to the current request, if timed.
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+    else:
+        with timing.timer(name):
+            yield
+
+
+def timed(name):
+    """
+    Decorates a function to add its duration to the current request, as
+    ``tag-<name>``. Returns the function itself when timing is disabled.
+    """
+    def decorator(func):
+        if not TIMING_ENABLED:
+            return func
+
+        metric = "tag-%s" % name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timing = _current.get()
+            if timing is None:
+                return func(*args, **kwargs)
+            with timing.timer(metric):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def evaluate(queryset):
+    """
+    Evaluates a queryset as ``orm`` if the request is timed and it was not
+    evaluated yet.
+    """
+    timing = _current.get()
+    if timing is not None and getattr(queryset, "_result_cache", False) is None:
+        with timing.timer("orm"):
+            len(queryset)
+
+
+def _time_query(execute, sql, params, many, context):
+    """
+    Adds the query to the ``sql`` measure of the current request, if timed.
+    """
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add("sql", time.perf_counter() - start)
+
+
+def _install_query_timer(connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _install_query_timers():
+    """
+    Times the queries of the connections of the current thread.
+
+    The asynchronous ORM runs the queries in the threads of sync_to_async(),
+    whose connections are instrumented when they connect (see
+    connection_created below): the timing of the request follows the
+    queries there, as a context variable.
+    """
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(connection)
+
+
+def _is_unrendered(response):
+    return callable(getattr(response, "render", None)) and not response.is_rendered
+
+
+class TimedTemplateResponse(TemplateResponse):
+    """
+    A TemplateResponse rendered under the timing of its request, if any: the
+    render and the queries and tags it runs are measured.
+    """
+
+    timing = None
+
+    @property
+    def rendered_content(self):
+        if self.timing is None:
+            return super().rendered_content
+        token = _current.set(self.timing)
+        try:
+            with self.timing.timer("render"):
+                return super().rendered_content
+        finally:
+            _current.reset(token)
+
+
+def _report(timing, request, response):
+    """
+    Adds the Server-Timing header, and logs the request if it is slow.
+    """
+    header = timing.server_timing()
+    if response.has_header("Server-Timing"):
+        header = "%s, %s" % (response["Server-Timing"], header)
+    response["Server-Timing"] = header
+
+    exceeded = timing.exceeded()
+    if exceeded:
+        logger.warning(
+            "Slow request %s %s (%s): %s",
+            request.method,
+            request.path,
+            ", ".join(exceeded),
+            timing.server_timing(),
+            extra={"bsct_timing": timing.as_dict(), "bsct_path": request.path},
+        )
+    return response
+
+
+def _finish(timing, request, response, start):
+    """
+    Reports the request, once its response is rendered if it is not yet.
+
+    The handler renders a template response after the template response
+    middleware, so the render is timed by the response itself (see
+    TimedTemplateResponse), or from the end of the view for another class.
+    """
+    dispatched = time.perf_counter() - start
+    if not _is_unrendered(response):
+        timing.add("total", dispatched)
+        return _report(timing, request, response)
+
+    if isinstance(response, TimedTemplateResponse):
+        response.timing = timing
+        mark = None
+    else:
+        mark = time.perf_counter()
+
+    def report(response):
+        if mark is not None:
+            timing.add("render", time.perf_counter() - mark)
+        timing.add("total", dispatched + timing.durations.get("render", 0.0))
+        return _report(timing, request, response)
+
+    response.add_post_render_callback(report)
+    return response
+
+
+def time_view(dispatch, request, *args, **kwargs):
+    """
+    Calls dispatch() while timing it; the Server-Timing header is added and
+    the request logged if it is slow once the response is rendered.
+    """
+    timing = Timing()
+    token = _current.set(timing)
+    start = time.perf_counter()
+    try:
+        _install_query_timers()
+        response = dispatch(request, *args, **kwargs)
+    finally:
+        _current.reset(token)
+    return _finish(timing, request, response, start)
+
+
+async def atime_view(dispatch, request, *args, **kwargs):
+    """
+    Like time_view(), for asynchronous views.
+    """
+    timing = Timing()
+    token = _current.set(timing)
+    start = time.perf_counter()
+    try:
+        response = await dispatch(request, *args, **kwargs)
+    finally:
+        _current.reset(token)
+    return _finish(timing, request, response, start)
+
+
+class TimingMixin(object):
+    """
+    Times the view when ``BSCT_TIMING`` is on.
+    """
+
+    response_class = TimedTemplateResponse
+
+    def dispatch(self, request, *args, **kwargs):
+        if not TIMING_ENABLED:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return atime_view(super().dispatch, request, *args, **kwargs)
+        return time_view(super().dispatch, request, *args, **kwargs)
+
+    def get_object(self, queryset=None):
+        # Single object views: the object and its prefetched relations.
+        with timer("orm"):
+            return super().get_object(queryset)
+
+
+if TIMING_ENABLED:
+    connection_created.connect(_install_query_timer)
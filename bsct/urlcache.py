@@ -0,0 +1,73 @@
+"""
+Cached reversing of the BSCT URL names.
+
+Reversing ``<prefix>_detail`` for every row of a list is costly, while the
+resulting URLs only differ by their pk. The first reverse of a name builds a
+formatter (the URL split around a sentinel pk); the next ones are plain string
+concatenations. Formatters are built lazily, once the URLconf registered by
+the URLGenerator can be resolved, and are keyed by URLconf, script prefix and
+active language (i18n_patterns() and translated patterns depend on it).
+"""
+from django.core.signals import setting_changed
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.translation import get_language
+
+# Any pk matching the (?P<pk>\d+) group of the BSCT URL patterns.
+SENTINEL_PK = 9081726354
+
+_formatters = {}
+_urls = {}
+
+
+def reverse_pk(name, pk):
+    """
+    Returns reverse(name, kwargs={"pk": pk}), from a cached formatter.
+    """
+    pk_str = str(pk)
+    if not pk_str.isdigit():
+        # Only integer pks are matched by the BSCT URL patterns.
+        return reverse(name, kwargs={"pk": pk})
+
+    key = (get_urlconf(), get_script_prefix(), get_language(), name)
+    try:
+        formatter = _formatters[key]
+    except KeyError:
+        url = reverse(name, kwargs={"pk": SENTINEL_PK})
+        sentinel = str(SENTINEL_PK)
+        if url.count(sentinel) == 1:
+            formatter = url.split(sentinel)
+        else:
+            formatter = None
+        _formatters[key] = formatter
+
+    if formatter is None:
+        return reverse(name, kwargs={"pk": pk})
+    return formatter[0] + pk_str + formatter[1]
+
+
+def reverse_name(name):
+    """
+    Returns reverse(name), cached.
+    """
+    key = (get_urlconf(), get_script_prefix(), get_language(), name)
+    try:
+        return _urls[key]
+    except KeyError:
+        url = _urls[key] = reverse(name)
+        return url
+
+
+def clear_url_cache():
+    """
+    Forgets the cached formatters and URLs.
+    """
+    _formatters.clear()
+    _urls.clear()
+
+
+def _clear_on_urlconf_changed(setting, **kwargs):
+    if setting == "ROOT_URLCONF":
+        clear_url_cache()
+
+
+setting_changed.connect(_clear_on_urlconf_changed)
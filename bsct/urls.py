@@ -1,12 +1,54 @@
-import os
+import logging
 
+from asgiref.sync import markcoroutinefunction
 from django.conf import settings
 from django.contrib.auth.decorators import \
     login_required as login_required_decorator
-from django.forms import modelform_factory
 from django.urls import re_path, reverse_lazy
 
+from bsct import rowcache
 from bsct import views as bsct_views
+from bsct.conditional import conditional_detail_view, conditional_list_view
+from bsct.forms import get_model_form
+from bsct.pagination import CachedCount, get_count_strategy
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+
+class LazyView(object):
+    """
+    A view built on its first call, by calling ``build()``.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.view = None
+
+    def get_view(self):
+        if self.view is None:
+            # Concurrent first calls may build the view twice: both are
+            # equivalent, one of them is kept.
+            self.view = self.build()
+        return self.view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.get_view()(request, *args, **kwargs)
+
+
+class AsyncLazyView(LazyView):
+    """
+    A LazyView of an asynchronous view.
+    """
+
+    def __init__(self, build):
+        super().__init__(build)
+        markcoroutinefunction(self)
+
+    async def __call__(self, request, *args, **kwargs):
+        return await self.get_view()(request, *args, **kwargs)
 
 
 class URLGenerator(object):
@@ -19,57 +61,110 @@ class URLGenerator(object):
         - ``lowercasemodelname_list``:   For the ListView.
         - ``lowercasemodelname_update``: For the UpdateView.
         - ``lowercasemodelname_delete``: For the DeleteView.
+        - ``lowercasemodelname_bulk_delete``: For the BulkDeleteView.
+        - ``lowercasemodelname_data``:   For the DataTableView.
+        - ``lowercasemodelname_export``: For the ExportView.
+        - ``lowercasemodelname_import``: For the ImportView.
+        - ``lowercasemodelname_autocomplete``: For the AutocompleteView.
     """
 
-    def __init__(self, model, form_class=None, bsct_view_prefix=None):
+    def __init__(
+        self,
+        model,
+        form_class=None,
+        bsct_view_prefix=None,
+        select_related=None,
+        prefetch_related=None,
+        row_cache=False,
+        conditional=False,
+        lazy=False,
+    ):
         """
         Internalize the model and set the view prefix.
+
+        ``select_related`` and ``prefetch_related`` are passed to the list and
+        detail views: None derives the lookups from the displayed columns, a
+        list of lookups overrides them and False disables them.
+
+        With ``row_cache``, the rows of the list are cached (see bsct.rowcache)
+        and the signal handlers invalidating them are registered.
+
+        With ``conditional``, the list and detail views answer conditional GET
+        requests (ETag / Last-Modified) with a 304 before rendering (see
+        bsct.conditional).
+
+        With ``lazy``, each view (and the wrappers of the options above) is
+        built on its first request instead of when the URL is generated.
+
+        The views render ``<lower case model name>/<page>.html`` when such a
+        template is found by the template loaders (see bsct.overrides).
         """
         self.model = model
         self.bsct_view_prefix = bsct_view_prefix or model.__name__.lower()
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+        self.row_cache = row_cache
+        self.conditional = conditional
+        self.lazy = lazy
         self.set_form_class(form_class)
 
-        # Set the theorectical template base directory.
-        # This is used to check if a template is overridden by the user.
-        self.template_base_dir = os.path.join(
-            settings.BASE_DIR,
-            self.model._meta.app_label,
-            "templates",
-            self.model.__name__.lower())
-
     def set_form_class(self, form_class=None):
         """
         Sets the form class to be used by the create and update views.
+
+        Without form class, the views use the form of the model's allowed
+        fields, built on first use (see bsct.forms).
         """
-        if form_class:
-            self.form_class = form_class
-        else:
-            fields = self.model.get_allowed_fields()
+        self._form_class = form_class
 
-            self.form_class = modelform_factory(self.model, fields=fields)
+    @property
+    def form_class(self):
+        return self._form_class or get_model_form(self.model)
 
-    def get_create_url(self, form_class=None, login_required=False, **kwargs):
+    def make_view(self, build, login_required=False, async_views=False):
         """
-        Generate the create URL for the model.
+        Returns the view returned by ``build()``, built now or, with lazy,
+        on its first request.
         """
+        def build_view():
+            view = build()
+            if login_required:
+                view = login_required_decorator(view)
+            return view
 
-        if os.path.exists(
-            os.path.join(self.template_base_dir, "create.html")
-        ):
-            kwargs["template_name"] = self.model.__name__.lower() + "/create.html"
+        if self.lazy:
+            return AsyncLazyView(build_view) if async_views else LazyView(build_view)
+        return build_view()
 
-        form_class = form_class if form_class else self.form_class
-
-        if login_required:
-            view = login_required_decorator(
-                bsct_views.CreateView.as_view(
-                    model=self.model, form_class=form_class, **kwargs
-                )
+    def make_conditional(self, view, decorator, async_views=False):
+        """
+        Returns the view wrapped by a bsct.conditional decorator, whose
+        validators query synchronously: asynchronous views are not wrapped.
+        """
+        if async_views:
+            logger.warning(
+                "%s: conditional GET is not available for asynchronous views.",
+                self.model.__name__,
             )
-        else:
-            view = bsct_views.CreateView.as_view(
+            return view
+        return decorator(view)
+
+    def get_create_url(self, form_class=None, login_required=False, async_views=False, **kwargs):
+        """
+        Generate the create URL for the model.
+        """
+
+        form_class = form_class if form_class else self._form_class
+        kwargs.setdefault("bsct_view_prefix", self.bsct_view_prefix)
+
+        view_class = bsct_views.AsyncCreateView if async_views else bsct_views.CreateView
+        view = self.make_view(
+            lambda: view_class.as_view(
                 model=self.model, form_class=form_class, **kwargs
-            )
+            ),
+            login_required,
+            async_views,
+        )
 
         return re_path(
             r"%s/create/?$" % self.bsct_view_prefix,
@@ -77,28 +172,22 @@ class URLGenerator(object):
             name="%s_create" % self.bsct_view_prefix,
         )
 
-    def get_update_url(self, form_class=None, login_required=False, **kwargs):
+    def get_update_url(self, form_class=None, login_required=False, async_views=False, **kwargs):
         """
         Generate the update URL for the model.
         """
 
-        if os.path.exists(
-            os.path.join(self.template_base_dir, "update.html")
-        ):
-            kwargs["template_name"] = self.model.__name__.lower() + "/update.html"
-
-        form_class = form_class if form_class else self.form_class
+        form_class = form_class if form_class else self._form_class
+        kwargs.setdefault("bsct_view_prefix", self.bsct_view_prefix)
 
-        if login_required:
-            view = login_required_decorator(
-                bsct_views.UpdateView.as_view(
-                    model=self.model, form_class=form_class, **kwargs
-                )
-            )
-        else:
-            view = bsct_views.UpdateView.as_view(
+        view_class = bsct_views.AsyncUpdateView if async_views else bsct_views.UpdateView
+        view = self.make_view(
+            lambda: view_class.as_view(
                 model=self.model, form_class=form_class, **kwargs
-            )
+            ),
+            login_required,
+            async_views,
+        )
 
         return re_path(
             r"%s/update/(?P<pk>\d+)/?$" % self.bsct_view_prefix,
@@ -106,53 +195,142 @@ class URLGenerator(object):
             name="%s_update" % self.bsct_view_prefix,
         )
 
-    def get_list_url(self, login_required=False, **kwargs):
+    def get_list_url(self, login_required=False, async_views=False, **kwargs):
         """
         Generate the list URL for the model.
         """
 
-        if os.path.exists(
-            os.path.join(self.template_base_dir, "list.html")
-        ):
-            kwargs["template_name"] = self.model.__name__.lower() + "/list.html"
-
-        if login_required:
-            view = login_required_decorator(
-                bsct_views.ListView.as_view(model=self.model, **kwargs)
+        kwargs.setdefault("bsct_view_prefix", self.bsct_view_prefix)
+        kwargs.setdefault("select_related", self.select_related)
+        kwargs.setdefault("prefetch_related", self.prefetch_related)
+        kwargs.setdefault("row_cache", self.row_cache)
+        if kwargs["row_cache"]:
+            # Rows display the foreign keys: changing them invalidates rows.
+            rowcache.watch(
+                self.model,
+                [
+                    field.related_model for field in self.model._meta.get_fields()
+                    if field.is_relation and field.concrete and field.related_model
+                ],
             )
-        else:
-            view = bsct_views.ListView.as_view(model=self.model, **kwargs)
+
+        count_strategy = get_count_strategy(kwargs.get("count_strategy"))
+        if isinstance(count_strategy, CachedCount):
+            # Every process serving the list invalidates its counts, even
+            # before it counts the rows itself.
+            count_strategy.watch(self.model)
+
+        view_class = bsct_views.AsyncListView if async_views else bsct_views.ListView
+
+        def build():
+            view = view_class.as_view(model=self.model, **kwargs)
+            if self.conditional:
+                view = self.make_conditional(view, conditional_list_view, async_views)
+            return view
+
+        view = self.make_view(build, login_required, async_views)
 
         return re_path(
-            r"%s(s?)/(list/?)?$" % self.bsct_view_prefix,
+            r"%s(?:s?)/(?:list/?)?$" % self.bsct_view_prefix,
             view,
             name="%s_list" % self.bsct_view_prefix,
         )
 
-    def get_delete_url(self, login_required=False, **kwargs):
+    def get_datatable_url(self, login_required=False, **kwargs):
         """
-        Generate the delete URL for the model.
+        Generate the DataTables server-side processing URL for the model.
         """
 
-        if os.path.exists(
-            os.path.join(self.template_base_dir, "delete.html")
-        ):
-            kwargs["template_name"] = self.model.__name__.lower() + "/delete.html"
+        kwargs.setdefault("bsct_view_prefix", self.bsct_view_prefix)
+        kwargs.setdefault("select_related", self.select_related)
+        kwargs.setdefault("prefetch_related", self.prefetch_related)
 
-        if login_required:
-            view = login_required_decorator(
-                bsct_views.DeleteView.as_view(
-                    model=self.model,
-                    success_url=reverse_lazy("%s_list" % self.bsct_view_prefix),
-                    **kwargs
-                )
-            )
-        else:
-            view = bsct_views.DeleteView.as_view(
+        view = self.make_view(
+            lambda: bsct_views.DataTableView.as_view(model=self.model, **kwargs),
+            login_required,
+        )
+
+        return re_path(
+            r"%s/data/?$" % self.bsct_view_prefix,
+            view,
+            name="%s_data" % self.bsct_view_prefix,
+        )
+
+    def get_export_url(self, login_required=False, **kwargs):
+        """
+        Generate the export URL (CSV, NDJSON or XLSX) for the model.
+        """
+
+        kwargs.setdefault("bsct_view_prefix", self.bsct_view_prefix)
+
+        view = self.make_view(
+            lambda: bsct_views.ExportView.as_view(model=self.model, **kwargs),
+            login_required,
+        )
+
+        return re_path(
+            r"%s/export/(?P<format>csv|ndjson|xlsx)/?$" % self.bsct_view_prefix,
+            view,
+            name="%s_export" % self.bsct_view_prefix,
+        )
+
+    def get_import_url(self, form_class=None, login_required=False, **kwargs):
+        """
+        Generate the import URL (CSV or NDJSON) for the model, whose rows are
+        validated with the form of the create view.
+        """
+
+        form_class = form_class if form_class else self._form_class
+
+        view = self.make_view(
+            lambda: bsct_views.ImportView.as_view(
+                model=self.model, row_form_class=form_class, **kwargs
+            ),
+            login_required,
+        )
+
+        return re_path(
+            r"%s/import/?$" % self.bsct_view_prefix,
+            view,
+            name="%s_import" % self.bsct_view_prefix,
+        )
+
+    def get_autocomplete_url(self, form_class=None, login_required=False, **kwargs):
+        """
+        Generate the URL searching the choices of the relation fields of the
+        create and update form, for the autocomplete widget.
+        """
+
+        form_class = form_class if form_class else self._form_class
+
+        view = self.make_view(
+            lambda: bsct_views.AutocompleteView.as_view(
+                model=self.model, form_class=form_class, **kwargs
+            ),
+            login_required,
+        )
+
+        return re_path(
+            r"%s/autocomplete/(?P<field>\w+)/?$" % self.bsct_view_prefix,
+            view,
+            name="%s_autocomplete" % self.bsct_view_prefix,
+        )
+
+    def get_delete_url(self, login_required=False, async_views=False, **kwargs):
+        """
+        Generate the delete URL for the model.
+        """
+
+        view_class = bsct_views.AsyncDeleteView if async_views else bsct_views.DeleteView
+        view = self.make_view(
+            lambda: view_class.as_view(
                 model=self.model,
                 success_url=reverse_lazy("%s_list" % self.bsct_view_prefix),
                 **kwargs
-            )
+            ),
+            login_required,
+            async_views,
+        )
 
         return re_path(
             r"%s/delete/(?P<pk>\d+)/?$" % self.bsct_view_prefix,
@@ -160,22 +338,39 @@ class URLGenerator(object):
             name="%s_delete" % self.bsct_view_prefix,
         )
 
-    def get_detail_url(self, login_required=False, **kwargs):
+    def get_bulk_delete_url(self, login_required=False, **kwargs):
+        """
+        Generate the URL deleting the rows selected in the list.
+        """
+
+        view = self.make_view(
+            lambda: bsct_views.BulkDeleteView.as_view(model=self.model, **kwargs),
+            login_required,
+        )
+
+        return re_path(
+            r"%s/delete/?$" % self.bsct_view_prefix,
+            view,
+            name="%s_bulk_delete" % self.bsct_view_prefix,
+        )
+
+    def get_detail_url(self, login_required=False, async_views=False, **kwargs):
         """
         Generate the detail URL for the model.
         """
 
-        if os.path.exists(
-            os.path.join(self.template_base_dir, "detail.html")
-        ):
-            kwargs["template_name"] = self.model.__name__.lower() + "/detail.html"
+        kwargs.setdefault("select_related", self.select_related)
+        kwargs.setdefault("prefetch_related", self.prefetch_related)
 
-        if login_required:
-            view = login_required_decorator(
-                bsct_views.DetailView.as_view(model=self.model, **kwargs)
-            )
-        else:
-            view = bsct_views.DetailView.as_view(model=self.model, **kwargs)
+        view_class = bsct_views.AsyncDetailView if async_views else bsct_views.DetailView
+
+        def build():
+            view = view_class.as_view(model=self.model, **kwargs)
+            if self.conditional:
+                view = self.make_conditional(view, conditional_detail_view, async_views)
+            return view
+
+        view = self.make_view(build, login_required, async_views)
 
         return re_path(
             r"%s/(?P<pk>\d+)/?$" % self.bsct_view_prefix,
@@ -183,31 +378,68 @@ class URLGenerator(object):
             name="%s_detail" % self.bsct_view_prefix,
         )
 
-    def get_urlpatterns(self, crud_types="crudl", paginate_by=10, login_required=False):
+    def get_urlpatterns(
+        self,
+        crud_types="crudl",
+        paginate_by=10,
+        login_required=False,
+        keyset_pagination=False,
+        count_strategy=None,
+        streaming=False,
+        async_views=False,
+    ):
         """
         Generate the entire set URL for the model and return as a patterns
         object.
+        With keyset_pagination, the list is paginated with cursors instead of
+        page numbers (no OFFSET nor COUNT(*), see bsct.pagination).
+        count_strategy sets how the page number paginator counts the rows:
+        "exact" (default), "cached" or "estimated".
+        With streaming, an unpaginated list is sent as it is rendered.
+        With async_views, the create, detail, update, list and delete views
+        are asynchronous (AsyncListView, etc.), for ASGI servers.
         Specific CRUD types may be in the string argument crud_types specified, where:
             'c' - Refers to the Create CRUD type
             'r' - Refers to the Read/Detail CRUD type
             'u' - Refers to the Update/Edit CRUD type
-            'd' - Refers to the Delete CRUD type
+            ('c' and 'u' also register the autocomplete of the relation
+            fields of the form)
+            'd' - Refers to the Delete CRUD type, and the deletion of the
+                  rows selected in the list
             'l' - Refers to the List CRUD type
+            'j' - Refers to the DataTables server-side endpoint of the list,
+                  used by the list when it is not paginated
+            'e' - Refers to the export of the list (CSV, NDJSON, XLSX)
+            'i' - Refers to the import of a file (CSV, NDJSON)
         """
         urlpatterns = []
         if "c" in crud_types:
-            urlpatterns.append(self.get_create_url(login_required=login_required))
+            urlpatterns.append(self.get_create_url(login_required=login_required, async_views=async_views))
         if "r" in crud_types:
-            urlpatterns.append(self.get_detail_url(login_required=login_required))
+            urlpatterns.append(self.get_detail_url(login_required=login_required, async_views=async_views))
         if "u" in crud_types:
-            urlpatterns.append(self.get_update_url(login_required=login_required))
+            urlpatterns.append(self.get_update_url(login_required=login_required, async_views=async_views))
+        if "c" in crud_types or "u" in crud_types:
+            urlpatterns.append(self.get_autocomplete_url(login_required=login_required))
         if "l" in crud_types:
             urlpatterns.append(
                 self.get_list_url(
-                    paginate_by=paginate_by, login_required=login_required
+                    paginate_by=paginate_by,
+                    login_required=login_required,
+                    keyset_pagination=keyset_pagination,
+                    count_strategy=count_strategy,
+                    streaming=streaming,
+                    async_views=async_views,
                 )
             )
+        if "j" in crud_types:
+            urlpatterns.append(self.get_datatable_url(login_required=login_required))
+        if "e" in crud_types:
+            urlpatterns.append(self.get_export_url(login_required=login_required))
+        if "i" in crud_types:
+            urlpatterns.append(self.get_import_url(login_required=login_required))
         if "d" in crud_types:
-            urlpatterns.append(self.get_delete_url(login_required=login_required))
+            urlpatterns.append(self.get_delete_url(login_required=login_required, async_views=async_views))
+            urlpatterns.append(self.get_bulk_delete_url(login_required=login_required))
 
         return urlpatterns
@@ -2,13 +2,37 @@
 These views do nothing other than provide members of the 'plain' BSCT template
 set as default template names.
 """
+import json
 import logging
+from itertools import islice
 
+from asgiref.sync import sync_to_async
+from django import forms
 from django.conf import settings
-from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import BadRequest, ValidationError
+from django.db import models
+from django.db.models import Q
+from django.http import (Http404, HttpResponseRedirect, JsonResponse,
+                         StreamingHttpResponse)
+from django.template.loader import select_template
+from django.urls import NoReverseMatch, reverse
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views import generic
 
-from .templatetags.bscttags import get_headers
+from .autocomplete import AUTOCOMPLETE_THRESHOLD, search, set_autocomplete_widgets
+from .columns import RowActions, get_column_plan
+from .deletion import (acollect_cascade, collect_cascade, collect_queryset_cascade,
+                       count_by_model, delete_by_batches)
+from .export import EXPORT_FORMATS, ndjson_stream
+from .filters import get_filter_schema
+from .forms import ImportForm, get_model_form
+from .imports import IMPORT_FORMATS, Importer
+from .inheritance import adowncast, downcast, get_hierarchy, get_row_url
+from .ordering import get_default_ordering, get_sort_links, parse_ordering, with_tiebreaker
+from .overrides import find_template_override
+from .pagination import CountStrategyPaginator, KeysetPaginator
+from .rowcache import RowCachePage, get_variant
+from .timing import TimingMixin, evaluate, timer
 
 # Get the logger name from the user's settings.
 logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
@@ -16,12 +40,113 @@ logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
 logger = logging.getLogger(logger_name)
 
 
-class CreateView(generic.CreateView):
+# Markers surrounding the rows of bsct/plain/list.html.
+ROWS_START = "<!-- BSCT_LIST_ITEMS_ROWS -->"
+ROWS_END = "<!-- /BSCT_LIST_ITEMS_ROWS -->"
+
+
+class TemplateOverrideMixin(object):
+    """
+    Renders the model's override of the page (e.g. ``widget/list.html``) when
+    there is one, see bsct.overrides.
+    """
+
+    override_page = None
+
+    def get_template_names(self):
+        # A template_name given to as_view() wins over the overrides.
+        if self.override_page and "template_name" not in self.__dict__:
+            override = find_template_override(self.model, self.override_page)
+            if override:
+                return [override]
+        return super().get_template_names()
+
+
+class ModelFormMixin(object):
+    """
+    Uses the form of the model's allowed fields, built once per model, when
+    the view has no form_class nor fields.
+
+    The relation fields with more than ``autocomplete_threshold`` choices get
+    the autocomplete widget (see bsct.autocomplete), None disables it.
+    """
+
+    # Prefix of the URL names of the model, defaults to the lower case name.
+    bsct_view_prefix = None
+    autocomplete_threshold = AUTOCOMPLETE_THRESHOLD
+
+    def get_form_class(self):
+        if self.form_class is None and self.fields is None:
+            return get_model_form(self.model)
+        return super().get_form_class()
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        if self.autocomplete_threshold is not None:
+            set_autocomplete_widgets(
+                form,
+                self.bsct_view_prefix or self.model.__name__.lower(),
+                self.autocomplete_threshold,
+            )
+        return form
+
+
+class CreateView(TimingMixin, TemplateOverrideMixin, ModelFormMixin, generic.CreateView):
     template_name = "bsct/plain/form.html"
+    override_page = "create.html"
 
 
-class UpdateView(generic.UpdateView):
+class UpdateView(TimingMixin, TemplateOverrideMixin, ModelFormMixin, generic.UpdateView):
     template_name = "bsct/plain/form.html"
+    override_page = "update.html"
+
+
+class AutocompleteView(TimingMixin, generic.View):
+    """
+    Searches the objects a relation field of the model's form can take, for
+    the autocomplete widget (see bsct.autocomplete).
+
+    Returns ``{"results": [{"id": ..., "text": ...}], "next": cursor}``, the
+    next page being fetched with ``?cursor=``.
+    """
+
+    model = None
+    form_class = None
+    page_size = 20
+    search_kwarg = "q"
+    cursor_kwarg = "cursor"
+    # Prefix search, case insensitive: on PostgreSQL, an index on
+    # UPPER(field) serves it.
+    lookup = "istartswith"
+
+    def get_form_field(self, name):
+        """
+        Returns the ModelChoiceField of the form, whose queryset holds the
+        valid choices.
+        """
+        form_class = self.form_class or get_model_form(self.model)
+        field = form_class().fields.get(name)
+        if not isinstance(field, forms.ModelChoiceField):
+            raise Http404("%s is not a relation field of the form." % name)
+        return field
+
+    def get(self, request, field):
+        form_field = self.get_form_field(field)
+        queryset, ordering = search(
+            form_field.queryset, request.GET.get(self.search_kwarg, "").strip(), self.lookup
+        )
+        page = KeysetPaginator(queryset, self.page_size, ordering).page(
+            request.GET.get(self.cursor_kwarg)
+        )
+        return JsonResponse(
+            {
+                "results": [
+                    {"id": form_field.prepare_value(obj), "text": form_field.label_from_instance(obj)}
+                    for obj in page
+                ],
+                "next": page.next_cursor,
+            }
+        )
 
 
 def authorized_fields(requested_fields, model):
@@ -34,73 +159,847 @@ def authorized_fields(requested_fields, model):
     Returns:
         list: List of authorized fields.
     """
+    schema = get_filter_schema(model)
+    return [field for field in requested_fields if schema.resolve(field) is not None]
 
-    # Get fields allowed with get_allowed_fields() classmethod.
-    model_authorized_fields = model.get_allowed_fields()
-    if model_authorized_fields == "__all__":
-        model_authorized_fields = model._meta.get_fields()
-
-    authorized_fields = []
-    for field in requested_fields:
-        if field in model_authorized_fields:
-            # If the field is in the model's get_allowed_fields()
-            authorized_fields.append(field)
-
-        elif len(field.split("__")) > 1:
-            # If the field is a related field with a field specified (e.g. 'tree__name')
-            if field.split("__")[0] in model_authorized_fields:
-                # If the related field is in the model's get_allowed_fields() (e.g. 'tree')
-                try:
-                    model._meta.get_field(
-                        field.split("__")[0]
-                    ).related_model._meta.get_field(field.split("__")[1]).name
-                    authorized_fields.append(field)  # ?
-                except FieldDoesNotExist:
-                    pass
-                except Exception as exception:
-                    logger.error(
-                        "An error occured while checking if %s exists : %s",
-                        field.split("__"),
-                        exception,
-                    )
 
-    return authorized_fields
+class RelatedLookupsMixin(object):
+    """
+    Joins or prefetches the relations the view displays.
+
+    By default the lookups are derived from the model's column plan. Setting
+    ``select_related`` or ``prefetch_related`` to a list of lookups overrides
+    the derived ones, setting them to False disables them.
+    """
+
+    select_related = None
+    prefetch_related = None
+
+    def apply_related_lookups(self, queryset, select_related, prefetch_related):
+        """
+        Applies the derived lookups to the queryset, unless overridden.
+        """
+        if self.select_related is not None:
+            select_related = self.select_related or []
+        if self.prefetch_related is not None:
+            prefetch_related = self.prefetch_related or []
 
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
 
-class ListView(generic.ListView):
+
+class ListView(TimingMixin, TemplateOverrideMixin, RelatedLookupsMixin, generic.ListView):
     template_name = "bsct/plain/list.html"
+    override_page = "list.html"
+
+    # Prefix of the URL names of the model, defaults to the lower case name.
+    bsct_view_prefix = None
+
+    # Paginate by seeking on (ordering column, pk) with cursor tokens instead
+    # of offsets and a total count.
+    keyset_pagination = False
+    cursor_kwarg = "cursor"
+
+    # Send unpaginated lists with a StreamingHttpResponse, rendering the rows
+    # by chunks of stream_chunk_size.
+    streaming = False
+    stream_chunk_size = 500
+
+    # Cache the rendered rows (see bsct.rowcache), for row_cache_timeout
+    # seconds.
+    row_cache = False
+    row_cache_timeout = 300
+
+    # How the offset paginator counts the rows: "exact", "cached",
+    # "estimated" or a strategy instance (see bsct.pagination).
+    count_strategy = None
+
+    # What to do with filters on columns without index: "allow", "log" or
+    # "reject" (see bsct.filters).
+    unindexed_filters = "allow"
+
+    # Sort the list by the columns given in this parameter (?o=-price,name),
+    # see bsct.ordering. unindexed_ordering works like unindexed_filters:
+    # sorts on columns without index are logged, "allow" opts out.
+    ordering_kwarg = "o"
+    unindexed_ordering = "log"
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return CountStrategyPaginator(
+            queryset,
+            per_page,
+            count_strategy=self.count_strategy,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            **kwargs
+        )
+
+    def get_list_columns(self):
+        """
+        Returns the columns of the table, in display order: the ones of the
+        model and of its multi-table inheritance subclasses.
+        """
+        return get_hierarchy(self.model).list_columns
+
+    def downcast(self, object_list):
+        """
+        Returns the rows of the page as instances of their most derived
+        class (see bsct.inheritance).
+        """
+        return downcast(object_list, self.model)
+
+    def reverse_action(self, action, **kwargs):
+        """
+        Returns the URL of an action of the model, or None if it is not
+        registered.
+        """
+        prefix = self.bsct_view_prefix or self.model.__name__.lower()
+        try:
+            return reverse("%s_%s" % (prefix, action), kwargs=kwargs or None)
+        except NoReverseMatch:
+            return None
+
+    def reverse_with_filters(self, action, **kwargs):
+        """
+        Returns the URL of an action of the model with the current filters, or
+        None if it is not registered.
+        """
+        url = self.reverse_action(action, **kwargs)
+        if url and self.request.GET:
+            url += "?" + self.request.GET.urlencode()
+        return url
+
+    def get_datatable_url(self):
+        """
+        Returns the URL of the DataTables server-side endpoint of the model,
+        with the current filters, or None if it is not registered.
+        """
+        return self.reverse_with_filters("data")
+
+    def get_bulk_delete_url(self):
+        """
+        Returns the URL deleting the selected rows, or None if it is not
+        registered.
+        """
+        return self.reverse_action("bulk_delete")
+
+    def get_export_urls(self):
+        """
+        Returns the export URLs by format, with the current filters.
+        """
+        urls = {}
+        for export_format in EXPORT_FORMATS:
+            url = self.reverse_with_filters("export", format=export_format)
+            if url is None:
+                return {}
+            urls[export_format] = url
+        return urls
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_pagination:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return (paginator, page, page.object_list, page.has_other_pages())
 
     def get_context_data(self, **kwargs):
         # Add headers for the table
-        if self.model.__subclasses__():
-            # The model has subclasses if it inherits from PolymorphicModel.
-            headers = {}
-            for subclass in self.model.__subclasses__():
-                headers.update(get_headers(subclass))
-        else:
-            headers = get_headers(self.model)
+        columns = self.get_list_columns()
+        headers = {column.key: column.label for column in columns}
         context = super(ListView, self).get_context_data(**kwargs)
+        datatable_url = None
+        if context.get("is_paginated"):
+            evaluate(context["object_list"])
+        else:
+            datatable_url = self.get_datatable_url()
+        # The rows are rendered here, unless DataTables fetches them or they
+        # are streamed.
+        renders_rows = not (
+            datatable_url or (self.streaming and not context.get("is_paginated"))
+        )
+        if get_hierarchy(self.model).subclasses and renders_rows:
+            # Streamed lists are downcast by chunks.
+            object_list = self.downcast(context["object_list"])
+            context["object_list"] = object_list
+            context_object_name = self.get_context_object_name(self.object_list)
+            if context_object_name:
+                context[context_object_name] = object_list
         context.update({"headers": headers})
         context.update({"model": self.model._meta.verbose_name_plural})
+        if self.keyset_pagination:
+            context.update(
+                {
+                    "paginator_template": "bsct/plain/keyset_paginator.html",
+                    "cursor_kwarg": self.cursor_kwarg,
+                }
+            )
+        context.update(
+            {
+                "export_urls": self.get_export_urls(),
+                "import_url": self.reverse_action("import"),
+                "sort_links": {},
+            }
+        )
+        if self.row_cache and renders_rows:
+            context.update(
+                {
+                    "bsct_row_cache": RowCachePage(
+                        self.model,
+                        context["object_list"],
+                        get_variant(self.get_template_names(), headers),
+                        self.row_cache_timeout,
+                    )
+                }
+            )
+        if context.get("is_paginated"):
+            # Unpaginated lists are sorted by DataTables.
+            context.update(
+                {
+                    "sort_links": get_sort_links(
+                        self.model,
+                        columns,
+                        self.request.GET,
+                        self.ordering_kwarg,
+                        exclude=[self.page_kwarg, self.cursor_kwarg],
+                    )
+                }
+            )
+        else:
+            # Rows are fetched by DataTables if the endpoint is registered,
+            # and the rows selected in DataTables can be deleted.
+            context.update(
+                {
+                    "datatable_url": datatable_url,
+                    "bulk_delete_url": self.get_bulk_delete_url(),
+                }
+            )
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        if (
+            not self.streaming
+            or context.get("is_paginated")
+            or context.get("datatable_url")
+        ):
+            response = super().render_to_response(context, **response_kwargs)
+            if context.get("bsct_row_cache"):
+                # Store the rows rendered on a cache miss.
+                response.add_post_render_callback(context["bsct_row_cache"].flush)
+            return response
+
+        response_kwargs.setdefault("content_type", self.content_type)
+        return StreamingHttpResponse(self.stream_rows(context), **response_kwargs)
+
+    def stream_rows(self, context):
+        """
+        Yields the page: the part before the rows, the rows rendered by chunks
+        and the part after the rows.
+
+        Each chunk is rendered with the full template and cut around the
+        markers surrounding the BSCT_LIST_ITEMS_ROWS block, so the block
+        overrides of the model's template apply.
+        """
+        template = select_template(self.get_template_names())
+        queryset = context["object_list"]
+        names = ["object_list"]
+        context_object_name = self.get_context_object_name(queryset)
+        if context_object_name:
+            names.append(context_object_name)
+
+        def render(object_list):
+            context.update({name: object_list for name in names})
+            return template.render(context, self.request)
+
+        head, start, rest = render(queryset.none()).partition(ROWS_START)
+        if not start:
+            # The rows markers are not in the template: no streaming.
+            yield render(queryset)
+            return
+        tail = rest.partition(ROWS_END)[2]
+
+        yield head
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        while True:
+            chunk = downcast(islice(rows, self.stream_chunk_size), self.model)
+            if not chunk:
+                break
+            yield render(chunk).partition(ROWS_START)[2].partition(ROWS_END)[0]
+        yield tail
+
+    def get_ordering(self):
+        """
+        Returns the requested ordering, or the default one, pk last.
+        """
+        ordering = parse_ordering(
+            self.model,
+            self.request.GET.get(self.ordering_kwarg, ""),
+            self.unindexed_ordering,
+        )
+        if not ordering:
+            ordering = self.ordering or get_default_ordering(self.model)
+            if isinstance(ordering, str):
+                ordering = [ordering]
+        return with_tiebreaker(self.model, ordering)
+
     def get_queryset(self):
-        allowed_fields = authorized_fields(
-            [key for key in self.request.GET], self.model
-        )
-        params = {key: self.request.GET[key] for key in allowed_fields}
-        # If the model has 'date_added', ordering by 'date_added' will be done.
-        # If not, ordering by '-pk' will be done.
-        if "date_added" in self.model._meta.get_fields():
-            ordering = "-date_added"
+        params = get_filter_schema(self.model).parse(
+            self.request.GET, self.unindexed_filters
+        )
+        queryset = self.apply_related_lookups(
+            super().get_queryset(),
+            *get_hierarchy(self.model).lookups[self.model]
+        )
+        # The ordering is applied by the parent, see get_ordering().
+        return queryset.filter(**params)
+
+
+class DataTableView(ListView):
+    """
+    Serves the rows of the list view following the DataTables server-side
+    processing protocol (https://datatables.net/manual/server-side).
+
+    Filters are the ones of the list view; searching, ordering and paging are
+    done in SQL so the response is bounded by the page length.
+    """
+
+    # Upper bound of the page length, also used when DataTables asks for all
+    # the rows (length=-1).
+    max_length = 1000
+
+    def get_int_param(self, name, default):
+        """
+        Returns the GET parameter as an integer, or default if invalid.
+        """
+        try:
+            return int(self.request.GET.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+    def is_model_column(self, column):
+        """
+        Returns True if the column is a field of the model, not of one of its
+        subclasses, so the queryset can be searched and sorted on it.
+        """
+        return column.field.concrete and issubclass(self.model, column.field.model)
+
+    def get_search_query(self, columns, value):
+        """
+        Returns a Q object matching the search value in the given columns.
+        """
+        query = Q()
+        for column in columns:
+            if (
+                isinstance(column.field, (models.CharField, models.TextField))
+                and self.is_model_column(column)
+            ):
+                query |= Q(**{"%s__icontains" % column.name: value})
+        return query
+
+    def search(self, queryset, columns):
+        """
+        Applies the global and per-column searches to the queryset.
+        """
+        value = self.request.GET.get("search[value]", "").strip()
+        if value:
+            queryset = queryset.filter(self.get_search_query(columns, value))
+
+        for index, column in enumerate(columns):
+            value = self.request.GET.get("columns[%d][search][value]" % index, "").strip()
+            if value:
+                queryset = queryset.filter(self.get_search_query([column], value))
+
+        return queryset
+
+    def order(self, queryset, columns):
+        """
+        Applies the requested ordering to the queryset, pk last for stability.
+        """
+        ordering = []
+        index = 0
+        while "order[%d][column]" % index in self.request.GET:
+            column = self.get_int_param("order[%d][column]" % index, -1)
+            if 0 <= column < len(columns) and self.is_model_column(columns[column]):
+                descending = self.request.GET.get("order[%d][dir]" % index) == "desc"
+                ordering.append(("-" if descending else "") + columns[column].name)
+            index += 1
+
+        if not ordering:
+            return queryset
+        return queryset.order_by(*ordering, "pk")
+
+    def get_row(self, instance, columns):
+        """
+        Returns the cells of a row: the displayed columns and the actions.
+        """
+        row = []
+        for column in columns:
+            try:
+                row.append(str(column.html(instance)))
+            except Exception:
+                row.append("")
+        url = get_row_url(instance, self.model, self.unresolved_urls)
+        row.append(str(self.row_actions.html(url)))
+        return row
+
+    def get(self, request, *args, **kwargs):
+        columns = self.get_list_columns()
+        queryset = self.get_queryset()
+
+        records_total = queryset.count()
+        filtered = self.search(queryset, columns)
+        if filtered is queryset:
+            records_filtered = records_total
         else:
-            ordering = "id"
-        return super().get_queryset().order_by(ordering).filter(**params)
+            records_filtered = filtered.count()
 
+        start = max(self.get_int_param("start", 0), 0)
+        length = self.get_int_param("length", 10)
+        if length < 0 or length > self.max_length:
+            length = self.max_length
+        page = self.downcast(self.order(filtered, columns)[start:start + length])
+        self.row_actions = RowActions()
+        self.unresolved_urls = set()
 
-class DetailView(generic.DetailView):
+        return JsonResponse(
+            {
+                "draw": self.get_int_param("draw", 0),
+                "recordsTotal": records_total,
+                "recordsFiltered": records_filtered,
+                "data": [self.get_row(instance, columns) for instance in page],
+                # Row ids, for the selection of the rows to delete.
+                "ids": [str(instance.pk) for instance in page],
+            }
+        )
+
+
+class ExportView(ListView):
+    """
+    Streams the filtered and ordered rows of the list view as CSV, NDJSON or
+    XLSX (see bsct.export).
+
+    Values are read with values_list() by chunks of ``chunk_size``: foreign
+    keys are exported as their pk, choices as their displayed value.
+    """
+
+    chunk_size = 2000
+
+    def get_export_columns(self):
+        """
+        Returns the list columns stored in the model's table.
+        """
+        return [
+            column for column in get_column_plan(self.model).list_columns
+            if column.field.concrete and not column.field.many_to_many
+        ]
+
+    def iter_chunks(self, queryset, columns):
+        """
+        Yields lists of rows of the exported values.
+        """
+        choices = [dict(column.field.flatchoices) or None for column in columns]
+        rows = queryset.values_list(
+            *[column.field.attname for column in columns]
+        ).iterator(chunk_size=self.chunk_size)
+
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            if any(choices):
+                chunk = [
+                    [
+                        mapping.get(value, value) if mapping else value
+                        for mapping, value in zip(choices, row)
+                    ]
+                    for row in chunk
+                ]
+            yield chunk
+
+    def get(self, request, *args, **kwargs):
+        try:
+            writer, content_type, extension = EXPORT_FORMATS[kwargs.get("format", "csv")]
+        except KeyError:
+            raise Http404("Unknown export format.")
+
+        columns = self.get_export_columns()
+        # Related objects are not loaded: values_list() reads the pk.
+        queryset = self.get_queryset().select_related(None).prefetch_related(None)
+
+        if writer is ndjson_stream:
+            header = [column.name for column in columns]
+        else:
+            header = [str(column.label) for column in columns]
+
+        response = StreamingHttpResponse(
+            writer(header, self.iter_chunks(queryset, columns)),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = 'attachment; filename="%s.%s"' % (
+            self.model._meta.model_name,
+            extension,
+        )
+        return response
+
+
+class ImportView(TimingMixin, TemplateOverrideMixin, generic.FormView):
+    """
+    Creates objects from an uploaded CSV or NDJSON file (see bsct.imports).
+
+    Each row is validated with ``row_form_class`` (the form of the create
+    view) and the valid rows are created by batches of ``batch_size``. The
+    rows in error are reported, up to ``max_errors``, without stopping the
+    import. The result is rendered with the upload form, or returned as JSON
+    to clients asking for JSON only.
+    """
+
+    model = None
+    row_form_class = None
+    form_class = ImportForm
+    template_name = "bsct/plain/import.html"
+    override_page = "import.html"
+
+    batch_size = 500
+    max_errors = 100
+    encoding = "utf-8-sig"
+
+    def get_row_form_class(self):
+        return self.row_form_class or get_model_form(self.model)
+
+    def wants_json(self):
+        return self.request.accepts("application/json") and not self.request.accepts("text/html")
+
+    def get_context_data(self, **kwargs):
+        kwargs.setdefault("model", self.model._meta.verbose_name_plural)
+        return super().get_context_data(**kwargs)
+
+    def form_valid(self, form):
+        reader = IMPORT_FORMATS[form.cleaned_data["format"]][0]
+        importer = Importer(self.get_row_form_class(), self.batch_size, self.max_errors)
+        result = importer.run(
+            reader(form.cleaned_data["file"], self.encoding),
+            split_multiple=form.cleaned_data["format"] == "csv",
+        )
+        logger.info(
+            "Import of %s: %d rows, %d created, %d errors.",
+            self.model.__name__,
+            result.rows,
+            result.created,
+            result.error_count,
+        )
+
+        if self.wants_json():
+            return JsonResponse(result.as_dict())
+        return self.render_to_response(self.get_context_data(form=form, result=result))
+
+    def form_invalid(self, form):
+        if self.wants_json():
+            return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+        return super().form_invalid(form)
+
+
+class DetailView(TimingMixin, TemplateOverrideMixin, RelatedLookupsMixin, generic.DetailView):
     template_name = "bsct/plain/detail.html"
+    override_page = "detail.html"
+
+    def get_queryset(self):
+        plan = get_column_plan(self.model)
+        return self.apply_related_lookups(
+            super().get_queryset(),
+            plan.detail_select_related,
+            plan.detail_prefetch_related,
+        )
 
 
-class DeleteView(generic.DeleteView):
+class DeleteView(TimingMixin, TemplateOverrideMixin, generic.DeleteView):
     template_name = "bsct/plain/confirm_delete.html"
+    override_page = "delete.html"
+
+    # Relation levels followed and objects listed per relation by the
+    # cascade preview of the confirmation page.
+    cascade_depth = 2
+    cascade_limit = 10
+
+    def get_context_data(self, **kwargs):
+        context = super(DeleteView, self).get_context_data(**kwargs)
+        cascade = context.get("cascade")
+        if cascade is None:
+            # Not collected beforehand by AsyncDeleteView.
+            cascade = collect_cascade(self.object, self.cascade_depth, self.cascade_limit)
+        context.update({"cascade": cascade})
+        # (name, count) pairs: in a template, cascade_counts.items would be
+        # the count of a model named "items".
+        context.update({"cascade_counts": list(count_by_model(cascade).items())})
+        return context
+
+
+class BulkDeleteView(TimingMixin, TemplateOverrideMixin, generic.TemplateView):
+    """
+    Deletes the rows selected in the list, whose pks are sent in ``selected``
+    as a JSON list or separated by commas.
+
+    Without ``confirm``, the page previews the selected objects and the
+    objects deleted in cascade with all of them. With ``confirm`` (POST),
+    they are deleted by batches in one transaction (see bsct.deletion) and
+    the response is the JSON {"deleted": total, "counts": {label: count}},
+    or a redirection to ``next`` when the form sends it.
+    """
+
+    model = None
+    template_name = "bsct/plain/confirm_bulk_delete.html"
+    override_page = "bulk_delete.html"
+
+    selected_kwarg = "selected"
+    max_selected = 10000
+    batch_size = 500
+
+    # See DeleteView.
+    cascade_depth = 2
+    cascade_limit = 10
+
+    def get_selected(self, data):
+        """
+        Returns the selected pks, or raises BadRequest if one is invalid.
+        """
+        values = []
+        for value in data.getlist(self.selected_kwarg):
+            try:
+                parsed = json.loads(value)
+            except ValueError:
+                parsed = value.split(",")
+            values.extend(parsed if isinstance(parsed, list) else [parsed])
+
+        pk_field = self.model._meta.pk
+        pks = {}
+        for value in values:
+            if value is None or value == "":
+                continue
+            try:
+                pks[pk_field.to_python(value)] = None
+            except ValidationError:
+                raise BadRequest("Invalid pk: %r" % (value,))
+        if len(pks) > self.max_selected:
+            raise BadRequest("More than %d objects selected." % self.max_selected)
+        return list(pks)
+
+    def get_queryset(self, pks):
+        return self.model._default_manager.filter(pk__in=pks)
+
+    def get_next_url(self, data):
+        """
+        Returns the URL to go back to, if it is safe.
+        """
+        url = data.get("next", "")
+        if url and url_has_allowed_host_and_scheme(
+            url,
+            allowed_hosts={self.request.get_host()},
+            require_https=self.request.is_secure(),
+        ):
+            return url
+        return None
+
+    def preview(self, data):
+        pks = self.get_selected(data)
+        queryset = self.get_queryset(pks)
+        count = queryset.count()
+        cascade = collect_queryset_cascade(queryset, self.cascade_depth, self.cascade_limit)
+
+        # The selected objects first, then the ones deleted in cascade.
+        counts = {self.model._meta.verbose_name_plural: count}
+        for name, cascade_count in count_by_model(cascade).items():
+            counts[name] = counts.get(name, 0) + cascade_count
+
+        context = self.get_context_data(
+            model=self.model._meta.verbose_name_plural,
+            objects=list(queryset.order_by("pk")[:self.cascade_limit]),
+            count=count,
+            remaining=max(count - self.cascade_limit, 0),
+            selected=",".join(str(pk) for pk in pks),
+            next=self.get_next_url(data),
+            cascade=cascade,
+            cascade_counts=list(counts.items()),
+        )
+        return self.render_to_response(context)
+
+    def get(self, request, *args, **kwargs):
+        return self.preview(request.GET)
+
+    def post(self, request, *args, **kwargs):
+        if "confirm" not in request.POST:
+            return self.preview(request.POST)
+
+        pks = self.get_selected(request.POST)
+        deleted, counts = delete_by_batches(self.get_queryset(pks), self.batch_size)
+
+        next_url = self.get_next_url(request.POST)
+        if next_url:
+            return HttpResponseRedirect(next_url)
+        return JsonResponse({"deleted": deleted, "counts": counts})
+
+
+# Asynchronous views, served without a thread per request under ASGI: the
+# objects are fetched with the asynchronous ORM before the template is
+# rendered, so rendering does not query the database (columns are loaded
+# with select_related / prefetch_related, see RelatedLookupsMixin). Form
+# validation and saving have no asynchronous API and run in a thread.
+
+
+async def afetch(queryset):
+    """
+    Evaluates a queryset asynchronously: iterating it afterwards does not
+    query.
+    """
+    async for _ in queryset:
+        # Iterating fetches all the rows into the result cache.
+        break
+
+
+class AsyncSingleObjectMixin(object):
+    async def aget_object(self, queryset=None):
+        """
+        Returns the object designated by the URL, like get_object().
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            queryset = queryset.filter(**{self.get_slug_field(): slug})
+        if pk is None and slug is None:
+            raise AttributeError(
+                "Generic detail view %s must be called with either an object "
+                "pk or a slug in the URLconf." % self.__class__.__name__
+            )
+        with timer("orm"):
+            try:
+                return await queryset.aget()
+            except queryset.model.DoesNotExist:
+                raise Http404(
+                    "No %s found matching the query" % queryset.model._meta.verbose_name
+                )
+
+
+class AsyncListView(ListView):
+    # The rows of the page, downcast asynchronously by get().
+    downcast_rows = None
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        if not self.get_allow_empty() and not await self.object_list.aexists():
+            raise Http404("Empty list and '%s.allow_empty' is False." % self.__class__.__name__)
+
+        page_size = self.get_paginate_by(self.object_list)
+        if page_size:
+            self.pagination = await self.apaginate_queryset(self.object_list, page_size)
+            self.downcast_rows = await adowncast(self.pagination[2], self.model)
+        elif not self.streaming and self.get_datatable_url() is None:
+            # Streamed lists are fetched by chunks, DataTables fetches its
+            # rows from the data view.
+            await afetch(self.object_list)
+            self.downcast_rows = await adowncast(self.object_list, self.model)
+
+        context = self.get_context_data()
+        return self.render_to_response(context)
+
+    async def apaginate_queryset(self, queryset, page_size):
+        """
+        Returns the pagination of paginate_queryset(), counted and fetched
+        asynchronously.
+        """
+        if self.keyset_pagination:
+            paginator = KeysetPaginator(queryset, page_size)
+            page = await paginator.apage(self.request.GET.get(self.cursor_kwarg))
+            return (paginator, page, page.object_list, page.has_other_pages())
+
+        self.counted_paginator = super().get_paginator(
+            queryset,
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        await self.counted_paginator.acount()
+        pagination = super().paginate_queryset(queryset, page_size)
+        await afetch(pagination[2])
+        return pagination
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        # Counted by apaginate_queryset().
+        return self.counted_paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.pagination
+
+    def downcast(self, object_list):
+        if self.downcast_rows is None:
+            return object_list
+        return self.downcast_rows
+
+
+class AsyncDetailView(AsyncSingleObjectMixin, DetailView):
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+class AsyncDeleteView(AsyncSingleObjectMixin, DeleteView):
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(
+            object=self.object,
+            cascade=await acollect_cascade(self.object, self.cascade_depth, self.cascade_limit),
+        )
+        return self.render_to_response(context)
+
+    async def post(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        form = self.get_form()
+        if form.is_valid():
+            success_url = self.get_success_url()
+            await self.object.adelete()
+            return HttpResponseRedirect(success_url)
+        context = self.get_context_data(
+            form=form,
+            cascade=await acollect_cascade(self.object, self.cascade_depth, self.cascade_limit),
+        )
+        return self.render_to_response(context)
+
+    async def delete(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        success_url = self.get_success_url()
+        await self.object.adelete()
+        return HttpResponseRedirect(success_url)
+
+
+class AsyncFormMixin(object):
+    # A ModelForm reads the many-to-many relations of its instance when it is
+    # built: forms are built in a thread too.
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_form_object()
+        return self.render_to_response(await sync_to_async(self.get_context_data)())
+
+    async def post(self, request, *args, **kwargs):
+        self.object = await self.aget_form_object()
+        form = await sync_to_async(self.get_form)()
+        if await sync_to_async(form.is_valid)():
+            return await sync_to_async(self.form_valid)(form)
+        return self.form_invalid(form)
+
+    async def put(self, *args, **kwargs):
+        return await self.post(*args, **kwargs)
+
+
+class AsyncCreateView(AsyncFormMixin, CreateView):
+    async def aget_form_object(self):
+        return None
+
+
+class AsyncUpdateView(AsyncFormMixin, AsyncSingleObjectMixin, UpdateView):
+    async def aget_form_object(self):
+        return await self.aget_object()
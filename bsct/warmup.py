@@ -0,0 +1,191 @@
+"""
+Warm-up of the BSCT views, before they take traffic.
+
+The models are found by walking the URLconf for the BSCT views registered by
+the URLGenerators (directly or through bsct.site). For each model, the views
+built lazily are built, and the per-model caches filled: column plan and
+headers, filter schema, model form, templates compiled by the cached
+template loader, and URL formatters of bsct.urlcache.
+
+Used by the ``bsct_warmup`` management command, and by the application's
+ready() when ``BSCT_WARMUP = True``.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from bsct import urlcache
+from bsct import views as bsct_views
+from bsct.columns import get_column_plan
+from bsct.filters import get_filter_schema
+from bsct.forms import get_model_form
+from bsct.inheritance import get_hierarchy
+from bsct.overrides import find_template_override
+from bsct.urls import LazyView
+
+# Get the logger name from the user's settings.
+logger_name = getattr(settings, "BSCT_LOGGER_NAME", "bsct")
+
+logger = logging.getLogger(logger_name)
+
+# Templates used by every page, through {% extends %} or {% include %}.
+COMMON_TEMPLATES = [
+    "bsct/base.html",
+    "base.html",
+    "bsct/plain/paginator.html",
+    "bsct/plain/keyset_paginator.html",
+]
+
+STEPS = ("views", "columns", "forms", "templates", "urls")
+
+
+def unwrap_view(view):
+    """
+    Returns the view function of a BSCT class based view under its wrappers
+    (lazy view, login_required, conditional GET), or None.
+    """
+    while view is not None:
+        if isinstance(view, LazyView):
+            view = view.get_view()
+        elif hasattr(view, "view_class"):
+            if issubclass(view.view_class, bsct_views.TemplateOverrideMixin):
+                return view
+            return None
+        else:
+            view = getattr(view, "__wrapped__", None)
+    return None
+
+
+def iter_patterns(patterns, namespace=None):
+    """
+    Yields (pattern, namespace) for the URL patterns, included ones too.
+    """
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns, namespace or pattern.namespace)
+        elif isinstance(pattern, URLPattern):
+            yield pattern, namespace
+
+
+def get_template_names(view):
+    """
+    Returns the templates rendered by a view, as resolved by
+    TemplateOverrideMixin.
+    """
+    view_class, initkwargs = view.view_class, view.view_initkwargs
+    if "template_name" in initkwargs:
+        return [initkwargs["template_name"]]
+    model = initkwargs.get("model") or view_class.model
+    if view_class.override_page:
+        override = find_template_override(model, view_class.override_page)
+        if override:
+            return [override]
+    return [view_class.template_name] if view_class.template_name else []
+
+
+class WarmupReport(object):
+    """
+    The time spent by step, in seconds, and the errors, by model label.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.errors = {}
+
+    def add(self, label, step, duration):
+        timings = self.timings.setdefault(label, dict.fromkeys(STEPS, 0.0))
+        timings[step] += duration
+
+    def total(self, label):
+        return sum(self.timings[label].values())
+
+    def slowest(self):
+        """
+        Returns the model labels, slowest first.
+        """
+        return sorted(self.timings, key=self.total, reverse=True)
+
+
+def _timed(report, label, step, func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    except Exception as exception:
+        report.errors.setdefault(label, []).append("%s: %s" % (step, exception))
+        logger.warning("Warm-up of %s failed (%s): %s", label, step, exception)
+    finally:
+        report.add(label, step, time.perf_counter() - start)
+
+
+def _warm_model(model):
+    get_column_plan(model)
+    get_hierarchy(model)
+    get_filter_schema(model)
+
+
+def _warm_form(model, form_class):
+    if form_class is None:
+        get_model_form(model)
+
+
+def _warm_templates(names):
+    for name in names:
+        get_template(name)
+
+
+def warmup(urlconf=None):
+    """Warms up the BSCT views of the URLconf.
+
+    Returns:
+        WarmupReport: by model label, and "(common)" for the URL resolver and
+        the templates shared by the models.
+    """
+    report = WarmupReport()
+
+    start = time.perf_counter()
+    resolver = get_resolver(urlconf)
+    # Populates the resolver's reverse dictionaries.
+    resolver.reverse_dict
+    report.add("(common)", "urls", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for name in COMMON_TEMPLATES:
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            # base.html is the project's, and is optional with bsct_base.
+            pass
+    report.add("(common)", "templates", time.perf_counter() - start)
+
+    warmed = set()
+    for pattern, namespace in iter_patterns(resolver.url_patterns):
+        label = pattern.name or str(pattern.pattern)
+        start = time.perf_counter()
+        try:
+            view = unwrap_view(pattern.callback)
+        except Exception as exception:
+            report.errors.setdefault(label, []).append("views: %s" % exception)
+            continue
+        if view is None:
+            continue
+        initkwargs = view.view_initkwargs
+        model = initkwargs.get("model") or view.view_class.model
+        label = model._meta.label
+        report.add(label, "views", time.perf_counter() - start)
+
+        if model not in warmed:
+            warmed.add(model)
+            _timed(report, label, "columns", _warm_model, model)
+        form_class = initkwargs.get("form_class") or initkwargs.get("row_form_class")
+        if issubclass(view.view_class, (bsct_views.ModelFormMixin, bsct_views.ImportView)):
+            _timed(report, label, "forms", _warm_form, model, form_class)
+        _timed(report, label, "templates", _warm_templates, get_template_names(view))
+        # The rows reverse the names of the detail views, not namespaced.
+        if pattern.name and not namespace and "pk" in pattern.pattern.regex.groupindex:
+            _timed(report, label, "urls", urlcache.reverse_pk, pattern.name, 1)
+
+    return report
@@ -0,0 +1,157 @@
+"""
+Micro-benchmarks of the BSCT template filters and end-to-end benchmarks of
+the BSCT views.
+
+Each benchmark is run once under tracemalloc, counting its queries and its
+peak memory, then ``repeat`` times for its wall time.
+"""
+import gc
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test import Client
+
+from bench.models import Item, Supplier
+from bsct.columns import get_column_plan
+from bsct.templatetags import bscttags
+
+
+class QueryCounter( object ):
+    """
+    Counts the queries of the default connection, see
+    connection.execute_wrapper().
+    """
+
+    def __init__( self ):
+        self.count = 0
+
+    def __call__( self, execute, sql, params, many, context ):
+        self.count += 1
+        return execute( sql, params, many, context )
+
+
+def measure( func, repeat = 5 ):
+    """Measures a callable.
+
+    Returns:
+        dict: wall time in milliseconds (min, median, mean, max), number of
+        queries and peak memory in KiB of a call.
+    """
+    counter = QueryCounter()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper( counter ):
+            func()
+        peak = tracemalloc.get_traced_memory()[ 1 ]
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range( repeat ):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append( ( time.perf_counter() - start ) * 1000 )
+
+    return {
+        'wall_ms': {
+            'min': min( timings ),
+            'median': statistics.median( timings ),
+            'mean': statistics.mean( timings ),
+            'max': max( timings ),
+        },
+        'queries': counter.count,
+        'peak_memory_kib': peak / 1024,
+    }
+
+
+def micro_benchmarks( sample = 100 ):
+    """
+    Returns the callables of the micro-benchmarks, by name, each processing
+    ``sample`` objects loaded like the views load them.
+    """
+    plan = get_column_plan( Item )
+    listed = list(
+        Item.objects.select_related( *plan.list_select_related )
+        .prefetch_related( *plan.list_prefetch_related )
+        .order_by( 'pk' )[ :sample ]
+    )
+    detailed = list(
+        Item.objects.select_related( *plan.detail_select_related )
+        .prefetch_related( *plan.detail_prefetch_related )
+        .order_by( 'pk' )[ :sample ]
+    )
+    deleted = list( Item.objects.order_by( 'pk' )[ :min( sample, 10 ) ] )
+    supplier = Supplier.objects.order_by( 'pk' ).first()
+
+    return {
+        'get_list_detail': lambda: [ bscttags.get_list_detail( item ) for item in listed ],
+        'get_detail': lambda: [ bscttags.get_detail( item ) for item in detailed ],
+        'get_headers': lambda: [ bscttags.get_headers( Item ) for _ in range( sample ) ],
+        'get_list_headers': lambda: bscttags.get_list_headers( listed ),
+        'get_delete_detail': lambda: [ bscttags.get_delete_detail( item ) for item in deleted ],
+        'get_delete_detail_supplier': lambda: bscttags.get_delete_detail( supplier ),
+    }
+
+
+def _get( client, url ):
+    def get():
+        response = client.get( url )
+        assert response.status_code == 200, '%s: %s' % ( url, response.status_code )
+        if response.streaming:
+            # Consumed chunk by chunk, like a server would.
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.content
+    return get
+
+
+def view_benchmarks( max_unpaginated = 10000 ):
+    """
+    Returns the callables of the end-to-end benchmarks, by name, each
+    requesting a page with the test client.
+    """
+    client = Client()
+    rows = Item.objects.count()
+    middle = Item.objects.order_by( 'pk' ).values_list( 'pk', flat = True )[ rows // 2 ]
+    supplier = Supplier.objects.order_by( 'pk' ).values_list( 'pk', flat = True ).first()
+
+    urls = {
+        'list': '/item/',
+        'list_last_page': '/item/?page=last',
+        'list_sorted': '/item/?o=-price',
+        'list_filtered': '/item/?status=a',
+        'data': '/item/data/?draw=1&start=0&length=25',
+        'export_csv': '/item/export/csv/',
+        'detail': '/item/%d/' % middle,
+        'create': '/item/create/',
+        'update': '/item/update/%d/' % middle,
+        'delete': '/item/delete/%d/' % middle,
+        'delete_supplier': '/supplier/delete/%d/' % supplier,
+        'supplier_list': '/supplier/',
+    }
+    if rows <= max_unpaginated:
+        urls[ 'list_unpaginated' ] = '/all/itemall/'
+
+    return { name: _get( client, url ) for name, url in urls.items() }
+
+
+def run( benchmarks, repeat = 5, log = None ):
+    """
+    Returns the measures of the benchmarks, by name.
+    """
+    results = {}
+    for name, func in benchmarks.items():
+        results[ name ] = measure( func, repeat )
+        if log:
+            log( '%-28s %10.2f ms %6d queries %10.1f KiB' % (
+                name,
+                results[ name ][ 'wall_ms' ][ 'median' ],
+                results[ name ][ 'queries' ],
+                results[ name ][ 'peak_memory_kib' ],
+            ) )
+    return results
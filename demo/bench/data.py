@@ -0,0 +1,106 @@
+"""
+Synthetic data of the benchmarks.
+
+The data only depends on the number of rows and the seed, so two runs with
+the same arguments measure the same database.
+"""
+import datetime
+import random
+
+from django.db import connection, transaction
+
+from bench.models import Item, Note, Supplier, Tag
+
+# Dates are spread over the two years following this date.
+START = datetime.datetime( 2020, 1, 1, tzinfo = datetime.timezone.utc )
+
+WORDS = (
+    'alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima '
+    'mike november oscar papa quebec romeo sierra tango uniform victor whiskey '
+    'xray yankee zulu'
+).split()
+
+
+def _batches( iterable, size ):
+    batch = []
+    for item in iterable:
+        batch.append( item )
+        if len( batch ) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text( rng, words ):
+    return ' '.join( rng.choice( WORDS ) for _ in range( words ) )
+
+
+def _date( rng ):
+    return START + datetime.timedelta( seconds = rng.randrange( 2 * 365 * 24 * 3600 ) )
+
+
+def generate( rows = 1000, seed = 0, notes_per_item = 2, batch_size = 5000 ):
+    """Replaces the benchmark data.
+
+    Args:
+        rows (int): number of items.
+        seed (int): seed of the random generator.
+        notes_per_item (int): average number of notes of an item.
+        batch_size (int): rows inserted per query.
+
+    Returns:
+        dict: number of rows by model name.
+    """
+    rng = random.Random( seed )
+    suppliers = max( 1, rows // 100 )
+    tags = 20
+    statuses = [ status for status, _ in Item.STATUS ]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Without the collector of QuerySet.delete(): no query per row.
+            for model in ( Note, Item.tags.through, Item, Tag, Supplier ):
+                cursor.execute( 'DELETE FROM %s' % connection.ops.quote_name( model._meta.db_table ) )
+
+        Supplier.objects.bulk_create(
+            Supplier( pk = pk, name = 'Supplier %d' % pk, country = rng.choice( [ 'FR', 'DE', 'IT', 'ES' ] ) )
+            for pk in range( 1, suppliers + 1 )
+        )
+        Tag.objects.bulk_create(
+            Tag( pk = pk, label = '%s-%d' % ( rng.choice( WORDS ), pk ) )
+            for pk in range( 1, tags + 1 )
+        )
+
+        items = (
+            Item(
+                pk          = pk,
+                name        = '%s %d' % ( _text( rng, 2 ), pk ),
+                supplier_id = rng.randint( 1, suppliers ),
+                status      = rng.choice( statuses ),
+                price       = '%d.%02d' % ( rng.randrange( 1000 ), rng.randrange( 100 ) ),
+                stock       = rng.randrange( 500 ),
+                date_added  = _date( rng ),
+                description = _text( rng, 30 ),
+            )
+            for pk in range( 1, rows + 1 )
+        )
+        for batch in _batches( items, batch_size ):
+            Item.objects.bulk_create( batch )
+
+        links = (
+            Item.tags.through( item_id = pk, tag_id = tag )
+            for pk in range( 1, rows + 1 )
+            for tag in rng.sample( range( 1, tags + 1 ), rng.randint( 0, 3 ) )
+        )
+        for batch in _batches( links, batch_size ):
+            Item.tags.through.objects.bulk_create( batch )
+
+        notes = (
+            Note( item_id = rng.randint( 1, rows ), text = _text( rng, 12 ), date_added = _date( rng ) )
+            for _ in range( rows * notes_per_item )
+        )
+        for batch in _batches( notes, batch_size ):
+            Note.objects.bulk_create( batch )
+
+    return { model.__name__: model.objects.count() for model in ( Supplier, Tag, Item, Note ) }
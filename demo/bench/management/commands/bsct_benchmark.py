@@ -0,0 +1,112 @@
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from bench import benchmarks, data
+from bench.models import Item
+
+
+def git_commit():
+    """
+    Returns the commit of the working tree, or None.
+    """
+    try:
+        return subprocess.check_output(
+            [ 'git', 'rev-parse', '--short', 'HEAD' ],
+            cwd = os.path.dirname( os.path.abspath( __file__ ) ),
+            stderr = subprocess.DEVNULL,
+        ).decode().strip()
+    except ( OSError, subprocess.CalledProcessError ):
+        return None
+
+
+class Command( BaseCommand ):
+    help = 'Runs the BSCT benchmarks and writes their results as JSON.'
+
+    def add_arguments( self, parser ):
+        parser.add_argument( '--rows', type = int, default = 1000, help = 'Number of items (1000 to 1000000).' )
+        parser.add_argument( '--seed', type = int, default = 0 )
+        parser.add_argument( '--repeat', type = int, default = 5, help = 'Timed runs per benchmark.' )
+        parser.add_argument( '--sample', type = int, default = 100, help = 'Objects per micro-benchmark.' )
+        parser.add_argument( '--max-unpaginated', type = int, default = 10000, help = 'Largest unpaginated list benchmarked.' )
+        parser.add_argument( '--only', choices = [ 'micro', 'views' ] )
+        parser.add_argument( '--keep-data', action = 'store_true', help = 'Reuse the data if it has the requested number of rows.' )
+        parser.add_argument( '--output', help = 'Results file, defaults to bench-<commit>-<rows>.json.' )
+        parser.add_argument( '--compare', help = 'Results file to compare the median wall times with.' )
+
+    def handle( self, *args, **options ):
+        call_command( 'migrate', verbosity = 0 )
+
+        if options[ 'keep_data' ] and Item.objects.count() == options[ 'rows' ]:
+            self.stdout.write( 'Reusing %d items.' % options[ 'rows' ] )
+        else:
+            self.stdout.write( 'Generating %d items...' % options[ 'rows' ] )
+            counts = data.generate( options[ 'rows' ], options[ 'seed' ] )
+            self.stdout.write( ', '.join( '%d %s' % ( n, name ) for name, n in counts.items() ) )
+
+        commit = git_commit()
+        results = {
+            'meta': {
+                'commit': commit,
+                'date': datetime.datetime.now( datetime.timezone.utc ).isoformat(),
+                'rows': options[ 'rows' ],
+                'seed': options[ 'seed' ],
+                'repeat': options[ 'repeat' ],
+                'sample': options[ 'sample' ],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+            },
+        }
+        if options[ 'only' ] != 'views':
+            self.stdout.write( 'Micro-benchmarks:' )
+            results[ 'micro' ] = benchmarks.run(
+                benchmarks.micro_benchmarks( options[ 'sample' ] ),
+                options[ 'repeat' ],
+                self.stdout.write,
+            )
+        if options[ 'only' ] != 'micro':
+            self.stdout.write( 'Views:' )
+            results[ 'views' ] = benchmarks.run(
+                benchmarks.view_benchmarks( options[ 'max_unpaginated' ] ),
+                options[ 'repeat' ],
+                self.stdout.write,
+            )
+
+        output = options[ 'output' ] or 'bench-%s-%d.json' % ( commit or 'unknown', options[ 'rows' ] )
+        with open( output, 'w' ) as f:
+            json.dump( results, f, indent = 2 )
+        self.stdout.write( 'Results written to %s' % output )
+
+        if options[ 'compare' ]:
+            self.compare( options[ 'compare' ], results )
+
+    def compare( self, path, results ):
+        """
+        Prints the change of the median wall times since a previous run.
+        """
+        try:
+            with open( path ) as f:
+                previous = json.load( f )
+        except ( OSError, ValueError ) as exception:
+            raise CommandError( 'Can not read %s: %s' % ( path, exception ) )
+
+        self.stdout.write( 'Compared with %s (%s):' % ( path, previous[ 'meta' ].get( 'commit' ) ) )
+        for suite in ( 'micro', 'views' ):
+            for name, measures in results.get( suite, {} ).items():
+                before = previous.get( suite, {} ).get( name )
+                if not before:
+                    continue
+                old = before[ 'wall_ms' ][ 'median' ]
+                new = measures[ 'wall_ms' ][ 'median' ]
+                self.stdout.write( '%-28s %10.2f ms -> %10.2f ms (%+.0f%%) queries %d -> %d' % (
+                    name, old, new, ( new - old ) / old * 100 if old else 0,
+                    before[ 'queries' ], measures[ 'queries' ],
+                ) )
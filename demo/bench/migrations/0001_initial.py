@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:25
+
+import bsct.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Item',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('status', models.CharField(choices=[('d', 'Draft'), ('a', 'Available'), ('o', 'Out of stock'), ('r', 'Retired')], db_index=True, max_length=1)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('stock', models.IntegerField()),
+                ('date_added', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('description', models.TextField(blank=True)),
+            ],
+            bases=(bsct.models.BSCTModelMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='Supplier',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('country', models.CharField(max_length=2)),
+            ],
+            bases=(bsct.models.BSCTModelMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=50, unique=True)),
+            ],
+            bases=(bsct.models.BSCTModelMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='Note',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('date_added', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='bench.item')),
+            ],
+            bases=(bsct.models.BSCTModelMixin, models.Model),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='supplier',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bench.supplier'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='tags',
+            field=models.ManyToManyField(blank=True, to='bench.tag'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+"""
+Models of the benchmarks: foreign keys, a many-to-many relation, choices,
+dates and text, as found in the applications using BSCT.
+"""
+from django.db import models
+from django.utils import timezone
+
+from bsct.models import BSCTModelMixin
+
+
+class Supplier( BSCTModelMixin, models.Model ):
+    name    = models.CharField( max_length = 100, db_index = True )
+    country = models.CharField( max_length = 2 )
+
+    def __str__( self ):
+        return self.name
+
+
+class Tag( BSCTModelMixin, models.Model ):
+    label = models.CharField( max_length = 50, unique = True )
+
+    def __str__( self ):
+        return self.label
+
+
+class Item( BSCTModelMixin, models.Model ):
+    STATUS = [
+        ( 'd', 'Draft' ),
+        ( 'a', 'Available' ),
+        ( 'o', 'Out of stock' ),
+        ( 'r', 'Retired' ),
+    ]
+
+    name        = models.CharField( max_length = 100, db_index = True )
+    supplier    = models.ForeignKey( Supplier, on_delete = models.CASCADE )
+    tags        = models.ManyToManyField( Tag, blank = True )
+    status      = models.CharField( max_length = 1, choices = STATUS, db_index = True )
+    price       = models.DecimalField( max_digits = 10, decimal_places = 2 )
+    stock       = models.IntegerField()
+    date_added  = models.DateTimeField( default = timezone.now, db_index = True )
+    updated     = models.DateTimeField( auto_now = True )
+    description = models.TextField( blank = True )
+
+    def __str__( self ):
+        return self.name
+
+
+class Note( BSCTModelMixin, models.Model ):
+    item       = models.ForeignKey( Item, on_delete = models.CASCADE, related_name = 'notes' )
+    text       = models.TextField()
+    date_added = models.DateTimeField( default = timezone.now )
+
+    def __str__( self ):
+        return self.text[:20]
@@ -0,0 +1,13 @@
+from django.urls import include, path
+
+from bsct.urls import URLGenerator
+from bench import models
+
+urlpatterns = [
+    path( '', include( URLGenerator( models.Item ).get_urlpatterns( 'crudlje', paginate_by = 25 ) ) ),
+    path( '', include( URLGenerator( models.Supplier ).get_urlpatterns( paginate_by = 25 ) ) ),
+    path( '', include( URLGenerator( models.Tag ).get_urlpatterns( paginate_by = 25 ) ) ),
+    path( '', include( URLGenerator( models.Note ).get_urlpatterns( paginate_by = 25 ) ) ),
+    # The whole list in a single page.
+    path( 'all/', include( URLGenerator( models.Item, bsct_view_prefix = 'itemall' ).get_urlpatterns( 'l', paginate_by = None ) ) ),
+]
@@ -0,0 +1,73 @@
+"""
+Models of the tests: a foreign key, a many-to-many relation, a nullable
+column, dates and text, a reverse relation and a multi-table inheritance
+hierarchy.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from bsct.models import BSCTModelMixin
+
+
+class Shelf( BSCTModelMixin, models.Model ):
+    name = models.CharField( max_length = 50, db_index = True )
+
+    def __str__( self ):
+        return self.name
+
+
+class Label( BSCTModelMixin, models.Model ):
+    label = models.CharField( max_length = 50, unique = True )
+
+    def __str__( self ):
+        return self.label
+
+
+class Book( BSCTModelMixin, models.Model ):
+    title      = models.CharField( 'Titre', max_length = 100, db_index = True )
+    shelf      = models.ForeignKey( Shelf, on_delete = models.CASCADE )
+    labels     = models.ManyToManyField( Label, blank = True )
+    pages      = models.IntegerField( default = 100 )
+    score      = models.IntegerField( null = True, blank = True )
+    date_added = models.DateTimeField( default = timezone.now, db_index = True )
+    updated    = models.DateTimeField( auto_now = True )
+    summary    = models.TextField( blank = True )
+
+    def __str__( self ):
+        return self.title
+
+    def get_pages_detail( self, *args ):
+        return '<b>%d p.</b>' % self.pages
+
+
+class Review( BSCTModelMixin, models.Model ):
+    book = models.ForeignKey( Book, on_delete = models.CASCADE, related_name = 'reviews' )
+    text = models.CharField( max_length = 100 )
+
+    def __str__( self ):
+        return self.text
+
+
+class Loan( BSCTModelMixin, models.Model ):
+    book     = models.ForeignKey( Book, on_delete = models.CASCADE )
+    borrower = models.ForeignKey( settings.AUTH_USER_MODEL, on_delete = models.CASCADE )
+
+    @classmethod
+    def get_allowed_fields( cls ):
+        return [ 'book', 'borrower', 'borrower__username' ]
+
+
+class Vehicle( BSCTModelMixin, models.Model ):
+    name = models.CharField( max_length = 50 )
+
+    def __str__( self ):
+        return self.name
+
+
+class Car( Vehicle ):
+    seats = models.IntegerField( default = 4 )
+
+
+class Boat( Vehicle ):
+    length = models.IntegerField( default = 10 )
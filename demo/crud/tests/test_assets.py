@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from bsct import assets
+
+# The static files of the bundles, at the root of the repository.
+STATIC_DIR = os.path.join( os.path.dirname( settings.BASE_DIR ), 'static' )
+
+
+class AssetTests( SimpleTestCase ):
+
+    def setUp( self ):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup( directory.cleanup )
+        self.root = directory.name
+        self.sources = os.path.join( self.root, 'sources' )
+        os.makedirs( os.path.join( self.sources, 'lib', 'css' ) )
+        for name, content in (
+            ( 'lib/a.js', 'var a = 1\n//# sourceMappingURL=a.js.map\n' ),
+            ( 'lib/b.js', 'var b = 2;\n' ),
+            ( 'lib/css/c.css', '.c { background: url("../img/c.png?v=1"); } .d { background: url(data:image/png;base64,AA); }\n' ),
+        ):
+            with open( os.path.join( self.sources, *name.split( '/' ) ), 'w' ) as f:
+                f.write( content )
+        self.bundles = { 'test': { 'js': [ 'lib/a.js', 'lib/b.js' ], 'css': [ 'lib/css/c.css' ] } }
+
+    def render( self, template ):
+        return Template( '{% load bscttags %}' + template ).render( Context() )
+
+    def test_urls_without_manifest( self ):
+        with override_settings( BSCT_ASSETS_ROOT = self.root ):
+            self.assertEqual( assets.get_bundle_urls( 'jszip', 'js' ), [ '/static/JSZip-2.5.0/jszip.min.js' ] )
+            html = self.render( "{% bsct_bundle 'page' %}" )
+        self.assertInHTML( '<link rel="stylesheet" type="text/css" href="/static/style.css"/>', html )
+        self.assertInHTML( '<script src="/static/Bootstrap-5-5.0.1/js/bootstrap.bundle.min.js"></script>', html )
+        with self.assertRaises( assets.BundleError ):
+            assets.get_bundle_urls( 'unknown', 'js' )
+
+    def test_build( self ):
+        with override_settings( STATICFILES_DIRS = [ self.sources ], BSCT_ASSETS_ROOT = self.root ):
+            built = assets.build_bundles( self.root, self.bundles )
+            name, sizes = built[ 'test' ][ 'js' ]
+            self.assertRegex( name, r'^bsct/bundles/test\.[0-9a-f]{12}\.js$' )
+            self.assertEqual( assets.get_manifest(), { 'test': { 'js': name, 'css': built[ 'test' ][ 'css' ][ 0 ] } } )
+
+            path = os.path.join( self.root, *name.split( '/' ) )
+            with open( path ) as f:
+                content = f.read()
+            self.assertNotIn( 'sourceMappingURL', content )
+            self.assertIn( 'var a = 1\n\n;\n/* lib/b.js */\nvar b = 2;', content )
+            with open( path + '.gz', 'rb' ) as f:
+                self.assertEqual( gzip.decompress( f.read() ).decode(), content )
+            self.assertEqual( sizes[ 'raw' ], len( content ) )
+
+            name = built[ 'test' ][ 'css' ][ 0 ]
+            with open( os.path.join( self.root, *name.split( '/' ) ) ) as f:
+                content = f.read()
+            # Relative to the bundles directory.
+            self.assertIn( "url('../../lib/img/c.png?v=1')", content )
+            self.assertIn( 'url(data:image/png;base64,AA)', content )
+
+            # The same content, the same name.
+            self.assertEqual( assets.build_bundles( self.root, self.bundles, compress = False )[ 'test' ][ 'js' ][ 0 ], built[ 'test' ][ 'js' ][ 0 ] )
+
+    def test_tags_with_manifest( self ):
+        os.makedirs( os.path.join( self.root, 'bsct', 'bundles' ) )
+        with open( os.path.join( self.root, *assets.MANIFEST_NAME.split( '/' ) ), 'w' ) as f:
+            json.dump( { 'page': { 'js': 'bsct/bundles/page.0123.js' } }, f )
+        with override_settings( BSCT_ASSETS_ROOT = self.root ):
+            html = self.render( "{% bsct_bundle 'page' %}" )
+            # Not built: the source files.
+            self.assertInHTML( '<link rel="stylesheet" type="text/css" href="/static/style.css"/>', html )
+            self.assertInHTML( '<script src="/static/bsct/bundles/page.0123.js"></script>', html )
+            self.assertEqual( self.render( "{% bsct_bundle_urls 'page' %}" ), '["/static/bsct/bundles/page.0123.js"]' )
+        # Another root, another manifest.
+        self.assertNotIn( 'page.0123', self.render( "{% bsct_bundle 'page' %}" ) )
+
+    def test_missing_file( self ):
+        bundles = { 'test': { 'js': [ 'lib/missing.js' ] } }
+        with override_settings( STATICFILES_DIRS = [ self.sources ] ):
+            with self.assertRaises( assets.BundleError ):
+                assets.build_bundles( self.root, bundles )
+
+    def test_command( self ):
+        output = os.path.join( self.root, 'bundles' )
+        with override_settings( STATICFILES_DIRS = [ STATIC_DIR ], BSCT_ASSETS_ROOT = output ):
+            stdout = StringIO()
+            call_command( 'bsct_assets', no_compress = True, stdout = stdout )
+            self.assertIn( 'Manifest written', stdout.getvalue() )
+            self.assertEqual( sorted( assets.get_manifest() ), sorted( assets.BUNDLES ) )
+            self.assertNotIn( '/static/style.css', self.render( "{% bsct_bundle 'list' %}" ) )
+
+        with override_settings( STATICFILES_DIRS = [ self.sources ] ):
+            with self.assertRaises( CommandError ):
+                call_command( 'bsct_assets', output = output, stdout = StringIO() )
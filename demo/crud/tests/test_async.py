@@ -0,0 +1,64 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from crud.tests.models import Book, Shelf
+
+
+class AsyncViewTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        cls.books = [ Book.objects.create( title = 'Roman %d' % index, shelf = cls.shelf ) for index in range( 7 ) ]
+
+    async def test_list( self ):
+        response = await self.async_client.get( '/bookasync/' )
+        self.assertEqual( response.status_code, 200 )
+        self.assertTrue( response.context[ 'is_paginated' ] )
+        self.assertEqual( len( response.context[ 'object_list' ] ), 5 )
+        self.assertContains( response, response.context[ 'object_list' ][ 0 ].title )
+
+        response = await self.async_client.get( '/bookasync/', { 'page': 2 } )
+        self.assertEqual( len( response.context[ 'object_list' ] ), 2 )
+        self.assertEqual( ( await self.async_client.get( '/bookasync/', { 'page': 9 } ) ).status_code, 404 )
+
+    async def test_list_does_not_query_while_rendering( self ):
+        # The rows, the count and the shelves are fetched before rendering:
+        # a query from the template would raise SynchronousOnlyOperation.
+        response = await self.async_client.get( '/bookasync/' )
+        self.assertContains( response, 'Romans' )
+
+    async def test_detail( self ):
+        response = await self.async_client.get( '/bookasync/%d' % self.books[ 0 ].pk )
+        self.assertEqual( response.status_code, 200 )
+        self.assertEqual( response.context[ 'object' ], self.books[ 0 ] )
+        self.assertContains( response, 'Roman 0' )
+        self.assertEqual( ( await self.async_client.get( '/bookasync/0' ) ).status_code, 404 )
+
+    async def test_delete( self ):
+        book = self.books[ 0 ]
+        response = await self.async_client.get( '/bookasync/delete/%d' % book.pk )
+        self.assertEqual( response.status_code, 200 )
+
+        response = await self.async_client.post( '/bookasync/delete/%d' % book.pk )
+        self.assertRedirects( response, reverse( 'bookasync_list' ), fetch_redirect_response = False )
+        self.assertFalse( await Book.objects.filter( pk = book.pk ).aexists() )
+        self.assertEqual( ( await self.async_client.post( '/bookasync/delete/%d' % book.pk ) ).status_code, 404 )
+
+    async def test_create_and_update( self ):
+        response = await self.async_client.get( '/bookasync/create' )
+        self.assertEqual( response.status_code, 200 )
+
+        data = { 'title': 'Nouveau', 'shelf': self.shelf.pk, 'pages': 10, 'date_added': '2020-01-01 00:00' }
+        response = await self.async_client.post( '/bookasync/create', data )
+        self.assertEqual( response.status_code, 302 )
+        book = await Book.objects.aget( title = 'Nouveau' )
+
+        # An invalid form is rendered again, with its errors.
+        response = await self.async_client.post( '/bookasync/update/%d' % book.pk, dict( data, pages = 'beaucoup' ) )
+        self.assertEqual( response.status_code, 200 )
+        self.assertTrue( response.context[ 'form' ].errors )
+
+        response = await self.async_client.post( '/bookasync/update/%d' % book.pk, dict( data, title = 'Renommé' ) )
+        self.assertEqual( response.status_code, 302 )
+        self.assertTrue( await Book.objects.filter( pk = book.pk, title = 'Renommé' ).aexists() )
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from bsct.autocomplete import AutocompleteSelect, AutocompleteSelectMultiple, get_search_field
+from bsct.views import ModelFormMixin
+from crud.tests.models import Book, Label, Shelf, Vehicle
+
+
+class AutocompleteTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelves = [ Shelf.objects.create( name = 'Romans %02d' % index ) for index in range( 25 ) ]
+        cls.other = Shelf.objects.create( name = 'Essais' )
+        cls.labels = [ Label.objects.create( label = label ) for label in ( 'SF', 'Policier', 'Poésie' ) ]
+
+    def setUp( self ):
+        # The counts of the choices are cached.
+        cache.clear()
+
+    def test_search_field( self ):
+        self.assertEqual( get_search_field( Shelf ).name, 'name' )
+        self.assertEqual( get_search_field( Book ).name, 'title' )
+        # Not indexed: the first text field.
+        self.assertEqual( get_search_field( Vehicle ).name, 'name' )
+
+    def test_search_pages( self ):
+        response = self.client.get( '/book/autocomplete/shelf', { 'q': 'rom' } )
+        self.assertEqual( response.status_code, 200 )
+        data = response.json()
+        self.assertEqual( [ result[ 'text' ] for result in data[ 'results' ] ], [ 'Romans %02d' % index for index in range( 20 ) ] )
+        self.assertEqual( data[ 'results' ][ 0 ][ 'id' ], self.shelves[ 0 ].pk )
+        self.assertTrue( data[ 'next' ] )
+
+        data = self.client.get( '/book/autocomplete/shelf', { 'q': 'rom', 'cursor': data[ 'next' ] } ).json()
+        self.assertEqual( [ result[ 'text' ] for result in data[ 'results' ] ], [ 'Romans %02d' % index for index in range( 20, 25 ) ] )
+        self.assertIsNone( data[ 'next' ] )
+
+    def test_search_many_to_many( self ):
+        data = self.client.get( '/book/autocomplete/labels', { 'q': 'po' } ).json()
+        self.assertEqual( [ result[ 'text' ] for result in data[ 'results' ] ], [ 'Policier', 'Poésie' ] )
+
+    def test_not_a_relation( self ):
+        self.assertEqual( self.client.get( '/book/autocomplete/title' ).status_code, 404 )
+        self.assertEqual( self.client.get( '/book/autocomplete/unknown' ).status_code, 404 )
+
+    def test_widgets_below_the_threshold( self ):
+        form = self.client.get( '/book/create' ).context[ 'form' ]
+        self.assertNotIsInstance( form.fields[ 'shelf' ].widget, AutocompleteSelect )
+        self.assertContains( self.client.get( '/book/create' ), 'Romans 24' )
+
+    @mock.patch.object( ModelFormMixin, 'autocomplete_threshold', 2 )
+    def test_widgets_above_the_threshold( self ):
+        response = self.client.get( '/book/create' )
+        form = response.context[ 'form' ]
+        self.assertIsInstance( form.fields[ 'shelf' ].widget, AutocompleteSelect )
+        self.assertIsInstance( form.fields[ 'labels' ].widget, AutocompleteSelectMultiple )
+        self.assertContains( response, "data-url = '/book/autocomplete/shelf'" )
+        self.assertNotContains( response, 'Romans 24' )
+
+        # The selected objects only.
+        book = Book.objects.create( title = 'Dune', shelf = self.shelves[ 24 ] )
+        book.labels.add( self.labels[ 0 ] )
+        response = self.client.get( '/book/update/%d' % book.pk )
+        self.assertContains( response, 'Romans 24' )
+        self.assertNotContains( response, 'Romans 23' )
+        self.assertContains( response, 'SF' )
+        self.assertNotContains( response, 'Policier' )
+
+    @mock.patch.object( ModelFormMixin, 'autocomplete_threshold', 2 )
+    def test_posted_values_are_validated( self ):
+        data = { 'title': 'Dune', 'shelf': 0, 'pages': 10, 'date_added': '2020-01-01 00:00' }
+        response = self.client.post( '/book/create', data )
+        self.assertEqual( response.status_code, 200 )
+        self.assertIn( 'shelf', response.context[ 'form' ].errors )
+
+        response = self.client.post( '/book/create', dict( data, shelf = self.other.pk, labels = [ self.labels[ 1 ].pk ] ) )
+        self.assertEqual( response.status_code, 302 )
+        book = Book.objects.get( title = 'Dune' )
+        self.assertEqual( ( book.shelf, list( book.labels.all() ) ), ( self.other, self.labels[ 1:2 ] ) )
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from bench import benchmarks, data
+from bench.models import Item, Note, Supplier, Tag
+from crud.tests.models import Shelf
+
+
+class MeasureTests( TestCase ):
+
+    def test_measure( self ):
+        Shelf.objects.create( name = 'Romans' )
+        calls = []
+        result = benchmarks.measure( lambda: calls.append( list( Shelf.objects.all() ) ), repeat = 3 )
+        self.assertEqual( len( calls ), 4 )
+        self.assertEqual( result[ 'queries' ], 1 )
+        self.assertEqual( sorted( result[ 'wall_ms' ] ), [ 'max', 'mean', 'median', 'min' ] )
+        self.assertGreater( result[ 'peak_memory_kib' ], 0 )
+
+
+@override_settings( ROOT_URLCONF = 'bench.urls' )
+class BenchmarkTests( TestCase ):
+
+    def test_data_is_reproducible( self ):
+        counts = data.generate( rows = 30, seed = 1 )
+        self.assertEqual( counts[ 'Item' ], 30 )
+        self.assertEqual( counts[ 'Note' ], 60 )
+        first = list( Item.objects.order_by( 'pk' ).values_list( 'name', 'price', 'supplier_id', 'date_added' ) )
+        self.assertEqual( data.generate( rows = 30, seed = 1 ), counts )
+        self.assertEqual( list( Item.objects.order_by( 'pk' ).values_list( 'name', 'price', 'supplier_id', 'date_added' ) ), first )
+        data.generate( rows = 30, seed = 2 )
+        self.assertNotEqual( list( Item.objects.order_by( 'pk' ).values_list( 'name', 'price', 'supplier_id', 'date_added' ) ), first )
+
+    def test_benchmarks_run( self ):
+        data.generate( rows = 30 )
+        results = benchmarks.run( benchmarks.micro_benchmarks( sample = 10 ), repeat = 1 )
+        self.assertIn( 'get_list_detail', results )
+        # Each view answers with a 200, see benchmarks._get().
+        results = benchmarks.run( benchmarks.view_benchmarks(), repeat = 1 )
+        self.assertIn( 'list_unpaginated', results )
+        self.assertLessEqual( results[ 'list' ][ 'queries' ], 5 )
+
+    def test_command( self ):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join( directory, 'results.json' )
+            call_command( 'bsct_benchmark', rows = 20, repeat = 1, sample = 5, only = 'micro', output = output, stdout = open( os.devnull, 'w' ) )
+            with open( output ) as f:
+                results = json.load( f )
+            self.assertEqual( results[ 'meta' ][ 'rows' ], 20 )
+            self.assertIn( 'micro', results )
+            self.assertNotIn( 'views', results )
+            self.assertEqual( ( Supplier.objects.count(), Tag.objects.count() ), ( 1, 20 ) )
+            self.assertEqual( Note.objects.count(), 40 )
@@ -0,0 +1,63 @@
+import json
+
+from django.test import TestCase
+
+from crud.tests.models import Book, Review, Shelf
+
+
+class BulkDeleteTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelves = [ Shelf.objects.create( name = 'Étagère %d' % index ) for index in range( 3 ) ]
+        for shelf in cls.shelves:
+            for index in range( 2 ):
+                book = Book.objects.create( title = '%s, livre %d' % ( shelf.name, index ), shelf = shelf )
+                Review.objects.create( book = book, text = 'Bien' )
+
+    def selected( self, *shelves ):
+        return json.dumps( [ str( shelf.pk ) for shelf in shelves ] )
+
+    def test_preview( self ):
+        response = self.client.post( '/shelf/delete', { 'selected': self.selected( *self.shelves[ :2 ] ) } )
+        self.assertEqual( response.status_code, 200 )
+        self.assertEqual( response.context[ 'count' ], 2 )
+        self.assertEqual( response.context[ 'objects' ], self.shelves[ :2 ] )
+        self.assertEqual( dict( response.context[ 'cascade_counts' ] )[ 'books' ], 4 )
+        self.assertEqual( Shelf.objects.count(), 3 )
+
+    def test_preview_from_get_with_commas( self ):
+        response = self.client.get( '/shelf/delete', { 'selected': '%d,%d' % ( self.shelves[ 0 ].pk, self.shelves[ 0 ].pk ) } )
+        self.assertEqual( response.context[ 'count' ], 1 )
+        self.assertEqual( response.context[ 'selected' ], str( self.shelves[ 0 ].pk ) )
+
+    def test_confirm( self ):
+        response = self.client.post( '/shelf/delete', { 'selected': self.selected( *self.shelves[ :2 ] ), 'confirm': '1' } )
+        self.assertEqual( response.status_code, 200 )
+        self.assertEqual( response.json()[ 'deleted' ], 10 )
+        self.assertEqual( list( Shelf.objects.all() ), self.shelves[ 2: ] )
+        self.assertEqual( Book.objects.count(), 2 )
+        self.assertEqual( Review.objects.count(), 2 )
+
+    def test_confirm_redirects_to_next( self ):
+        data = { 'selected': self.selected( self.shelves[ 0 ] ), 'confirm': '1', 'next': '/shelf/?page=2' }
+        response = self.client.post( '/shelf/delete', data )
+        self.assertRedirects( response, '/shelf/?page=2', fetch_redirect_response = False )
+
+        # Not to another host.
+        data = { 'selected': self.selected( self.shelves[ 1 ] ), 'confirm': '1', 'next': 'https://example.com/' }
+        response = self.client.post( '/shelf/delete', data )
+        self.assertEqual( response.status_code, 200 )
+        self.assertEqual( response.json()[ 'deleted' ], 5 )
+
+    def test_invalid_selection( self ):
+        for selected in ( '["1", "abc"]', 'abc', '[{"pk": 1}]' ):
+            response = self.client.post( '/shelf/delete', { 'selected': selected, 'confirm': '1' } )
+            self.assertEqual( response.status_code, 400, selected )
+        self.assertEqual( Shelf.objects.count(), 3 )
+
+    def test_too_many_selected( self ):
+        selected = json.dumps( list( range( 1, 10002 ) ) )
+        response = self.client.post( '/shelf/delete', { 'selected': selected, 'confirm': '1' } )
+        self.assertEqual( response.status_code, 400 )
+        self.assertEqual( Shelf.objects.count(), 3 )
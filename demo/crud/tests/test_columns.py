@@ -0,0 +1,65 @@
+from django.test import TestCase
+
+from bsct.columns import clear_column_plans, get_column_plan
+from bsct.templatetags import bscttags
+from crud.tests.models import Book, Label, Shelf
+
+
+class ColumnPlanTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        cls.book = Book.objects.create( title = '<i>Nana</i>', shelf = cls.shelf, pages = 320 )
+        cls.label = Label.objects.create( label = 'Zola' )
+        cls.book.labels.add( cls.label )
+
+    def test_plan_is_built_once_per_model( self ):
+        plan = get_column_plan( Book )
+        self.assertIs( get_column_plan( Book ), plan )
+        self.assertIs( get_column_plan( self.book ), plan )
+
+        clear_column_plans( Book )
+        self.assertIsNot( get_column_plan( Book ), plan )
+
+    def test_list_columns( self ):
+        names = [ column.name for column in get_column_plan( Book ).list_columns ]
+        # Text fields are not listed.
+        self.assertEqual( names, [ 'id', 'title', 'shelf', 'pages', 'score', 'date_added', 'updated', 'labels' ] )
+
+    def test_headers( self ):
+        headers = get_column_plan( Book ).headers
+        self.assertEqual( headers[ 'crud.Book.title' ], 'Titre' )
+        # Relations are labelled with the related model, detail hooks with
+        # their value on the class.
+        self.assertEqual( headers[ 'crud.Book.shelf' ], 'shelf' )
+        self.assertEqual( bscttags.get_headers( self.book ), headers )
+
+    def test_list_detail_escapes_values( self ):
+        details = bscttags.get_list_detail( self.book )
+        self.assertEqual( details[ 'crud.Book.title' ], '&lt;i&gt;Nana&lt;/i&gt;' )
+        # Detail hooks and relations are HTML.
+        self.assertEqual( details[ 'crud.Book.pages' ], '<b>320 p.</b>' )
+        self.assertEqual(
+            details[ 'crud.Book.shelf' ],
+            "<a href='%s'>Romans</a>" % self.shelf.get_absolute_url(),
+        )
+
+    def test_detail_hook_not_accepting_the_instance_is_skipped( self ):
+        class Broken( Book ):
+            def get_title_detail( self ):
+                return 'never called'
+
+            class Meta:
+                proxy = True
+
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            plan = get_column_plan( Broken )
+        columns = { column.name: column for column in plan.list_columns }
+        self.assertIsNone( columns[ 'title' ].detail )
+        self.assertNotIn( 'Titre', [ column.verbose for column in plan.detail_columns ] )
+
+    def test_detail( self ):
+        details = bscttags.get_detail( self.book )
+        self.assertEqual( details[ 'Titre' ], '<i>Nana</i>' )
+        self.assertEqual( details[ 'label' ], [ '<a href=%s>Zola</a>' % self.label.get_absolute_url() ] )
@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.utils.http import http_date
+
+from bsct.conditional import conditional_detail_view
+from bsct.views import DetailView
+from crud.tests.models import Book, Shelf
+
+
+class ConditionalListTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        cls.books = [ Book.objects.create( title = 'Roman %d' % index, shelf = cls.shelf ) for index in range( 3 ) ]
+
+    def test_not_modified( self ):
+        etag = self.client.get( '/bookcond/' )[ 'ETag' ]
+        # The validators only.
+        with self.assertNumQueries( 1 ):
+            response = self.client.get( '/bookcond/', HTTP_IF_NONE_MATCH = etag )
+        self.assertEqual( response.status_code, 304 )
+        self.assertEqual( response.content, b'' )
+
+    def test_saved_and_deleted_rows_change_the_etag( self ):
+        etag = self.client.get( '/bookcond/' )[ 'ETag' ]
+        self.books[ 0 ].title = 'Renommé'
+        self.books[ 0 ].save()
+        response = self.client.get( '/bookcond/', HTTP_IF_NONE_MATCH = etag )
+        self.assertEqual( response.status_code, 200 )
+        self.assertNotEqual( response[ 'ETag' ], etag )
+
+        etag = response[ 'ETag' ]
+        self.books[ 1 ].delete()
+        self.assertEqual( self.client.get( '/bookcond/', HTTP_IF_NONE_MATCH = etag ).status_code, 200 )
+
+    def test_query_string_changes_the_etag( self ):
+        etags = { self.client.get( '/bookcond/', params )[ 'ETag' ] for params in ( {}, { 'page': 1 }, { 'o': 'title' }, { 'shelf': self.shelf.pk } ) }
+        self.assertEqual( len( etags ), 4 )
+
+
+class ConditionalDetailTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.book = Book.objects.create( title = 'Nana', shelf = Shelf.objects.create( name = 'Romans' ) )
+
+    def test_not_modified( self ):
+        response = self.client.get( '/bookcond/%d' % self.book.pk )
+        self.assertEqual( response[ 'Last-Modified' ], http_date( self.book.updated.timestamp() ) )
+        with self.assertNumQueries( 1 ):
+            response = self.client.get( '/bookcond/%d' % self.book.pk, HTTP_IF_NONE_MATCH = response[ 'ETag' ] )
+        self.assertEqual( response.status_code, 304 )
+        response = self.client.get( '/bookcond/%d' % self.book.pk, HTTP_IF_MODIFIED_SINCE = response[ 'Last-Modified' ] )
+        self.assertEqual( response.status_code, 304 )
+
+    def test_missing_object( self ):
+        self.assertEqual( self.client.get( '/bookcond/0' ).status_code, 404 )
+
+    def test_model_without_version_field( self ):
+        view = DetailView.as_view( model = Shelf )
+        with self.assertLogs( 'bsct', 'WARNING' ) as logs:
+            self.assertIs( conditional_detail_view( view ), view )
+        self.assertIn( 'no version field', logs.output[ 0 ] )
@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from bsct.pagination import CachedCount, EstimatedCount, ExactCount, get_count_strategy
+from bsct.urls import URLGenerator
+from crud.tests.models import Book, Car, Label, Shelf, Vehicle
+
+
+class CachedCountTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        for index in range( 7 ):
+            Book.objects.create( title = 'Livre %d' % index, shelf = cls.shelf )
+
+    def setUp( self ):
+        cache.clear()
+
+    def get_count_queries( self, url ):
+        with CaptureQueriesContext( connection ) as queries:
+            response = self.client.get( url )
+        count = [ query for query in queries if 'COUNT(' in query[ 'sql' ].upper() ]
+        return response, len( count )
+
+    def test_count_is_cached( self ):
+        response, count_queries = self.get_count_queries( '/bookcached/' )
+        self.assertEqual( response.context[ 'paginator' ].count, 7 )
+        self.assertEqual( count_queries, 1 )
+        response, count_queries = self.get_count_queries( '/bookcached/' )
+        self.assertEqual( response.context[ 'paginator' ].count, 7 )
+        self.assertEqual( count_queries, 0 )
+
+    def test_filters_have_their_own_count( self ):
+        other = Shelf.objects.create( name = 'Poésie' )
+        Book.objects.create( title = 'Poèmes', shelf = other )
+        self.assertEqual( self.client.get( '/bookcached/' ).context[ 'paginator' ].count, 8 )
+        response = self.client.get( '/bookcached/', { 'shelf': other.pk } )
+        self.assertEqual( response.context[ 'paginator' ].count, 1 )
+
+    def test_save_and_delete_invalidate_the_count( self ):
+        self.client.get( '/bookcached/' )
+        book = Book.objects.create( title = 'Nouveau', shelf = self.shelf )
+        self.assertEqual( self.client.get( '/bookcached/' ).context[ 'paginator' ].count, 8 )
+        book.delete()
+        self.assertEqual( self.client.get( '/bookcached/' ).context[ 'paginator' ].count, 7 )
+
+    def test_subclass_rows_invalidate_the_parent_count( self ):
+        strategy = CachedCount()
+        self.assertEqual( strategy.count( Vehicle.objects.all() ), ( 0, False ) )
+        Car.objects.create( name = 'Voiture' )
+        self.assertEqual( strategy.count( Vehicle.objects.all() ), ( 1, False ) )
+
+    def test_receivers_are_connected_with_the_urls( self ):
+        # Without any count in the process, a save invalidates the counts
+        # cached by the other processes.
+        version_key = CachedCount.get_version_key( Label )
+        URLGenerator( Label ).get_list_url( count_strategy = 'cached' )
+        Label.objects.create( label = 'Classique' )
+        self.assertEqual( cache.get( version_key ), 1 )
+
+
+class CountStrategyTests( TestCase ):
+
+    def test_strategies( self ):
+        self.assertIsInstance( get_count_strategy( None ), ExactCount )
+        self.assertIsInstance( get_count_strategy( 'cached' ), CachedCount )
+        self.assertIsInstance( get_count_strategy( EstimatedCount ), EstimatedCount )
+        strategy = CachedCount( timeout = 10 )
+        self.assertIs( get_count_strategy( strategy ), strategy )
+        with self.assertRaises( KeyError ):
+            get_count_strategy( 'unknown' )
+
+    def test_estimated_count_is_exact_without_postgresql( self ):
+        Shelf.objects.create( name = 'Romans' )
+        self.assertEqual( EstimatedCount().count( Shelf.objects.all() ), ( 1, False ) )
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from bsct.views import DataTableView
+
+from crud.tests.models import Book, Shelf
+
+URL = '/bookdata/data/'
+
+# Indexes of the columns of the list of books.
+TITLE, PAGES = 1, 3
+
+
+class DataTableTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.romans = Shelf.objects.create( name = 'Romans' )
+        cls.poesie = Shelf.objects.create( name = 'Poésie' )
+        for index in range( 12 ):
+            Book.objects.create( title = 'Roman %02d' % index, shelf = cls.romans, pages = 100 + index )
+        for index in range( 3 ):
+            Book.objects.create( title = 'Poèmes %d' % index, shelf = cls.poesie, pages = 50 + index )
+
+    def get( self, **params ):
+        params.setdefault( 'draw', 3 )
+        response = self.client.get( URL, params )
+        self.assertEqual( response.status_code, 200 )
+        return response.json()
+
+    def titles( self, data ):
+        return [ row[ TITLE ] for row in data[ 'data' ] ]
+
+    def test_page( self ):
+        data = self.get( start = 10, length = 10, **{ 'order[0][column]': TITLE, 'order[0][dir]': 'asc' } )
+        self.assertEqual( data[ 'draw' ], 3 )
+        self.assertEqual( data[ 'recordsTotal' ], 15 )
+        self.assertEqual( data[ 'recordsFiltered' ], 15 )
+        self.assertEqual( self.titles( data ), [ 'Roman 07', 'Roman 08', 'Roman 09', 'Roman 10', 'Roman 11' ] )
+        self.assertEqual( data[ 'ids' ], [ str( Book.objects.get( title = title ).pk ) for title in self.titles( data ) ] )
+        # The columns and the actions.
+        self.assertEqual( len( data[ 'data' ][ 0 ] ), 9 )
+        self.assertIn( Book.objects.get( title = 'Roman 07' ).get_absolute_url(), data[ 'data' ][ 0 ][ -1 ] )
+
+    def test_queries_are_bounded_by_the_page( self ):
+        # The counts and the page.
+        with self.assertNumQueries( 3 ):
+            self.get( length = 5, **{ 'search[value]': 'roman' } )
+
+    def test_search( self ):
+        data = self.get( **{ 'search[value]': 'poème' } )
+        self.assertEqual( data[ 'recordsTotal' ], 15 )
+        self.assertEqual( data[ 'recordsFiltered' ], 3 )
+        data = self.get( **{ 'columns[%d][search][value]' % TITLE: 'Roman 1' } )
+        self.assertEqual( sorted( self.titles( data ) ), [ 'Roman 10', 'Roman 11' ] )
+
+    def test_ordering( self ):
+        data = self.get( length = 2, **{ 'order[0][column]': PAGES, 'order[0][dir]': 'desc' } )
+        self.assertEqual( self.titles( data ), [ 'Roman 11', 'Roman 10' ] )
+        # Out of range columns are ignored.
+        self.assertEqual( len( self.get( **{ 'order[0][column]': 99 } )[ 'data' ] ), 10 )
+
+    def test_filters_of_the_list( self ):
+        data = self.get( shelf = self.poesie.pk )
+        self.assertEqual( data[ 'recordsTotal' ], 3 )
+
+    def test_invalid_parameters( self ):
+        data = self.get( draw = 'x', start = '-4', length = 'abc' )
+        self.assertEqual( data[ 'draw' ], 0 )
+        self.assertEqual( len( data[ 'data' ] ), 10 )
+
+    def test_length_is_bounded( self ):
+        data = self.get( length = -1 )
+        self.assertEqual( len( data[ 'data' ] ), 15 )
+        with mock.patch.object( DataTableView, 'max_length', 4 ):
+            self.assertEqual( len( self.get( length = 100 )[ 'data' ] ), 4 )
+
+    def test_list_fetches_the_rows( self ):
+        with self.assertNumQueries( 0 ):
+            response = self.client.get( '/bookdata/' )
+        self.assertEqual( response.context[ 'datatable_url' ].rstrip( '/' ), URL.rstrip( '/' ) )
+        self.assertNotContains( response, '<tr id' )
@@ -0,0 +1,59 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bsct.deletion import collect_cascade, collect_queryset_cascade, count_by_model
+from crud.tests.models import Book, Review, Shelf
+
+
+class CascadeTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        cls.other = Shelf.objects.create( name = 'Poésie' )
+        for index in range( 12 ):
+            book = Book.objects.create( title = 'Roman %d' % index, shelf = cls.shelf )
+            Review.objects.create( book = book, text = 'Avis %d' % index )
+        Book.objects.create( title = 'Poèmes', shelf = cls.other )
+
+    def test_entries( self ):
+        books, reviews = collect_cascade( self.shelf, max_objects = 10 )
+        self.assertEqual( ( books.model, books.depth, books.count ), ( Book, 1, 12 ) )
+        self.assertEqual( len( books.objects ), 10 )
+        self.assertEqual( books.remaining, 2 )
+        self.assertIn( 'et 2 autres', books.html )
+        self.assertIn( books.objects[ 0 ].get_absolute_url(), books.html )
+        self.assertEqual( ( reviews.model, reviews.depth, reviews.count ), ( Review, 2, 12 ) )
+        self.assertEqual( count_by_model( [ books, reviews ] ), { 'books': 12, 'reviews': 12 } )
+
+    def test_depth( self ):
+        self.assertEqual( [ entry.model for entry in collect_cascade( self.shelf, max_depth = 1 ) ], [ Book ] )
+        self.assertEqual( collect_cascade( Review.objects.first() ), [] )
+
+    def test_queries_do_not_grow_with_the_objects( self ):
+        with CaptureQueriesContext( connection ) as few:
+            collect_cascade( self.other )
+        with CaptureQueriesContext( connection ) as many:
+            collect_cascade( self.shelf )
+        # A count per relation, and the first objects of the non-empty ones.
+        self.assertEqual( len( many ), 5 )
+        self.assertLessEqual( len( few ), len( many ) )
+
+    def test_queryset_cascade( self ):
+        entries = collect_queryset_cascade( Shelf.objects.all() )
+        self.assertEqual( [ ( entry.model, entry.count ) for entry in entries ], [ ( Book, 13 ), ( Review, 12 ) ] )
+
+    def test_confirmation_page( self ):
+        response = self.client.get( '/shelf/delete/%d' % self.shelf.pk )
+        self.assertEqual( response.status_code, 200 )
+        self.assertEqual( response.context[ 'cascade_counts' ], [ ( 'books', 12 ), ( 'reviews', 12 ) ] )
+        self.assertContains( response, 'et 2 autres' )
+
+    def test_delete( self ):
+        response = self.client.post( '/shelf/delete/%d' % self.shelf.pk )
+        self.assertRedirects( response, reverse( 'shelf_list' ), fetch_redirect_response = False )
+        self.assertFalse( Shelf.objects.filter( pk = self.shelf.pk ).exists() )
+        self.assertEqual( Book.objects.count(), 1 )
+        self.assertEqual( Review.objects.count(), 0 )
@@ -0,0 +1,33 @@
+from django.test import TestCase
+
+from crud.tests.models import Book, Label, Review, Shelf
+
+
+class DetailLookupsTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.book = Book.objects.create( title = 'Nana', shelf = Shelf.objects.create( name = 'Romans' ) )
+
+    def add_relations( self, count ):
+        for index in range( count ):
+            Review.objects.create( book = self.book, text = 'Avis %d' % index )
+            self.book.labels.add( Label.objects.create( label = 'Étiquette %d-%d' % ( count, index ) ) )
+
+    def test_detail_queries_do_not_grow_with_the_relations( self ):
+        # The book and its shelf, then one query per multi-valued relation.
+        self.add_relations( 1 )
+        with self.assertNumQueries( 4 ):
+            response = self.client.get( self.book.get_absolute_url() )
+        self.assertContains( response, 'Avis 0' )
+        self.add_relations( 4 )
+        with self.assertNumQueries( 4 ):
+            response = self.client.get( self.book.get_absolute_url() )
+        self.assertContains( response, 'Étiquette 4-3' )
+
+    def test_detail_page_shows_the_relations( self ):
+        self.add_relations( 2 )
+        response = self.client.get( self.book.get_absolute_url() )
+        self.assertContains( response, 'Romans' )
+        for review in self.book.reviews.all():
+            self.assertContains( response, review.get_absolute_url() )
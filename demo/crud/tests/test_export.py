@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import zipfile
+from unittest import mock
+
+from django.test import TestCase
+
+from bsct.views import ExportView
+from crud.tests.models import Book, Shelf
+
+
+class ExportTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.romans = Shelf.objects.create( name = 'Romans' )
+        cls.poesie = Shelf.objects.create( name = 'Poésie' )
+        for index in range( 5 ):
+            Book.objects.create( title = 'Roman %d' % index, shelf = cls.romans, pages = index )
+        Book.objects.create( title = 'Poèmes, "choisis"', shelf = cls.poesie, score = 4.5 )
+
+    def export( self, export_format, **params ):
+        response = self.client.get( '/book/export/%s' % export_format, params )
+        self.assertEqual( response.status_code, 200 )
+        self.assertTrue( response.streaming )
+        self.assertEqual( response[ 'Content-Disposition' ], 'attachment; filename="book.%s"' % export_format )
+        return b''.join( response.streaming_content )
+
+    def test_csv( self ):
+        rows = list( csv.reader( io.StringIO( self.export( 'csv' ).decode() ) ) )
+        self.assertEqual( rows[ 0 ][ :4 ], [ 'ID', 'Titre', 'shelf', 'pages' ] )
+        self.assertEqual( len( rows ), 7 )
+        poems = [ row for row in rows if row[ 1 ] == 'Poèmes, "choisis"' ][ 0 ]
+        # Foreign keys are exported as their pk.
+        self.assertEqual( poems[ 2 ], str( self.poesie.pk ) )
+
+    def test_ndjson( self ):
+        # Sorting on a column without index is logged.
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            lines = self.export( 'ndjson', o = 'pages' ).decode().splitlines()
+        objects = [ json.loads( line ) for line in lines ]
+        self.assertEqual( len( objects ), 6 )
+        self.assertEqual( [ obj[ 'pages' ] for obj in objects[ :3 ] ], [ 0, 1, 2 ] )
+        self.assertEqual( objects[ 0 ][ 'shelf' ], self.romans.pk )
+        self.assertIn( 'date_added', objects[ 0 ] )
+
+    def test_xlsx( self ):
+        with zipfile.ZipFile( io.BytesIO( self.export( 'xlsx' ) ) ) as archive:
+            self.assertIsNone( archive.testzip() )
+            sheet = archive.read( 'xl/worksheets/sheet1.xml' ).decode()
+        self.assertIn( 'Titre', sheet )
+        self.assertIn( 'Poèmes, "choisis"', sheet )
+        self.assertEqual( sheet.count( '<row' ), 7 )
+
+    def test_filters_and_chunks( self ):
+        with mock.patch.object( ExportView, 'chunk_size', 2 ):
+            rows = list( csv.reader( io.StringIO( self.export( 'csv', shelf = self.romans.pk ).decode() ) ) )
+        self.assertEqual( len( rows ), 6 )
+        self.assertNotIn( 'Poèmes, "choisis"', [ row[ 1 ] for row in rows ] )
+
+    def test_unknown_format( self ):
+        self.assertEqual( self.client.get( '/book/export/pdf' ).status_code, 404 )
+
+    def test_list_links_the_exports( self ):
+        response = self.client.get( '/book/', { 'shelf': self.romans.pk } )
+        self.assertEqual(
+            response.context[ 'export_urls' ][ 'csv' ].rstrip( '/' ).split( '?' ),
+            [ '/book/export/csv', 'shelf=%d' % self.romans.pk ],
+        )
@@ -0,0 +1,109 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.http import QueryDict
+from django.test import TestCase
+
+from bsct.filters import FilterSchema, get_filter_schema
+from bsct.views import authorized_fields
+from crud.tests.models import Book, Label, Loan, Review, Shelf
+
+
+def parse( model, query, unindexed = 'allow' ):
+    return get_filter_schema( model ).parse( QueryDict( query ), unindexed )
+
+
+class FilterSchemaTests( TestCase ):
+
+    def test_values_are_converted( self ):
+        self.assertEqual( parse( Book, 'title__icontains=livre&pages__gte=10' ), {
+            'title__icontains': 'livre',
+            'pages__gte': 10,
+        } )
+        self.assertEqual( parse( Book, 'id__in=1,2,3' ), { 'id__in': [ 1, 2, 3 ] } )
+        self.assertEqual( parse( Book, 'score__isnull=true' ), { 'score__isnull': True } )
+
+    def test_naive_datetimes_are_made_aware( self ):
+        value = parse( Book, 'date_added__gte=2024-01-02 03:04:05' )[ 'date_added__gte' ]
+        self.assertEqual( value.replace( tzinfo = None ), datetime.datetime( 2024, 1, 2, 3, 4, 5 ) )
+        self.assertIsNotNone( value.tzinfo )
+
+    def test_invalid_and_unknown_parameters_are_ignored( self ):
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            self.assertEqual( parse( Book, 'pages=abc' ), {} )
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            self.assertEqual( parse( Book, 'pages__range=1' ), {} )
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            self.assertEqual( parse( Book, 'score__isnull=peut-être' ), {} )
+        # Not filters, or lookups the field does not accept.
+        self.assertEqual( parse( Book, 'page=2&o=title&title__regex=.*&pages__icontains=1' ), {} )
+
+    def test_unindexed_filters( self ):
+        self.assertEqual( parse( Book, 'pages=10&title=a', 'allow' ), { 'pages__exact': 10, 'title__exact': 'a' } )
+        with self.assertLogs( 'bsct', 'WARNING' ) as logs:
+            self.assertEqual( parse( Book, 'pages=10&title=a', 'log' ), { 'pages__exact': 10, 'title__exact': 'a' } )
+        self.assertIn( 'pages', logs.output[ 0 ] )
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            self.assertEqual( parse( Book, 'pages=10&title=a', 'reject' ), { 'title__exact': 'a' } )
+
+    def test_fields_of_related_models( self ):
+        self.assertEqual( parse( Book, 'shelf__name=Romans' ), { 'shelf__name__exact': 'Romans' } )
+        self.assertEqual( parse( Book, 'shelf=3' ), { 'shelf__exact': 3 } )
+
+    def test_related_fields_must_be_allowed( self ):
+        # auth.User has no get_allowed_fields(): only the listed path is accepted.
+        self.assertEqual( parse( Loan, 'borrower__username=paul' ), { 'borrower__username__exact': 'paul' } )
+        self.assertEqual( parse( Loan, 'borrower__password=x&borrower__email=x&borrower__is_staff=true' ), {} )
+        self.assertEqual( authorized_fields( [ 'book', 'borrower__password', 'page' ], Loan ), [ 'book' ] )
+
+    def test_schema_is_compiled_once( self ):
+        self.assertIs( get_filter_schema( Book ), get_filter_schema( Book ) )
+
+
+class RelationFilterTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        shelf = Shelf.objects.create( name = 'Romans' )
+        cls.classic, cls.french = Label.objects.create( label = 'Classique' ), Label.objects.create( label = 'Français' )
+        cls.both = Book.objects.create( title = 'Les Misérables', shelf = shelf )
+        cls.both.labels.set( [ cls.classic, cls.french ] )
+        cls.one = Book.objects.create( title = 'Hamlet', shelf = shelf )
+        cls.one.labels.set( [ cls.classic ] )
+        cls.none = Book.objects.create( title = 'Sans étiquette', shelf = shelf )
+        Review.objects.create( book = cls.both, text = 'Très bien' )
+        Review.objects.create( book = cls.both, text = 'Bien' )
+
+    def get_books( self, query, schema = None ):
+        filters = ( schema or get_filter_schema( Book ) ).parse( QueryDict( query ) )
+        return list( Book.objects.filter( **filters ).order_by( 'pk' ) )
+
+    def test_many_to_many_fields( self ):
+        self.assertEqual( self.get_books( 'labels=%d' % self.french.pk ), [ self.both ] )
+        self.assertEqual( self.get_books( 'labels__label=Classique' ), [ self.both, self.one ] )
+
+    def test_many_to_many_rows_are_not_repeated( self ):
+        query = 'labels__in=%d,%d' % ( self.classic.pk, self.french.pk )
+        self.assertEqual( self.get_books( query ), [ self.both, self.one ] )
+        response = self.client.get( '/bookall/?' + query )
+        self.assertEqual( list( response.context[ 'object_list' ] ), [ self.one, self.both ] )
+
+    def test_reverse_relations_listed_by_name( self ):
+        # Not with "__all__": only when the model lists them.
+        self.assertEqual( parse( Book, 'reviews__text=Bien' ), {} )
+        with mock.patch.object( Book, 'get_allowed_fields', classmethod( lambda cls: [ 'title', 'reviews' ] ) ):
+            schema = FilterSchema( Book )
+        self.assertEqual( self.get_books( 'reviews__text__icontains=bien', schema ), [ self.both ] )
+        self.assertEqual( self.get_books( 'reviews__isnull=true', schema ), [ self.one, self.none ] )
+
+    def test_allowed_fields_which_can_not_be_filtered_are_logged( self ):
+        allowed = classmethod( lambda cls: [ 'title', 'missing', 'shelf__name__exact' ] )
+        with mock.patch.object( Book, 'get_allowed_fields', allowed ):
+            with self.assertLogs( 'bsct', 'WARNING' ) as logs:
+                FilterSchema( Book )
+        self.assertIn( 'missing, shelf__name__exact', logs.output[ 0 ] )
+
+    def test_user_password_is_never_filterable( self ):
+        User.objects.create( username = 'paul', password = 'secret' )
+        self.assertNotIn( 'borrower__password', get_filter_schema( Loan ).specs )
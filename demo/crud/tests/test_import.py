@@ -0,0 +1,94 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.forms import modelform_factory
+from django.test import TestCase
+
+from bsct.imports import Importer, csv_rows, ndjson_rows
+from crud.tests.models import Book, Label, Shelf
+
+
+def upload( name, content ):
+    return SimpleUploadedFile( name, content.encode( 'utf-8' ) )
+
+
+class ImportViewTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        cls.labels = [ Label.objects.create( label = label ) for label in ( 'SF', 'Policier' ) ]
+
+    def test_form( self ):
+        response = self.client.get( '/book/import' )
+        self.assertEqual( response.status_code, 200 )
+        self.assertEqual( self.client.get( '/book/' ).context[ 'import_url' ], '/book/import' )
+
+    def test_csv( self ):
+        content = (
+            'title,shelf,labels,pages,date_added\n'
+            'Dune,%(shelf)d,"%(sf)d,%(policier)d",600,2020-01-01 00:00\n'
+            'Sans étagère,,,100,2020-01-01 00:00\n'
+            'Fondation,%(shelf)d,,beaucoup,2020-01-01 00:00\n'
+            'Hypérion,%(shelf)d,%(sf)d,500,2020-01-01 00:00\n'
+        ) % { 'shelf': self.shelf.pk, 'sf': self.labels[ 0 ].pk, 'policier': self.labels[ 1 ].pk }
+        response = self.client.post( '/book/import', { 'file': upload( 'livres.csv', content ) } )
+        self.assertEqual( response.status_code, 200 )
+
+        result = response.context[ 'result' ]
+        self.assertEqual( ( result.rows, result.created, result.error_count ), ( 4, 2, 2 ) )
+        # The lines of the file, header included.
+        self.assertEqual( [ ( line, sorted( errors ) ) for line, errors in result.errors ], [ ( 3, [ 'shelf' ] ), ( 4, [ 'pages' ] ) ] )
+        self.assertEqual( sorted( Book.objects.values_list( 'title', flat = True ) ), [ 'Dune', 'Hypérion' ] )
+        self.assertEqual( set( Book.objects.get( title = 'Dune' ).labels.all() ), set( self.labels ) )
+
+    def test_ndjson_as_json( self ):
+        content = (
+            '{"title": "Dune", "shelf": %(shelf)d, "labels": [%(sf)d], "pages": 600, "date_added": "2020-01-01 00:00"}\n'
+            '\n'
+            'pas du JSON\n'
+            '[1, 2]\n'
+        ) % { 'shelf': self.shelf.pk, 'sf': self.labels[ 0 ].pk }
+        response = self.client.post( '/book/import', { 'file': upload( 'livres.data', content ), 'format': 'ndjson' }, HTTP_ACCEPT = 'application/json' )
+        self.assertEqual( response.status_code, 200 )
+        result = response.json()
+        self.assertEqual( ( result[ 'rows' ], result[ 'created' ], result[ 'error_count' ] ), ( 3, 1, 2 ) )
+        self.assertEqual( [ error[ 'line' ] for error in result[ 'errors' ] ], [ 3, 4 ] )
+        self.assertEqual( list( Book.objects.get().labels.all() ), self.labels[ :1 ] )
+
+    def test_invalid_upload( self ):
+        response = self.client.post( '/book/import', { 'format': 'xml' }, HTTP_ACCEPT = 'application/json' )
+        self.assertEqual( response.status_code, 400 )
+        self.assertEqual( sorted( response.json()[ 'errors' ] ), [ 'file', 'format' ] )
+
+        response = self.client.post( '/book/import', {} )
+        self.assertEqual( response.status_code, 200 )
+        self.assertIn( 'file', response.context[ 'form' ].errors )
+
+    def test_unreadable_file( self ):
+        response = self.client.post( '/book/import', { 'file': SimpleUploadedFile( 'livres.csv', b'title\n\xff\xfe\n' ) } )
+        self.assertEqual( response.context[ 'result' ].error_count, 1 )
+        self.assertFalse( Book.objects.exists() )
+
+
+class ImporterTests( TestCase ):
+
+    def test_batch_falls_back_to_rows( self ):
+        # The duplicate fails the batch: its other rows are saved one by one.
+        Label.objects.create( label = 'SF' )
+        importer = Importer( modelform_factory( Label, fields = [ 'label' ] ), batch_size = 10 )
+        rows = [ ( line, { 'label': label }, None ) for line, label in enumerate( [ 'Policier', 'Roman', 'Roman' ], 2 ) ]
+        result = importer.run( rows )
+        self.assertEqual( ( result.rows, result.created, result.error_count ), ( 3, 2, 1 ) )
+        self.assertEqual( result.errors[ 0 ][ 0 ], 4 )
+        self.assertEqual( Label.objects.count(), 3 )
+
+    def test_max_errors( self ):
+        importer = Importer( modelform_factory( Label, fields = [ 'label' ] ), max_errors = 2 )
+        result = importer.run( ( line, { 'label': '' }, None ) for line in range( 5 ) )
+        self.assertEqual( ( result.error_count, len( result.errors ), result.remaining_errors ), ( 5, 2, 3 ) )
+
+    def test_readers( self ):
+        rows = list( csv_rows( upload( 'a.csv', '﻿a,b\n1,2,3\n' ) ) )
+        self.assertEqual( rows, [ ( 2, { 'a': '1', 'b': '2' }, None ) ] )
+        rows = list( ndjson_rows( upload( 'a.ndjson', '{"a": 1}\n"a"\n' ) ) )
+        self.assertEqual( rows[ 0 ], ( 1, { 'a': 1 }, None ) )
+        self.assertEqual( rows[ 1 ][ :2 ], ( 2, None ) )
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from bsct.inheritance import downcast, get_hierarchy
+from bsct.templatetags.bscttags import render_rows
+from crud.tests.models import Boat, Car, Vehicle
+
+
+class InheritanceTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.vehicle = Vehicle.objects.create( name = 'Charrette' )
+        cls.car = Car.objects.create( name = 'Voiture', seats = 5 )
+        cls.boat = Boat.objects.create( name = 'Bateau', length = 12 )
+
+    def test_list_shows_the_columns_of_the_subclasses( self ):
+        response = self.client.get( '/vehicle/' )
+        self.assertEqual( response.status_code, 200 )
+        self.assertContains( response, 'Voiture' )
+        self.assertContains( response, '<td>5</td>', html = False )
+        self.assertContains( response, '<td>12</td>', html = False )
+
+    def test_rows_are_downcast_with_one_query_per_subclass( self ):
+        # The count of the list, the page and one query per subclass.
+        with self.assertNumQueries( 3 ):
+            response = self.client.get( '/vehicle/' )
+        classes = [ obj.__class__ for obj in response.context[ 'object_list' ] ]
+        self.assertEqual( classes, [ Vehicle, Car, Boat ] )
+
+    def test_rows_of_unregistered_subclasses_link_to_the_parent( self ):
+        response = self.client.get( '/vehicle/' )
+        for obj in ( self.vehicle, self.car, self.boat ):
+            self.assertContains( response, "href  = '%s'" % Vehicle.objects.get( pk = obj.pk ).get_absolute_url() )
+
+    def test_datatables_rows_link_to_the_parent( self ):
+        response = self.client.get( '/vehicledata/data/', { 'draw': 1, 'start': 0, 'length': 10 } )
+        self.assertEqual( response.status_code, 200 )
+        actions = [ row[ -1 ] for row in response.json()[ 'data' ] ]
+        for obj, html in zip( ( self.vehicle, self.car, self.boat ), actions ):
+            self.assertIn( "'%s'" % Vehicle.objects.get( pk = obj.pk ).get_absolute_url(), html )
+
+    def test_render_rows_without_any_detail_page( self ):
+        # Without the model of the list, a car has no detail page.
+        headers = get_hierarchy( Vehicle ).headers
+        html = render_rows( [ Car.objects.get( pk = self.car.pk ) ], headers )
+        self.assertIn( 'Voiture', html )
+        self.assertNotIn( 'href', html )
+
+    def test_overridden_row_block_links_to_the_parent( self ):
+        # A block of the row overridden: the rows are rendered by the template loop.
+        template = Template(
+            "{% extends 'bsct/plain/list.html' %}"
+            "{% block BSCT_LIST_ITEMS_EXTRA %}<td>extra</td>{% endblock %}"
+        )
+        html = template.render( Context( {
+            'view': SimpleNamespace( model = Vehicle ),
+            'object_list': downcast( Vehicle.objects.order_by( 'pk' ), Vehicle ),
+            'headers': get_hierarchy( Vehicle ).headers,
+        } ) )
+        self.assertIn( '<td>extra</td>', html )
+        url = Vehicle.objects.get( pk = self.car.pk ).get_absolute_url()
+        self.assertIn( "href  = '%s'" % url, html )
+
+
+ROW_ACTIONS = "<a class = 'voir' href = '{{ url }}'>Voir</a>"
+
+
+@override_settings( TEMPLATES = [ {
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'context_processors': [ 'django.template.context_processors.request' ],
+        'loaders': [
+            ( 'django.template.loaders.locmem.Loader', { 'bsct/plain/row_actions.html': ROW_ACTIONS } ),
+            'django.template.loaders.app_directories.Loader',
+        ],
+    },
+} ] )
+class RowActionsOverrideTests( TestCase ):
+
+    def test_rows_render_the_overridden_actions( self ):
+        car = Car.objects.create( name = 'Voiture' )
+        response = self.client.get( '/vehicle/' )
+        self.assertContains( response, "<a class = 'voir' href = '%s'>Voir</a>" % Vehicle.objects.get( pk = car.pk ).get_absolute_url(), html = False )
+        response = self.client.get( '/vehicledata/data/', { 'draw': 1 } )
+        self.assertIn( 'voir', response.json()[ 'data' ][ 0 ][ -1 ] )
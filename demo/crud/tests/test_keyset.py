@@ -0,0 +1,119 @@
+import datetime
+import html
+import re
+
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from bsct.pagination import KeysetPaginator
+from bsct.templatetags.bscttags import append_querystring
+from crud.tests.models import Book, Shelf
+
+
+def page_links( response ):
+    """
+    Returns the previous and next links of the keyset paginator, by class.
+    """
+    return {
+        name: html.unescape( url )
+        for name, url in re.findall( r"class ?= ?'(prev-page|next-page)' href=\"([^\"]*)\"", response.content.decode() )
+    }
+
+
+class KeysetPaginationTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        cls.other = Shelf.objects.create( name = 'Essais' )
+        start = timezone.now().replace( microsecond = 0 )
+        # Timestamps differing by microseconds only, some scores null.
+        cls.books = [
+            Book.objects.create(
+                title = 'Livre %02d' % index,
+                shelf = cls.shelf if index % 4 else cls.other,
+                score = None if index % 3 == 0 else index % 5,
+                date_added = start + datetime.timedelta( microseconds = index ),
+            )
+            for index in range( 13 )
+        ]
+
+    def walk( self, paginator ):
+        """
+        Returns the pks of the pages, following the next cursors, and of the
+        pages, following the previous cursors back.
+        """
+        page = paginator.page()
+        pages = [ [ book.pk for book in page ] ]
+        # Bounded: a cursor seeking to a wrong position may loop.
+        while page.has_next() and len( pages ) < 10:
+            page = paginator.page( page.next_cursor )
+            pages.append( [ book.pk for book in page ] )
+        back = [ [ book.pk for book in page ] ]
+        while page.has_previous() and len( back ) < 10:
+            page = paginator.page( page.previous_cursor )
+            back.append( [ book.pk for book in page ] )
+        return pages, back[ ::-1 ]
+
+    def test_pages_cover_the_rows_once( self ):
+        for ordering in [ '-date_added', 'date_added', 'score', '-score', 'title', 'pk' ]:
+            with self.subTest( ordering = ordering ):
+                queryset = Book.objects.order_by( ordering )
+                paginator = KeysetPaginator( queryset, 5 )
+                pages, back = self.walk( paginator )
+                self.assertEqual( sum( pages, [] ), [ book.pk for book in queryset.order_by( *paginator.get_ordering( True ) ) ] )
+                self.assertEqual( len( sum( pages, [] ) ), 13 )
+                self.assertEqual( back, pages )
+
+    def test_nulls_are_last( self ):
+        scores = [ book.score for book in KeysetPaginator( Book.objects.order_by( 'score' ), 20 ).page() ]
+        self.assertEqual( scores[ -5: ], [ None ] * 5 )
+        scores = [ book.score for book in KeysetPaginator( Book.objects.order_by( '-score' ), 20 ).page() ]
+        self.assertEqual( scores[ :5 ], [ None ] * 5 )
+
+    def test_invalid_cursor_returns_the_first_page( self ):
+        paginator = KeysetPaginator( Book.objects.order_by( 'title' ), 5 )
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            page = paginator.page( 'forged' )
+        self.assertEqual( [ book.title for book in page ], [ 'Livre %02d' % index for index in range( 5 ) ] )
+        self.assertFalse( page.has_previous() )
+
+    def test_view_pages_by_creation_date( self ):
+        titles = []
+        url = '/bookkeyset/'
+        with self.assertNumQueries( 1 ):
+            response = self.client.get( url )
+        # At most 3 pages of 5 rows: a cursor going back to page 1 loops.
+        for _ in range( 3 ):
+            titles += [ book.title for book in response.context[ 'object_list' ] ]
+            next_url = page_links( response ).get( 'next-page' )
+            if next_url is None:
+                break
+            response = self.client.get( url + next_url )
+        self.assertEqual( titles, [ 'Livre %02d' % index for index in range( 12, -1, -1 ) ] )
+
+    def test_links_keep_the_ordering_and_the_filters( self ):
+        url = '/bookkeyset/'
+        response = self.client.get( url, { 'o': 'title', 'shelf': self.shelf.pk } )
+        expected = [ book.title for book in Book.objects.filter( shelf = self.shelf ).order_by( 'title' ) ]
+        self.assertEqual( [ book.title for book in response.context[ 'object_list' ] ], expected[ :5 ] )
+
+        links = page_links( response )
+        self.assertIn( 'o=title', links[ 'next-page' ] )
+        self.assertIn( 'shelf=%d' % self.shelf.pk, links[ 'next-page' ] )
+        self.assertNotIn( 'prev-page', links )
+
+        response = self.client.get( url + links[ 'next-page' ] )
+        self.assertEqual( [ book.title for book in response.context[ 'object_list' ] ], expected[ 5: ] )
+        links = page_links( response )
+        self.assertIn( 'o=title', links[ 'prev-page' ] )
+        self.assertIn( 'shelf=%d' % self.shelf.pk, links[ 'prev-page' ] )
+
+        response = self.client.get( url + links[ 'prev-page' ] )
+        self.assertEqual( [ book.title for book in response.context[ 'object_list' ] ], expected[ :5 ] )
+
+    def test_append_querystring( self ):
+        request = RequestFactory().get( '/', { 'cursor': 'x', 'q': 'a&b c', 'o': 'title' } )
+        self.assertEqual( append_querystring( request, 'cursor' ), '&amp;q=a%26b+c&amp;o=title' )
+        self.assertEqual( append_querystring( request, 'cursor,q,o' ), '' )
+        self.assertEqual( append_querystring( request ), '&amp;cursor=x&amp;q=a%26b+c&amp;o=title' )
@@ -0,0 +1,76 @@
+from django.http import QueryDict
+from django.test import TestCase
+
+from bsct.columns import get_column_plan
+from bsct.ordering import get_default_ordering, get_sort_links, parse_ordering, with_tiebreaker
+from crud.tests.models import Book, Label, Shelf
+
+
+class OrderingTests( TestCase ):
+
+    def test_default_ordering( self ):
+        # From the creation date, then by pk.
+        self.assertEqual( get_default_ordering( Book ), [ '-date_added' ] )
+        self.assertEqual( get_default_ordering( Shelf ), [ 'pk' ] )
+
+    def test_tiebreaker( self ):
+        self.assertEqual( with_tiebreaker( Book, [ 'title' ] ), [ 'title', 'pk' ] )
+        self.assertEqual( with_tiebreaker( Book, [ '-date_added' ] ), [ '-date_added', '-pk' ] )
+        self.assertEqual( with_tiebreaker( Book, [ 'title', '-id' ] ), [ 'title', '-id' ] )
+
+    def test_parse( self ):
+        self.assertEqual( parse_ordering( Book, '-title,shelf' ), [ '-title', 'shelf_id' ] )
+        # Not sortable: unknown, many-to-many and text columns.
+        self.assertEqual( parse_ordering( Book, 'nope,labels,summary,,-' ), [] )
+
+    def test_unindexed_columns( self ):
+        self.assertEqual( parse_ordering( Book, 'pages', 'allow' ), [ 'pages' ] )
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            self.assertEqual( parse_ordering( Book, 'pages', 'log' ), [ 'pages' ] )
+        with self.assertLogs( 'bsct', 'WARNING' ):
+            self.assertEqual( parse_ordering( Book, 'pages,title', 'reject' ), [ 'title' ] )
+
+    def test_sort_links( self ):
+        columns = get_column_plan( Book ).list_columns
+        links = get_sort_links( Book, columns, QueryDict( 'o=title&page=3&shelf=1' ), exclude = [ 'page' ] )
+        self.assertEqual( links[ 'crud.Book.title' ], { 'url': '?o=-title&shelf=1', 'direction': 'asc' } )
+        self.assertEqual( links[ 'crud.Book.shelf' ], { 'url': '?o=shelf&shelf=1', 'direction': None } )
+        self.assertNotIn( 'crud.Book.labels', links )
+        links = get_sort_links( Book, columns, QueryDict( 'o=-title' ) )
+        self.assertEqual( links[ 'crud.Book.title' ], { 'url': '?o=title', 'direction': 'desc' } )
+
+
+class ListOrderingTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        shelf = Shelf.objects.create( name = 'Romans' )
+        for title in ( 'B', 'A', 'C', 'A' ):
+            Book.objects.create( title = title, shelf = shelf )
+
+    def titles( self, **params ):
+        return [ book.title for book in self.client.get( '/bookall/', params ).context[ 'object_list' ] ]
+
+    def test_list_is_sorted( self ):
+        self.assertEqual( self.titles( o = 'title' ), [ 'A', 'A', 'B', 'C' ] )
+        self.assertEqual( self.titles( o = '-title' ), [ 'C', 'B', 'A', 'A' ] )
+        # Equal titles keep the order of their pks.
+        pks = [ book.pk for book in self.client.get( '/bookall/', { 'o': 'title' } ).context[ 'object_list' ] ][ :2 ]
+        self.assertEqual( pks, sorted( pks ) )
+
+    def test_newest_first_by_default( self ):
+        self.assertEqual( self.titles(), [ 'A', 'C', 'A', 'B' ] )
+
+    def test_headers_link_the_sort( self ):
+        # The links are shown when the list has several pages.
+        for title in ( 'D', 'E' ):
+            Book.objects.create( title = title, shelf = Shelf.objects.first() )
+        response = self.client.get( '/book/', { 'o': 'title', 'page': 1 } )
+        self.assertContains( response, "<a href = '?o=-title'>Titre</a>" )
+        self.assertContains( response, '&#9650;' )
+
+    def test_models_without_creation_date( self ):
+        Label.objects.create( label = 'b' )
+        Label.objects.create( label = 'a' )
+        self.assertEqual( [ label.label for label in self.client.get( '/label/' ).context[ 'object_list' ] ], [ 'b', 'a' ] )
+        self.assertEqual( [ label.label for label in self.client.get( '/label/', { 'o': 'label' } ).context[ 'object_list' ] ], [ 'a', 'b' ] )
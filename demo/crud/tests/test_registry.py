@@ -0,0 +1,95 @@
+import types
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bsct.overrides import find_template_override
+from bsct.registry import AlreadyRegistered, BSCTSite, NotRegistered
+from bsct.urls import LazyView
+from crud.tests.models import Book, Label, Shelf
+
+def urlconf( patterns ):
+    module = types.ModuleType( 'urls' )
+    module.urlpatterns = patterns
+    return override_settings( ROOT_URLCONF = module )
+
+
+LIST_OVERRIDE = "{% extends 'bsct/plain/list.html' %}{% block BSCT_TITLE %}Étagères{% endblock %}"
+
+
+def templates( **sources ):
+    return override_settings( TEMPLATES = [ {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {
+            'context_processors': [ 'django.template.context_processors.request' ],
+            'loaders': [
+                ( 'django.template.loaders.locmem.Loader', sources ),
+                'django.template.loaders.app_directories.Loader',
+            ],
+        },
+    } ] )
+
+
+class RegistryTests( TestCase ):
+
+    def setUp( self ):
+        self.site = BSCTSite()
+        self.site.register( Shelf )
+        self.site.register( Label, crud_types = 'rl', paginate_by = 2, bsct_view_prefix = 'tag' )
+
+    def test_register( self ):
+        self.assertTrue( self.site.is_registered( Shelf ) )
+        self.assertFalse( self.site.is_registered( Book ) )
+        with self.assertRaises( AlreadyRegistered ):
+            self.site.register( Shelf )
+        with self.assertRaises( TypeError ):
+            self.site.register( Book, paginate = 10 )
+        self.site.unregister( Shelf )
+        with self.assertRaises( NotRegistered ):
+            self.site.unregister( Shelf )
+
+    def test_urls( self ):
+        names = [ pattern.name for pattern in self.site.urls ]
+        self.assertIn( 'shelf_create', names )
+        self.assertIn( 'shelf_list', names )
+        self.assertEqual( [ name for name in names if name.startswith( 'tag_' ) ], [ 'tag_detail', 'tag_list' ] )
+
+    def test_views_are_built_on_their_first_request( self ):
+        patterns = self.site.urls
+        for pattern in patterns:
+            self.assertIsInstance( pattern.callback, LazyView )
+            self.assertIsNone( pattern.callback.view )
+        with mock.patch( 'bsct.urls.get_model_form' ) as get_model_form:
+            self.site.urls
+        get_model_form.assert_not_called()
+
+        with urlconf( patterns ):
+            response = self.client.get( reverse( 'tag_list' ) )
+        self.assertEqual( response.status_code, 200 )
+        built = [ pattern.name for pattern in patterns if pattern.callback.view is not None ]
+        self.assertEqual( built, [ 'tag_list' ] )
+
+    def test_options( self ):
+        for index in range( 3 ):
+            Label.objects.create( label = 'Étiquette %d' % index )
+        with urlconf( self.site.urls ):
+            response = self.client.get( reverse( 'tag_list' ) )
+        self.assertEqual( len( response.context[ 'object_list' ] ), 2 )
+
+
+class TemplateOverrideTests( TestCase ):
+
+    def test_no_override( self ):
+        self.assertIsNone( find_template_override( Shelf, 'list.html' ) )
+        response = self.client.get( '/shelf/' )
+        self.assertTemplateUsed( response, 'bsct/plain/list.html' )
+
+    def test_override( self ):
+        with templates( **{ 'shelf/list.html': LIST_OVERRIDE } ):
+            self.assertEqual( find_template_override( Shelf, 'list.html' ), 'shelf/list.html' )
+            response = self.client.get( '/shelf/' )
+            self.assertTemplateUsed( response, 'shelf/list.html' )
+            self.assertContains( response, 'Étagères' )
+        # The lookups are forgotten with the TEMPLATES setting.
+        self.assertIsNone( find_template_override( Shelf, 'list.html' ) )
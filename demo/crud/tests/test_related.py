@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+
+from bsct.columns import get_column_plan, related_lookups
+from bsct.views import ListView
+from crud.tests.models import Book, Loan, Review, Shelf
+
+
+class RelatedLookupsTests( TestCase ):
+
+    def add_books( self, count ):
+        for index in range( count ):
+            book = Book.objects.create( title = 'Livre %d' % index, shelf = Shelf.objects.create( name = 'Étagère %d' % index ) )
+            Loan.objects.create( book = book, borrower = User.objects.create( username = 'lecteur%d-%d' % ( count, index ) ) )
+
+    def test_lookups_of_the_paths( self ):
+        self.assertEqual( related_lookups( Book, [ 'shelf', 'shelf__name', 'labels', 'reviews__text', 'title' ] ), ( [ 'shelf' ], [ 'labels', 'reviews' ] ) )
+        self.assertEqual( related_lookups( Review, [ 'book__shelf__name' ] ), ( [ 'book__shelf' ], [] ) )
+        self.assertEqual( related_lookups( Shelf, [ 'book__labels' ] ), ( [], [ 'book_set__labels' ] ) )
+
+    def test_lookups_of_the_plans( self ):
+        plan = get_column_plan( Loan )
+        self.assertEqual( plan.list_select_related, [ 'book', 'borrower' ] )
+        self.assertEqual( plan.list_prefetch_related, [] )
+
+    def test_list_queries_do_not_grow_with_the_rows( self ):
+        self.add_books( 3 )
+        with self.assertNumQueries( 1 ):
+            self.client.get( '/bookall/' )
+        # The count and the page.
+        with self.assertNumQueries( 2 ):
+            self.client.get( '/loan/' )
+        self.add_books( 5 )
+        with self.assertNumQueries( 1 ):
+            self.client.get( '/bookall/' )
+        with self.assertNumQueries( 2 ):
+            self.client.get( '/loan/' )
+
+    def test_lookups_can_be_disabled( self ):
+        self.add_books( 3 )
+        view = ListView.as_view( model = Book, paginate_by = None, select_related = False )
+        with self.assertNumQueries( 4 ):
+            view( RequestFactory().get( '/' ) ).render()
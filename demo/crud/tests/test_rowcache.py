@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import translation
+
+from bsct.rowcache import get_row_cache_stats, reset_row_cache_stats
+from crud.tests.models import Book, Shelf
+
+
+class RowCacheTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.shelf = Shelf.objects.create( name = 'Romans' )
+        cls.books = [ Book.objects.create( title = 'Livre %d' % index, shelf = cls.shelf ) for index in range( 3 ) ]
+
+    def setUp( self ):
+        cache.clear()
+        reset_row_cache_stats()
+
+    def test_rows_are_cached( self ):
+        first = self.client.get( '/bookrows/' ).content
+        self.assertEqual( get_row_cache_stats()[ 'crud.book' ], { 'hits': 0, 'misses': 3 } )
+        second = self.client.get( '/bookrows/' ).content
+        self.assertEqual( get_row_cache_stats()[ 'crud.book' ], { 'hits': 3, 'misses': 3 } )
+        self.assertEqual( first, second )
+
+    def test_rows_are_cached_by_language( self ):
+        self.client.get( '/bookrows/' )
+        with translation.override( 'fr' ):
+            self.client.get( '/bookrows/' )
+        self.assertEqual( get_row_cache_stats()[ 'crud.book' ], { 'hits': 0, 'misses': 6 } )
+        self.client.get( '/bookrows/' )
+        self.assertEqual( get_row_cache_stats()[ 'crud.book' ], { 'hits': 3, 'misses': 6 } )
+
+    def test_saved_object_is_rendered_again( self ):
+        self.client.get( '/bookrows/' )
+        book = self.books[ 0 ]
+        book.title = 'Renommé'
+        book.save()
+        self.assertContains( self.client.get( '/bookrows/' ), 'Renommé' )
+
+    def test_related_object_change_invalidates_the_rows( self ):
+        self.client.get( '/bookrows/' )
+        self.shelf.name = 'Poésie'
+        self.shelf.save()
+        response = self.client.get( '/bookrows/' )
+        self.assertContains( response, 'Poésie', count = 3 )
+        self.assertEqual( get_row_cache_stats()[ 'crud.book' ][ 'hits' ], 0 )
+
+    def test_rows_fetched_by_datatables_are_not_read( self ):
+        with self.assertNumQueries( 0 ):
+            response = self.client.get( '/bookdata/' )
+        self.assertNotIn( 'bsct_row_cache', response.context )
+        self.assertEqual( get_row_cache_stats(), {} )
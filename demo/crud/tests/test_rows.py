@@ -0,0 +1,52 @@
+import re
+
+from django.template import RequestContext, Template
+from django.test import TestCase
+
+from crud.tests.models import Boat, Book, Car, Label, Review, Shelf, Vehicle
+
+ROWS = re.compile( r'<!-- BSCT_LIST_ITEMS_ROWS -->(.*)<!-- /BSCT_LIST_ITEMS_ROWS -->', re.S )
+
+
+class RowsTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        shelf = Shelf.objects.create( name = 'Romans & <nouvelles>' )
+        label = Label.objects.create( label = 'SF' )
+        for index in range( 3 ):
+            book = Book.objects.create( title = 'Roman <%d>' % index, shelf = shelf, score = index or None, summary = 'Résumé' )
+            book.labels.add( label )
+            Review.objects.create( book = book, text = 'Bien' )
+        Vehicle.objects.create( name = 'Charrette' )
+        Car.objects.create( name = 'Voiture', seats = 5 )
+        Boat.objects.create( name = 'Bateau', length = 12 )
+
+    def rows( self, html ):
+        return ROWS.search( html ).group( 1 )
+
+    def render_overridden( self, response, blocks ):
+        template = Template( "{% extends 'bsct/plain/list.html' %}" + blocks )
+        return template.render( RequestContext( response.wsgi_request, response.context_data ) )
+
+    def test_same_rows_as_the_template_loop( self ):
+        response = self.client.get( '/bookall/' )
+        self.assertEqual( len( response.context[ 'object_list' ] ), 3 )
+        rows = self.rows( response.content.decode() )
+        self.assertEqual( rows.count( '<tr' ), 3 )
+
+        # An overridden block (empty as the original) renders the loop.
+        loop = self.rows( self.render_overridden( response, '{% block BSCT_LIST_ITEMS_EXTRA %}{% endblock %}' ) )
+        self.assertHTMLEqual( rows, loop )
+
+    def test_same_rows_for_a_hierarchy( self ):
+        response = self.client.get( '/vehicle/' )
+        self.assertEqual( self.rows( response.content.decode() ).count( '<tr' ), 3 )
+        loop = self.rows( self.render_overridden( response, '{% block BSCT_LIST_ITEMS_EXTRA %}{% endblock %}' ) )
+        self.assertHTMLEqual( self.rows( response.content.decode() ), loop )
+
+    def test_overridden_block_is_rendered( self ):
+        response = self.client.get( '/bookall/' )
+        html = self.render_overridden( response, '{% block BSCT_LIST_ITEMS_EXTRA %}<td>extra {{ object.pk }}</td>{% endblock %}' )
+        for book in Book.objects.all():
+            self.assertInHTML( '<td>extra %d</td>' % book.pk, html )
@@ -0,0 +1,54 @@
+import re
+from unittest import mock
+
+from django.test import TestCase
+
+from bsct.views import ListView
+from crud.tests.models import Book, Shelf
+
+
+def rows( content ):
+    return re.findall( r'<tr id.*?</tr>', content, re.S )
+
+
+class StreamingTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        cls.romans = Shelf.objects.create( name = 'Romans' )
+        cls.poesie = Shelf.objects.create( name = 'Poésie' )
+        for index in range( 5 ):
+            Book.objects.create( title = 'Roman %d' % index, shelf = cls.romans )
+        Book.objects.create( title = 'Poèmes', shelf = cls.poesie )
+
+    def get_chunks( self, url, **params ):
+        response = self.client.get( url, params )
+        self.assertTrue( response.streaming )
+        return [ chunk.decode() for chunk in response.streaming_content ]
+
+    def test_streamed_page_is_the_rendered_page( self ):
+        streamed = ''.join( self.get_chunks( '/bookstream/' ) )
+        rendered = self.client.get( '/bookall/' ).content.decode()
+        self.assertEqual( rows( streamed ), rows( rendered ) )
+        self.assertIn( '</html>', streamed )
+        self.assertEqual( streamed.count( '<tr id' ), 6 )
+
+    def test_rows_are_rendered_by_chunks( self ):
+        with mock.patch.object( ListView, 'stream_chunk_size', 2 ):
+            chunks = self.get_chunks( '/bookstream/' )
+        # The head, three chunks of rows and the tail.
+        self.assertEqual( len( chunks ), 5 )
+        self.assertEqual( [ chunk.count( '<tr id' ) for chunk in chunks ], [ 0, 2, 2, 2, 0 ] )
+
+    def test_filters( self ):
+        content = ''.join( self.get_chunks( '/bookstream/', shelf = self.poesie.pk ) )
+        self.assertEqual( content.count( '<tr id' ), 1 )
+        self.assertIn( 'Poèmes', content )
+
+    def test_empty_list( self ):
+        chunks = self.get_chunks( '/bookstream/', shelf = 0 )
+        self.assertEqual( len( chunks ), 2 )
+        self.assertNotIn( '<tr id', ''.join( chunks ) )
+
+    def test_paginated_lists_are_not_streamed( self ):
+        self.assertFalse( self.client.get( '/book/' ).streaming )
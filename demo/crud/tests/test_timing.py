@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils.deprecation import MiddlewareMixin
+
+from crud.tests.models import Book, Shelf
+
+
+class TemplateResponseMiddleware( MiddlewareMixin ):
+    """
+    Changes the context of the template responses, which must not be
+    rendered yet.
+    """
+
+    def process_template_response( self, request, response ):
+        response[ 'X-Rendered' ] = str( response.is_rendered )
+        response.context_data[ 'model' ] = 'Modifié'
+        return response
+
+
+@mock.patch( 'bsct.timing.TIMING_ENABLED', True )
+class TimingTests( TestCase ):
+
+    @classmethod
+    def setUpTestData( cls ):
+        shelf = Shelf.objects.create( name = 'Romans' )
+        for index in range( 3 ):
+            Book.objects.create( title = 'Livre %d' % index, shelf = shelf )
+
+    def get_metrics( self, response ):
+        return [ metric.split( ';' )[ 0 ] for metric in response[ 'Server-Timing' ].split( ', ' ) ]
+
+    def test_server_timing_header( self ):
+        response = self.client.get( '/book/' )
+        metrics = self.get_metrics( response )
+        for name in ( 'sql', 'render', 'total' ):
+            self.assertIn( name, metrics )
+        self.assertIn( 'queries"', response[ 'Server-Timing' ] )
+
+    @override_settings( MIDDLEWARE = [ 'crud.tests.test_timing.TemplateResponseMiddleware' ] )
+    def test_template_response_middleware_sees_an_unrendered_response( self ):
+        response = self.client.get( '/book/' )
+        self.assertEqual( response[ 'X-Rendered' ], 'False' )
+        self.assertContains( response, 'Liste : Modifié' )
+        self.assertIn( 'render', self.get_metrics( response ) )
+
+    def test_slow_requests_are_logged( self ):
+        with mock.patch( 'bsct.timing.THRESHOLDS', { 'queries': 0 } ):
+            with self.assertLogs( 'bsct', 'WARNING' ) as logs:
+                self.client.get( '/book/' )
+        self.assertIn( 'Slow request GET /book/ (queries)', logs.output[ 0 ] )
+        self.assertIn( 'total', logs.records[ 0 ].bsct_timing )
+
+    def test_fast_requests_are_not_logged( self ):
+        with mock.patch( 'bsct.timing.THRESHOLDS', { 'queries': 1000 } ):
+            with self.assertNoLogs( 'bsct', 'WARNING' ):
+                self.client.get( '/book/' )
+
+    def test_redirects_are_timed( self ):
+        shelf = Shelf.objects.first()
+        response = self.client.post( '/shelf/update/%d' % shelf.pk, { 'name': 'Poésie' } )
+        self.assertEqual( response.status_code, 302 )
+        self.assertIn( 'total', self.get_metrics( response ) )
+
+    async def test_async_views( self ):
+        response = await self.async_client.get( '/bookasync/' )
+        self.assertEqual( response.status_code, 200 )
+        metrics = self.get_metrics( response )
+        self.assertIn( 'render', metrics )
+        self.assertIn( 'total', metrics )
+
+
+class DisabledTimingTests( TestCase ):
+
+    def test_no_header( self ):
+        self.assertFalse( self.client.get( '/shelf/' ).has_header( 'Server-Timing' ) )
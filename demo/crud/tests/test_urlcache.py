@@ -0,0 +1,65 @@
+from django.test import TestCase, override_settings
+from django.urls import NoReverseMatch, reverse, set_script_prefix
+from django.utils import translation
+
+from bsct import urlcache
+from bsct.urlcache import clear_url_cache, reverse_name, reverse_pk
+from crud.tests.models import Shelf
+
+
+class URLCacheTests( TestCase ):
+
+    def setUp( self ):
+        clear_url_cache()
+        self.addCleanup( clear_url_cache )
+
+    def test_same_urls_as_reverse( self ):
+        for pk in ( 1, 42, 9081726354, '7' ):
+            self.assertEqual( reverse_pk( 'shelf_detail', pk ), reverse( 'shelf_detail', kwargs = { 'pk': pk } ) )
+        self.assertEqual( reverse_name( 'shelf_create' ), reverse( 'shelf_create' ) )
+        self.assertEqual( Shelf( pk = 3 ).get_absolute_url(), reverse( 'shelf_detail', kwargs = { 'pk': 3 } ) )
+
+    def test_formatter_is_built_once( self ):
+        reverse_pk( 'shelf_detail', 1 )
+        self.assertEqual( len( urlcache._formatters ), 1 )
+        reverse_pk( 'shelf_detail', 2 )
+        reverse_pk( 'shelf_update', 2 )
+        self.assertEqual( len( urlcache._formatters ), 2 )
+
+    def test_other_pks_are_reversed( self ):
+        # Not matched by the BSCT patterns.
+        with self.assertRaises( NoReverseMatch ):
+            reverse_pk( 'shelf_detail', 'abc' )
+
+    def test_unknown_names_are_not_cached( self ):
+        with self.assertRaises( NoReverseMatch ):
+            reverse_pk( 'unknown_detail', 1 )
+        with self.assertRaises( NoReverseMatch ):
+            reverse_name( 'unknown_create' )
+        self.assertEqual( urlcache._formatters, {} )
+        self.assertEqual( urlcache._urls, {} )
+
+    def test_script_prefix( self ):
+        url = reverse_pk( 'shelf_detail', 1 )
+        set_script_prefix( '/app/' )
+        try:
+            self.assertEqual( reverse_pk( 'shelf_detail', 1 ), '/app' + url )
+        finally:
+            set_script_prefix( '/' )
+        self.assertEqual( reverse_pk( 'shelf_detail', 1 ), url )
+
+    def test_language( self ):
+        with override_settings( ROOT_URLCONF = 'crud.tests.urls_i18n' ):
+            with translation.override( 'fr' ):
+                self.assertEqual( reverse_pk( 'shelf_detail', 1 ), reverse( 'shelf_detail', kwargs = { 'pk': 1 } ) )
+                self.assertTrue( reverse_name( 'shelf_create' ).startswith( '/fr/' ) )
+            with translation.override( 'en' ):
+                self.assertTrue( reverse_pk( 'shelf_detail', 1 ).startswith( '/en/' ) )
+                self.assertTrue( reverse_name( 'shelf_create' ).startswith( '/en/' ) )
+
+    def test_urlconf_change_clears_the_cache( self ):
+        reverse_name( 'shelf_create' )
+        with override_settings( ROOT_URLCONF = 'crud.tests.urls_i18n' ):
+            self.assertEqual( urlcache._urls, {} )
+            self.assertTrue( reverse_name( 'shelf_create' ).startswith( '/en' ) )
+        self.assertFalse( reverse_name( 'shelf_create' ).startswith( '/en' ) )
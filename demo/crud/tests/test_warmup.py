@@ -0,0 +1,56 @@
+import types
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import path
+
+from bsct import columns
+from bsct.urls import LazyView, URLGenerator
+from bsct.warmup import unwrap_view, warmup
+from crud.tests.models import Book, Shelf
+
+
+def failing_build():
+    raise ValueError( 'vue cassée' )
+
+
+def make_urlconf():
+    urlconf = types.ModuleType( 'warmup_urls' )
+    urlconf.urlpatterns = (
+        URLGenerator( Shelf ).get_urlpatterns( 'crudl', login_required = True )
+        + URLGenerator( Book, conditional = True ).get_urlpatterns( 'rl' )
+        + [ path( 'broken/', LazyView( failing_build ), name = 'broken' ) ]
+    )
+    return urlconf
+
+
+class WarmupTests( SimpleTestCase ):
+
+    def test_warmup( self ):
+        urlconf = make_urlconf()
+        columns._plans.pop( Shelf, None )
+        report = warmup( urlconf )
+
+        # The views are built, under their wrappers.
+        lazy_views = [ pattern.callback for pattern in urlconf.urlpatterns if isinstance( pattern.callback, LazyView ) ]
+        self.assertTrue( lazy_views )
+        self.assertTrue( all( view.view is not None for view in lazy_views if view.build is not failing_build ) )
+        self.assertIsNotNone( unwrap_view( urlconf.urlpatterns[ 0 ].callback ) )
+        self.assertIn( Shelf, columns._plans )
+
+        self.assertEqual( set( report.timings ), { '(common)', 'crud.Shelf', 'crud.Book' } )
+        self.assertGreater( report.timings[ 'crud.Shelf' ][ 'forms' ], 0 )
+        self.assertEqual( report.timings[ 'crud.Book' ][ 'forms' ], 0 )
+        self.assertEqual( report.slowest()[ 0 ], max( report.timings, key = report.total ) )
+        # A view which fails to build is reported, not raised.
+        self.assertEqual( report.errors, { 'broken': [ 'views: vue cassée' ] } )
+
+    def test_command( self ):
+        stdout, stderr = StringIO(), StringIO()
+        call_command( 'bsct_warmup', urlconf = 'crud.tests.urls', slow = 0, stdout = stdout, stderr = stderr )
+        output = stdout.getvalue()
+        self.assertIn( 'crud.Book', output )
+        self.assertIn( 'slow', output )
+        self.assertRegex( output, r'\d+ models warmed up in' )
+        self.assertEqual( stderr.getvalue(), '' )
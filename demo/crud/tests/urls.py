@@ -0,0 +1,33 @@
+"""
+URLconf of the tests: the models under the options the tests exercise.
+"""
+from django.urls import include, path
+
+from bsct.urls import URLGenerator
+from crud.tests import models
+
+
+def patterns( model, crud_types = 'crudl', prefix = None, generator = None, **kwargs ):
+    generator = generator or {}
+    return path( '', include( URLGenerator( model, bsct_view_prefix = prefix, **generator ).get_urlpatterns( crud_types, **kwargs ) ) )
+
+
+urlpatterns = [
+    patterns( models.Shelf ),
+    patterns( models.Label ),
+    patterns( models.Book, 'crudlei', paginate_by = 5 ),
+    patterns( models.Review ),
+    patterns( models.Loan, 'l' ),
+    # Only the parent of the hierarchy is registered.
+    patterns( models.Vehicle, 'rl', paginate_by = None ),
+    patterns( models.Vehicle, 'j', 'vehicledata' ),
+    # The list of books under the other options.
+    patterns( models.Book, 'l', 'bookall', paginate_by = None ),
+    patterns( models.Book, 'l', 'bookkeyset', paginate_by = 5, keyset_pagination = True ),
+    patterns( models.Book, 'l', 'bookcached', paginate_by = 5, count_strategy = 'cached' ),
+    patterns( models.Book, 'l', 'bookrows', { 'row_cache': True }, paginate_by = 5 ),
+    patterns( models.Book, 'lj', 'bookdata', { 'row_cache': True }, paginate_by = None ),
+    patterns( models.Book, 'l', 'bookstream', paginate_by = None, streaming = True ),
+    patterns( models.Book, 'rl', 'bookcond', { 'conditional': True }, paginate_by = 5 ),
+    patterns( models.Book, 'crudl', 'bookasync', paginate_by = 5, async_views = True ),
+]
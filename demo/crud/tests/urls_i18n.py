@@ -0,0 +1,10 @@
+"""
+URLconf of the tests of the URLs prefixed by the language.
+"""
+from django.conf.urls.i18n import i18n_patterns
+
+from crud.tests import models
+from crud.tests.urls import patterns
+
+
+urlpatterns = i18n_patterns( patterns( models.Shelf, 'cr' ) )
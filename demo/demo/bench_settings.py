@@ -0,0 +1,23 @@
+"""
+Settings of the benchmarks (see bench/README.md):
+
+    python manage.py bsct_benchmark --settings=demo.bench_settings
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['localhost', 'testserver']
+
+INSTALLED_APPS = INSTALLED_APPS + ['bench']
+
+ROOT_URLCONF = 'bench.urls'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get( 'BSCT_BENCH_DB', os.path.join( BASE_DIR, 'bench.sqlite3' ) ),
+    }
+}
@@ -0,0 +1,27 @@
+"""
+Settings of the tests of BSCT:
+
+    python manage.py test crud --settings=demo.test_settings
+"""
+from .settings import *  # noqa: F401,F403
+
+ALLOWED_HOSTS = ['localhost', 'testserver']
+
+# The benchmarks are tested too (crud/tests/test_bench.py).
+INSTALLED_APPS = INSTALLED_APPS + [ 'bench' ]
+
+ROOT_URLCONF = 'crud.tests.urls'
+
+# The models of the tests (crud/tests/models.py) are created without
+# migrations.
+MIGRATION_MODULES = { 'crud': None }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = [ 'django.contrib.auth.hashers.MD5PasswordHasher' ]
+
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'